@@ -0,0 +1,155 @@
+"""
+Remote catalog benchmark: per-invocation latency and origin load.
+A local stand-in for blob storage serves the bundled catalog with a fixed
+delay per request (the round trip to a storage account) and publishes a
+new version every few seconds. Threads act as concurrent invocations and
+get the catalog either by fetching the blob on every invocation or from a
+Catalog with an HttpBackend, which revalidates in the background once per
+check interval and keeps serving the snapshot it has. Each invocation then
+spends --think-ms on the rest of its work; only getting the catalog is timed.
+
+Usage (from backend/azure-functions):
+    python benchmarks/catalog_backend.py [--threads 16] [--seconds 5] [--origin-ms 30] [--check-interval 1]
+        [--think-ms 1]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from stand_ins import APP_ROOT  # noqa: F401 (puts the app root on sys.path)
+
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog, validate_document
+from shared_code.catalog_backends import HttpBackend
+
+# Seconds between catalog versions published at the origin
+PUBLISH_INTERVAL = 2.0
+
+
+class Origin(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, document, delay):
+        super().__init__(('127.0.0.1', 0), OriginHandler)
+        self.document = document
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bodies = 0
+        self.publish()
+
+    def publish(self):
+        self.document = {**self.document, "version": self.document["version"] + 1}
+        self.body = json.dumps(self.document, ensure_ascii=False).encode('utf-8')
+        self.etag = f'"{self.document["version"]}"'
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.delay)
+        body, etag = server.body, server.etag
+        unchanged = self.headers.get('If-None-Match') == etag
+        with server.lock:
+            server.requests += 1
+            server.bodies += not unchanged
+        self.send_response(304 if unchanged else 200)
+        self.send_header('ETag', etag)
+        if not unchanged:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not unchanged:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def naive_fetch(address):
+    # What a handler without a backend would do: a new request and parse per invocation
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        connection.request('GET', '/catalog.json')
+        document = json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+    validate_document(document)
+    return document['version']
+
+
+def run(args, origin, get_version):
+    latencies = [[] for _ in range(args.threads)]
+    stale = [0] * args.threads
+    stop = threading.Event()
+
+    def target(i):
+        while not stop.is_set():
+            start = time.perf_counter()
+            version = get_version()
+            latencies[i].append(time.perf_counter() - start)
+            stale[i] += version != origin.document['version']
+            # The rest of the invocation: handler work and writing the response
+            time.sleep(args.think_ms / 1000)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        time.sleep(min(PUBLISH_INTERVAL, max(0.0, deadline - time.monotonic())))
+        origin.publish()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sorted(value for values in latencies for value in values), sum(stale)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-invocation catalog fetches with a revalidating backend')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--origin-ms', type=float, default=30)
+    parser.add_argument('--check-interval', type=float, default=1.0)
+    parser.add_argument('--think-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+
+    print(f'{args.threads} threads, {args.seconds:g} s, origin {args.origin_ms:g} ms, '
+          f'new version every {PUBLISH_INTERVAL:g} s\n')
+    print(f'{"mode":<24}{"calls":>9}{"p50 us":>10}{"p99 us":>10}{"max ms":>9}'
+          f'{"origin req":>12}{"bodies":>8}{"stale %":>9}')
+    print('-' * 91)
+    for name in ('fetch per invocation', 'stale-while-revalidate'):
+        origin = Origin(document, args.origin_ms / 1000)
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        if name == 'fetch per invocation':
+            def get_version():
+                return naive_fetch(origin.server_address)
+        else:
+            url = f'http://127.0.0.1:{origin.server_address[1]}/catalog.json'
+            catalog = Catalog(HttpBackend(url), check_interval=args.check_interval, shared_directory='')
+
+            def get_version():
+                return catalog.current().version
+        origin.requests = origin.bodies = 0
+        latencies, stale = run(args, origin, get_version)
+        print(f'{name:<24}{len(latencies):>9}{percentile(latencies, 0.5) * 1e6:>10.1f}'
+              f'{percentile(latencies, 0.99) * 1e6:>10.1f}{latencies[-1] * 1000:>9.1f}'
+              f'{origin.requests:>12}{origin.bodies:>8}{stale / len(latencies) * 100:>9.2f}')
+        origin.shutdown()
+        origin.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Memory benchmark: compact interned catalog vs nested dict-of-lists layout.
+Generates a synthetic multi-curriculum, multi-grade, multi-locale catalog
+and measures the memory each layout retains with tracemalloc, then what one
+whole CatalogSnapshot of the same topics (as one catalog document) and its
+ApiView retain once the document itself is dropped.
+
+Usage (from backend/azure-functions):
+    python benchmarks/catalog_memory.py [--topics-per-subject 60]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_code.catalog import CatalogSnapshot
+from shared_code.compact_catalog import CompactCatalog
+from shared_code.handlers import ApiView
+
+CURRICULA = ["pl", "ua", "intl"]
+GRADES = range(1, 9)
+SUBJECTS = ["Math", "English", "Science", "History", "Geography", "Art", "Music", "IT"]
+LOCALES = ["ru", "en", "pl", "uk", "de", "es"]
+
+
+def generate_topics(topics_per_subject):
+    """
+    Yield (curriculum, grade, subject, {locale: name}) rows.
+    Names are built fresh for every row, as json.load would produce them;
+    curricula share most topic names for the same grade and subject.
+    """
+    for curriculum in CURRICULA:
+        for grade in GRADES:
+            for subject in SUBJECTS:
+                topics = []
+                for position in range(topics_per_subject):
+                    # Every fifth topic is specific to the curriculum
+                    owner = curriculum if position % 5 == 0 else "common"
+                    topics.append({
+                        locale: "".join([subject, " ", str(grade), ".", str(position), " ", owner, " ", locale])
+                        for locale in LOCALES
+                    })
+                yield curriculum, grade, subject, topics
+
+
+def build_dict_of_lists(topics_per_subject):
+    """
+    Current layout scaled up: {curriculum: {grade: {locale: {subject: [name, ...]}}}}
+    """
+    catalog = {}
+    for curriculum, grade, subject, topics in generate_topics(topics_per_subject):
+        by_locale = catalog.setdefault(curriculum, {}).setdefault(grade, {})
+        for locale in LOCALES:
+            by_locale.setdefault(locale, {})[subject] = [names[locale] for names in topics]
+    return catalog
+
+
+def build_compact(topics_per_subject):
+    catalog = CompactCatalog(LOCALES)
+    for curriculum, grade, subject, topics in generate_topics(topics_per_subject):
+        catalog.add_topics(curriculum, grade, subject, topics)
+    catalog.freeze()
+    return catalog
+
+
+def build_document(topics_per_subject):
+    """
+    The same topics as one catalog document: every curriculum and grade of
+    a subject in that subject's topic list, each topic requiring the previous one.
+    """
+    subjects = {subject: [] for subject in SUBJECTS}
+    for curriculum, grade, subject, topics in generate_topics(topics_per_subject):
+        for position, names in enumerate(topics):
+            topic = {"id": f"{subject}-{curriculum}-{grade}-{position}", "names": names}
+            if subjects[subject]:
+                topic["requires"] = [subjects[subject][-1]["id"]]
+            subjects[subject].append(topic)
+    return {
+        "version": 1,
+        "default_language": LOCALES[0],
+        "languages": LOCALES,
+        "subjects": [
+            {"id": subject, "names": {locale: f"{subject} ({locale})" for locale in LOCALES}, "topics": topics}
+            for subject, topics in subjects.items()
+        ]
+    }
+
+
+def build_snapshot(topics_per_subject):
+    return CatalogSnapshot(build_document(topics_per_subject))
+
+
+def build_snapshot_with_view(topics_per_subject):
+    snapshot = build_snapshot(topics_per_subject)
+    snapshot.views["api"] = ApiView(snapshot)
+    return snapshot
+
+
+def measure(builder, topics_per_subject):
+    """
+    Return (retained bytes, peak bytes, catalog) for one layout.
+    """
+    gc.collect()
+    tracemalloc.start()
+    catalog = builder(topics_per_subject)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, peak, catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--topics-per-subject', type=int, default=60)
+    args = parser.parse_args()
+
+    topic_count = len(CURRICULA) * len(GRADES) * len(SUBJECTS) * args.topics_per_subject
+    print(f"Topics: {topic_count}, locales: {len(LOCALES)}, localized names: {topic_count * len(LOCALES)}")
+    print("=" * 60)
+
+    results = {}
+    for name, builder in [("dict-of-lists", build_dict_of_lists), ("compact", build_compact)]:
+        retained, peak, catalog = measure(builder, args.topics_per_subject)
+        results[name] = (retained, catalog)
+        print(f"{name:>14}: retained {retained / 1024 / 1024:7.2f} MiB, peak {peak / 1024 / 1024:7.2f} MiB")
+
+    # Both layouts must answer the same lookups
+    nested, compact = results["dict-of-lists"][1], results["compact"][1]
+    for curriculum in CURRICULA:
+        assert compact.topics(curriculum, 4, "Math", "en") == nested[curriculum][4]["en"]["Math"]
+
+    ratio = results["dict-of-lists"][0] / results["compact"][0]
+    print("-" * 60)
+    print(f"compact uses {1 / ratio:.0%} of the dict-of-lists memory ({ratio:.1f}x smaller)")
+    print(f"distinct strings: {len(compact.strings)}")
+
+    # A whole snapshot (compact store, names by id, prerequisites; the document is not kept),
+    # then with the API view's prebuilt responses, search index and lookup tables
+    print("-" * 60)
+    for name, builder in [("snapshot", build_snapshot), ("+ api view", build_snapshot_with_view)]:
+        retained, peak, snapshot = measure(builder, args.topics_per_subject)
+        print(f"{name:>14}: retained {retained / 1024 / 1024:7.2f} MiB, peak {peak / 1024 / 1024:7.2f} MiB")
+    print(f"one snapshot of {len(snapshot.topic_entries)} topics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Import-to-first-response benchmark.
+Starts fresh interpreters and measures, in each, the import of
+azure.functions (already loaded by the real worker), the import of the
+router function (catalog load and view build), the optional warm-up and the
+first request. Modes compare a plain deployment (no bytecode cache, catalog
+from JSON), the output of the build step (bytecode and catalog snapshot)
+and the build step followed by the warmup function.
+
+Usage (from backend/azure-functions):
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from stand_ins import APP_ROOT
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import azure.functions as func
+azure_done = time.perf_counter()
+sys.path.insert(0, 'router')
+from __init__ import main
+import_done = time.perf_counter()
+if sys.argv[1] == 'warm':
+    from shared_code import handlers
+    handlers.warm_up()
+warm_done = time.perf_counter()
+req = func.HttpRequest('GET', 'http://localhost/api/topics', route_params={'resource': 'topics'},
+                       params={'subject': 'Math'}, headers={'Accept-Encoding': 'gzip'}, body=b'')
+response = main(req)
+assert response.status_code == 200
+first_done = time.perf_counter()
+print(json.dumps({
+    'azure_ms': (azure_done - start) * 1e3,
+    'import_ms': (import_done - azure_done) * 1e3,
+    'warmup_ms': (warm_done - import_done) * 1e3,
+    'first_ms': (first_done - warm_done) * 1e3
+}))
+'''
+
+FIELDS = ('azure_ms', 'import_ms', 'warmup_ms', 'first_ms')
+
+
+def run_child(mode, snapshot_path, empty_cache):
+    env = dict(os.environ)
+    env['CATALOG_SNAPSHOT'] = snapshot_path
+    if mode == 'source':
+        # Like a read-only package: nothing cached, nothing written
+        env['CATALOG_SNAPSHOT'] = ''
+        env['PYTHONPYCACHEPREFIX'] = empty_cache
+        env['PYTHONDONTWRITEBYTECODE'] = '1'
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, mode], cwd=APP_ROOT, env=env,
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import-to-first-response time')
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters per mode')
+    args = parser.parse_args()
+
+    from shared_code.catalog import DEFAULT_CATALOG_PATH
+    from shared_code.precompiled import build_snapshot, compile_bytecode
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, 'catalog.snapshot')
+        build_snapshot(os.environ.get('CATALOG_PATH', DEFAULT_CATALOG_PATH), snapshot_path)
+        compile_bytecode(APP_ROOT)
+        empty_cache = os.path.join(directory, 'pycache')
+
+        print(f'{"mode":<10}' + ''.join(f'{field:>12}' for field in FIELDS) + f'{"own total":>12}')
+        print('-' * 70)
+        for mode in ('source', 'built', 'warm'):
+            results = [run_child(mode, snapshot_path, empty_cache) for _ in range(args.runs)]
+            medians = {field: statistics.median(result[field] for result in results) for field in FIELDS}
+            # Time a request waits once azure.functions is loaded; warm-up runs before traffic
+            total = medians['import_ms'] + medians['first_ms']
+            print(f'{mode:<10}' + ''.join(f'{medians[field]:>12.2f}' for field in FIELDS) + f'{total:>12.2f}')
+    print(f'\nMedian of {args.runs} runs, milliseconds.')
+
+
+if __name__ == '__main__':
+    main()
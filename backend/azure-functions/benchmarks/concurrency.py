@@ -0,0 +1,115 @@
+"""
+Concurrency benchmark for the sync and async entry points.
+An asyncio stand-in for the Functions host keeps a fixed number of
+invocations in flight: sync mains run in a thread pool (as the Python
+worker runs them), async mains run as tasks on the event loop. Reports
+throughput and latency percentiles per path and checks that both paths
+return identical responses.
+
+Usage (from backend/azure-functions):
+    python benchmarks/concurrency.py
+    python benchmarks/concurrency.py --concurrency 100 500 --invocations 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stand_ins import BenchRequest
+
+import get_subjects
+import get_topics
+
+# Default size of the Python worker's thread pool for sync functions
+DEFAULT_THREADS = min(32, (os.cpu_count() or 1) + 4)
+
+REQUESTS = [
+    (get_subjects, {'params': {'lang': 'en'}}),
+    (get_subjects, {'headers': {'Accept-Language': 'en-GB,en;q=0.8,ru;q=0.5'}}),
+    (get_topics, {'params': {'subject': 'Math'}}),
+    (get_topics, {'params': {'subject': ' английский '}, 'headers': {'Accept-Encoding': 'gzip'}}),
+    (get_topics, {'method': 'POST', 'body': {'subject': 'Математика'}}),
+    (get_topics, {'params': {'subjects': '*', 'lang': 'en'}}),
+    (get_topics, {'params': {'subject': 'Matematika'}}),
+]
+
+
+def snapshot(response):
+    return response.status_code, response.get_body(), sorted(response.headers.items())
+
+
+async def check_identical():
+    """
+    Both paths must answer every request the same way.
+    """
+    for module, request in REQUESTS:
+        sync_response = module.main(BenchRequest(**request))
+        async_response = await module.main_async(BenchRequest(**request))
+        if snapshot(sync_response) != snapshot(async_response):
+            raise AssertionError(f'{module.__name__} {request}: sync and async responses differ')
+
+
+async def run(path, concurrency, invocations, pool):
+    """
+    Keep `concurrency` invocations in flight until `invocations` completed.
+    Returns (elapsed seconds, sorted latencies in microseconds).
+    """
+    loop = asyncio.get_running_loop()
+    latencies = []
+    counter = iter(range(invocations))
+
+    async def invoke(module, request, issued):
+        if path == 'sync':
+            await loop.run_in_executor(pool, module.main, request)
+        else:
+            await module.main_async(request)
+        latencies.append((time.perf_counter_ns() - issued) / 1000)
+
+    async def client():
+        for index in counter:
+            module, request = REQUESTS[index % len(REQUESTS)]
+            request = BenchRequest(**request)
+            # Timed from when it is issued: like the host, each invocation is a task
+            # that first waits for the event loop (or, sync, for a pool thread)
+            issued = time.perf_counter_ns()
+            await loop.create_task(invoke(module, request, issued))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def main(args):
+    await check_identical()
+    print('Sync and async responses are identical.\n')
+    print(f'{"path":<6}{"in flight":>10}{"req/s":>10}{"p50 us":>10}{"p95 us":>10}{"p99 us":>10}')
+    print('-' * 56)
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for concurrency in args.concurrency:
+            for path in ('sync', 'async'):
+                # Warm both paths before measuring
+                await run(path, concurrency, min(1000, args.invocations), pool)
+                elapsed, latencies = await run(path, concurrency, args.invocations, pool)
+                print(f'{path:<6}{concurrency:>10}{args.invocations / elapsed:>10.0f}'
+                      f'{percentile(latencies, 0.50):>10.0f}{percentile(latencies, 0.95):>10.0f}'
+                      f'{percentile(latencies, 0.99):>10.0f}')
+    print(f'\nSync path: thread pool of {args.threads}. Latency is timed from when an invocation is issued, '
+          f'so it includes queueing for a pool thread (sync) or the event loop (async).')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare sync and async handlers under concurrency')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--invocations', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS)
+    # Keep handler logging out of the measurements
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
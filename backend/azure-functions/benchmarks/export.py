@@ -0,0 +1,145 @@
+"""
+Catalog export benchmark: peak RSS against catalog size.
+Each run is a fresh process that builds a synthetic catalog view (many
+grades of several subjects, every topic in every language) and then
+produces the whole-catalog export one way:
+    json.dumps       one JSON document built as a string, then encoded
+                     (what get_topics would do without the export mode)
+    ndjson collected the NDJSON pipeline collected into one body, as the
+                     Functions host takes it (get_body)
+    ndjson streamed  the NDJSON pipeline sent chunk by chunk, as
+                     benchmarks/local_host.py does
+The peak RSS above the process's RSS once the view is built is reported
+next to the size of the output. Linux only (/proc).
+
+Usage (from backend/azure-functions):
+    python benchmarks/export.py [--grades 12 48 192] [--encoding identity|gzip]
+"""
+import argparse
+import gc
+import gzip
+import json
+import subprocess
+import sys
+import time
+import types
+
+from stand_ins import APP_ROOT  # noqa: F401 (puts the app root on sys.path)
+
+from shared_code import export
+from shared_code.prerequisites import PrerequisiteGraph
+from shared_code.responses import StreamingResponse
+
+SUBJECTS = 6
+TOPICS_PER_GRADE = 40
+LANGUAGES = ("ru", "en", "pl", "uk")
+MODES = ("json.dumps", "ndjson collected", "ndjson streamed")
+
+
+def synthetic_view(grades):
+    """
+    Stand-in for an ApiView with what the export reads.
+    """
+    topic_entries = {}
+    requires = {}
+    for subject in range(SUBJECTS):
+        for grade in range(grades):
+            for position in range(TOPICS_PER_GRADE):
+                topic = f's{subject}-g{grade}-t{position}'
+                topic_entries[topic] = (f'S{subject}', {
+                    lang: f'Topic {position} of grade {grade}, subject {subject} ({lang})' for lang in LANGUAGES})
+                requires[topic] = [f's{subject}-g{grade}-t{position - 1}'] if position else []
+    return types.SimpleNamespace(
+        languages=LANGUAGES,
+        topic_entries=topic_entries,
+        subject_names={f'S{subject}': {lang: f'Subject {subject}' for lang in LANGUAGES}
+                       for subject in range(SUBJECTS)},
+        prerequisites=PrerequisiteGraph(requires)
+    )
+
+
+def status_kb(field):
+    with open('/proc/self/status') as status_file:
+        for line in status_file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0+)
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def produce(view, mode, encoding):
+    """
+    Bytes of the export as the host would send them.
+    """
+    if mode == 'json.dumps':
+        graph = view.prerequisites
+        document = [
+            {"id": topic, "subject": subject, "lang": lang, "subject_name": view.subject_names[subject][lang],
+             "name": names[lang], "requires": graph.requires[graph.index[topic]]}
+            for lang in view.languages for topic, (subject, names) in view.topic_entries.items()
+        ]
+        body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        if encoding != export.IDENTITY:
+            body = gzip.compress(body, export.COMPRESSION_LEVEL)
+        return len(body)
+    chunks = export.export_chunks(view, view.languages, encoding=encoding)
+    response = StreamingResponse(chunks, mimetype=export.NDJSON_MIMETYPE)
+    if mode == 'ndjson collected':
+        return len(response.get_body())
+    size = 0
+    for chunk in response.iter_body():
+        size += len(chunk)
+    return size
+
+
+def child(grades, mode, encoding):
+    view = synthetic_view(grades)
+    gc.collect()
+    if not reset_peak():
+        print(json.dumps({"error": "cannot reset the peak RSS"}))
+        return
+    baseline = status_kb('VmRSS')
+    start = time.perf_counter()
+    size = produce(view, mode, encoding)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"topics": len(view.topic_entries), "size": size, "seconds": elapsed,
+                      "peak_kb": status_kb('VmHWM') - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure peak RSS of catalog exports by catalog size')
+    parser.add_argument('--grades', type=int, nargs='+', default=[12, 48, 192])
+    parser.add_argument('--encoding', choices=(export.IDENTITY, 'gzip'), default=export.IDENTITY)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(int(args.child[0]), args.child[1], args.encoding)
+        return
+
+    print(f'{SUBJECTS} subjects x {TOPICS_PER_GRADE} topics per grade, {len(LANGUAGES)} languages, '
+          f'{args.encoding}\n')
+    print(f'{"topics":>8}{"records":>9}  {"mode":<18}{"output MB":>10}{"peak RSS MB":>13}{"seconds":>9}')
+    print('-' * 67)
+    for grades in args.grades:
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, '--encoding', args.encoding,
+                                     '--child', str(grades), mode],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            if 'error' in result:
+                sys.exit(result['error'])
+            print(f'{result["topics"]:>8}{result["topics"] * len(LANGUAGES):>9}  {mode:<18}'
+                  f'{result["size"] / 1024 / 1024:>10.1f}{result["peak_kb"] / 1024:>13.1f}{result["seconds"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
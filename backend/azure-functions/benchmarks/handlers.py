@@ -0,0 +1,185 @@
+"""
+Latency and allocation benchmark for the function handlers.
+Drives get_subjects.main, get_topics.main and router.main through language, header,
+subject and error-path scenarios using lightweight request stand-ins, and
+reports p50/p95/p99 latency, throughput and tracemalloc allocations per call.
+
+Usage (from backend/azure-functions):
+    python benchmarks/handlers.py                    # run and print
+    python benchmarks/handlers.py --save-baseline    # store results as baseline
+    python benchmarks/handlers.py --check            # fail on regressions
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+from stand_ins import APP_ROOT, BenchRequest
+
+import get_subjects
+import get_topics
+import router
+
+DEFAULT_BASELINE = os.path.join(APP_ROOT, 'benchmarks', 'baseline_handlers.json')
+
+# Metrics compared against the baseline
+CHECKED_METRICS = ('p50_us', 'p95_us', 'alloc_bytes')
+
+
+def _etag(handler, **request):
+    return handler(BenchRequest(**request)).headers.get('ETag', '')
+
+
+def build_scenarios():
+    """
+    (name, handler, request factory) triples. Factories return a fresh
+    request each call so no state leaks between iterations.
+    """
+    subjects, topics = get_subjects.main, get_topics.main
+    subjects_etag = _etag(subjects, params={'lang': 'en'})
+    topics_etag = _etag(topics, params={'subject': 'Math'})
+    scenarios = [
+        ('subjects/default', subjects, {}),
+        ('subjects/lang=en', subjects, {'params': {'lang': 'en'}}),
+        ('subjects/accept-language', subjects,
+         {'headers': {'Accept-Language': 'de-DE,de;q=0.9,en-GB;q=0.8,en;q=0.7,ru;q=0.1'}}),
+        ('subjects/304', subjects,
+         {'params': {'lang': 'en'}, 'headers': {'If-None-Match': subjects_etag}}),
+        ('topics/math', topics, {'params': {'subject': 'Math'}}),
+        ('topics/english-en', topics, {'params': {'subject': 'English'}, 'headers': {'Accept-Language': 'en-US'}}),
+        ('topics/alias', topics, {'params': {'subject': ' МАТЕМАТИКА '}}),
+        ('topics/post-body', topics, {'method': 'POST', 'body': {'subject': 'Английский'}}),
+        ('topics/gzip', topics, {'params': {'subject': 'Math'}, 'headers': {'Accept-Encoding': 'gzip, deflate, br'}}),
+        ('topics/304', topics, {'params': {'subject': 'Math'}, 'headers': {'If-None-Match': topics_etag}}),
+        ('topics/catalog', topics, {'params': {'subjects': '*', 'lang': 'en'}}),
+        ('topics/batch', topics, {'method': 'POST', 'body': {'requests': [
+            {'subject': 'Math', 'lang': 'en'}, {'subject': 'English', 'lang': 'ru'}, {'subject': 'Englsh'}
+        ]}}),
+        ('topics/missing-400', topics, {}),
+        ('topics/typo-404', topics, {'params': {'subject': 'Matematika'}}),
+        ('topics/preflight', topics, {'method': 'OPTIONS', 'headers': {
+            'Origin': 'http://localhost:3000', 'Access-Control-Request-Method': 'POST'
+        }}),
+        ('router/subjects', router.main, {'route_params': {'resource': 'subjects'}, 'params': {'lang': 'en'}}),
+        ('router/topics-route', router.main, {'route_params': {'resource': 'topics', 'subject': 'Math'}}),
+    ]
+    return [(name, handler, (lambda request=request: BenchRequest(**request))) for name, handler, request in scenarios]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(handler, make_request, iterations, alloc_iterations):
+    """
+    Time each call with perf_counter_ns, then measure allocations per call
+    in a separate pass so tracing does not skew the latency numbers.
+    """
+    requests = [make_request() for _ in range(iterations)]
+    for request in requests[:min(100, iterations)]:
+        handler(request)
+
+    timings = []
+    gc.disable()
+    try:
+        started = time.perf_counter_ns()
+        for request in requests:
+            call_started = time.perf_counter_ns()
+            handler(request)
+            timings.append(time.perf_counter_ns() - call_started)
+        elapsed = time.perf_counter_ns() - started
+    finally:
+        gc.enable()
+    timings.sort()
+
+    requests = [make_request() for _ in range(alloc_iterations)]
+    tracemalloc.start()
+    allocated = 0
+    for request in requests:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        response = handler(request)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        del response
+    tracemalloc.stop()
+
+    return {
+        'p50_us': percentile(timings, 0.50) / 1000,
+        'p95_us': percentile(timings, 0.95) / 1000,
+        'p99_us': percentile(timings, 0.99) / 1000,
+        'throughput_rps': iterations / (elapsed / 1e9),
+        'alloc_bytes': allocated / alloc_iterations
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Metrics more than threshold (a fraction) above the baseline.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric in CHECKED_METRICS:
+            base = baseline.get(name, {}).get(metric)
+            if base and metrics[metric] > base * (1 + threshold):
+                regressions.append(f'{name} {metric}: {metrics[metric]:.1f} vs baseline {base:.1f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark get_subjects and get_topics handlers')
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--alloc-iterations', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--filter', default='', help='Only run scenarios containing this text')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true', help='Exit with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    # Keep handler logging out of the measurements
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    print(f"{'scenario':<26}{'p50 us':>9}{'p95 us':>9}{'p99 us':>9}{'req/s':>11}{'alloc B':>10}")
+    print("-" * 74)
+    for name, handler, make_request in build_scenarios():
+        if args.filter not in name:
+            continue
+        # Keep the best of several runs to damp scheduler noise
+        runs = [run_scenario(handler, make_request, args.iterations, args.alloc_iterations)
+                for _ in range(args.repeat)]
+        metrics = {metric: min(run[metric] for run in runs) for metric in runs[0]}
+        metrics['throughput_rps'] = max(run['throughput_rps'] for run in runs)
+        results[name] = metrics
+        print(f"{name:<26}{metrics['p50_us']:>9.1f}{metrics['p95_us']:>9.1f}{metrics['p99_us']:>9.1f}"
+              f"{metrics['throughput_rps']:>11.0f}{metrics['alloc_bytes']:>10.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions above {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n✅ No regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+End-to-end load test over HTTP by replaying a JSONL request trace.
+Each trace line is {"t": seconds, "method": ..., "path": "/api/...",
+"headers": {...}, "body": "..."}, as written by local_host.py --record; the
+trace is replayed in a loop for the given duration. Without --url the
+functions are served by local_host.py in a child process, so no deployment
+or Core Tools are needed; --url points the test at `func start` or a
+deployed app instead.
+
+Pacing: --rate sends a fixed number of requests per second (open loop),
+--speed replays the recorded timestamps at that speed, and neither sends
+as fast as --concurrency connections allow (closed loop). In the open-loop
+modes latency counts from the time a request was due, so a stalled host
+shows up as latency instead of quietly lowering the load.
+
+Reports throughput, latency percentiles, responses by status code
+(connection failures as "error") and the CPU and RSS of the host process
+over time (Linux only: /proc/<pid>; --pid for an external host).
+
+Usage (from backend/azure-functions):
+    python benchmarks/load_test.py [--rate 500] [--concurrency 16] [--duration 10]
+    python benchmarks/load_test.py --url http://localhost:7071 --pid 1234 --speed 1
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRACE = os.path.join(BENCH_DIR, 'traces', 'sample.jsonl')
+
+# Seconds to wait for the local host to import the functions and listen
+STARTUP_TIMEOUT = 30
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def load_trace(path):
+    """
+    Requests of a trace as (offset, method, path, headers, body bytes),
+    offsets starting at 0.
+    """
+    entries = []
+    with open(path, encoding='utf-8') as trace_file:
+        for line in trace_file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = entry.get('body')
+            entries.append((
+                float(entry.get('t', 0)),
+                entry.get('method', 'GET').upper(),
+                entry['path'],
+                entry.get('headers') or {},
+                body.encode('utf-8') if body else None
+            ))
+    if not entries:
+        raise ValueError(f'Empty trace: {path}')
+    start = min(entry[0] for entry in entries)
+    return sorted(((offset - start, *rest) for offset, *rest in entries), key=lambda entry: entry[0])
+
+
+def start_local_host():
+    """
+    Start local_host.py on a free port; returns (process, base url).
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'local_host.py'), '--port', '0'],
+                               stdout=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        if line.startswith('Listening on '):
+            return process, line.split()[-1]
+    process.kill()
+    raise RuntimeError('Local host did not start')
+
+
+class Schedule:
+    """
+    Hands out the next request and the time it is due (None: now), shared
+    by all connections.
+    """
+
+    def __init__(self, trace, rate, speed, duration):
+        self.trace = trace
+        self.rate = rate
+        self.speed = speed
+        self.duration = duration
+        # The trace repeats after its last request plus an average gap
+        span = trace[-1][0]
+        self.period = span + (span / (len(trace) - 1) if len(trace) > 1 and span else 0.01)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.start = None
+
+    def next(self):
+        with self._lock:
+            i = next(self._counter)
+        entry = self.trace[i % len(self.trace)]
+        if self.rate:
+            due = i / self.rate
+        elif self.speed:
+            due = (i // len(self.trace) * self.period + entry[0]) / self.speed
+        else:
+            due = None
+        if (due if due is not None else time.perf_counter() - self.start) >= self.duration:
+            return None, None
+        return entry, due
+
+
+def worker(schedule, base_url, results):
+    """
+    Send requests on one keep-alive connection until the schedule ends.
+    results gets (latency seconds, status or 'error').
+    """
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = None
+    while True:
+        entry, due = schedule.next()
+        if entry is None:
+            break
+        _, method, path, headers, body = entry
+        if due is not None:
+            delay = schedule.start + due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent = schedule.start + due
+        else:
+            sent = time.perf_counter()
+        try:
+            if connection is None:
+                connection = connection_class(parts.netloc, timeout=30)
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            if response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            if connection is not None:
+                connection.close()
+                connection = None
+        results.append((time.perf_counter() - sent, status))
+    if connection is not None:
+        connection.close()
+
+
+def warm_up(trace, base_url):
+    """
+    Send every trace request once, unmeasured, so lazy imports and first
+    builds do not land in the latency numbers.
+    """
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    try:
+        for _, method, path, headers, body in trace:
+            connection.request(method, path, body=body, headers=headers)
+            connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def process_usage(pid):
+    """
+    (CPU seconds, RSS in MB) of a process, or None where /proc is missing.
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as stat_file:
+            # Fields after the parenthesized command name; utime and stime are 14 and 15
+            fields = stat_file.read().rpartition(')')[2].split()
+        with open(f'/proc/{pid}/status') as status_file:
+            rss_kb = next(int(line.split()[1]) for line in status_file if line.startswith('VmRSS:'))
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss_kb / 1024
+
+
+def sample_usage(pid, interval, stop, samples):
+    """
+    Append (elapsed seconds, CPU %, RSS MB) every interval.
+    """
+    previous = process_usage(pid)
+    previous_time = time.perf_counter()
+    start = previous_time
+    while previous is not None and not stop.wait(interval):
+        usage = process_usage(pid)
+        now = time.perf_counter()
+        if usage is None:
+            break
+        cpu = (usage[0] - previous[0]) / (now - previous_time) * 100
+        samples.append((now - start, cpu, usage[1]))
+        previous, previous_time = usage, now
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def report(results, elapsed, samples):
+    latencies = sorted(latency for latency, _ in results)
+    statuses = Counter(status for _, status in results)
+    print(f'Requests: {len(results)} in {elapsed:.1f} s, {len(results) / elapsed:.0f} req/s\n')
+    if latencies:
+        print(f'{"latency ms":<12}{"p50":>9}{"p90":>9}{"p99":>9}{"p99.9":>9}{"max":>9}')
+        print('-' * 57)
+        values = [percentile(latencies, fraction) for fraction in (0.5, 0.9, 0.99, 0.999)] + [latencies[-1]]
+        print(f'{"":<12}' + ''.join(f'{value * 1000:>9.2f}' for value in values))
+    print(f'\n{"status":<12}{"count":>9}{"share":>9}')
+    print('-' * 30)
+    for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+        print(f'{status:<12}{count:>9}{count / len(results):>9.1%}')
+    if samples:
+        print(f'\n{"host t s":<12}{"CPU %":>9}{"RSS MB":>9}')
+        print('-' * 30)
+        for at, cpu, rss in samples:
+            print(f'{at:<12.1f}{cpu:>9.0f}{rss:>9.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a request trace against the Function App over HTTP')
+    parser.add_argument('--trace', default=DEFAULT_TRACE, help='JSONL trace (local_host.py --record)')
+    parser.add_argument('--url', help='base URL of a running host; default: start local_host.py')
+    parser.add_argument('--pid', type=int, help='process to sample with --url (CPU, RSS)')
+    parser.add_argument('--rate', type=float, default=0, help='requests per second; 0 sends as fast as possible')
+    parser.add_argument('--speed', type=float, default=0, help='replay recorded timestamps at this speed')
+    parser.add_argument('--concurrency', type=int, default=8, help='connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--no-warm-up', dest='warm_up', action='store_false', help='measure cold requests too')
+    parser.add_argument('--sample-interval', type=float, default=1, help='seconds between CPU/RSS samples')
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace)
+    process = None
+    base_url, pid = args.url, args.pid
+    if base_url is None:
+        process, base_url = start_local_host()
+        pid = process.pid
+    try:
+        mode = (f'{args.rate:g} req/s' if args.rate else f'{args.speed:g}x recorded timing' if args.speed
+                else 'closed loop')
+        print(f'{len(trace)} trace requests against {base_url}: {mode}, {args.concurrency} connections, '
+              f'{args.duration:g} s\n')
+        if args.warm_up:
+            warm_up(trace, base_url)
+        schedule = Schedule(trace, args.rate, args.speed, args.duration)
+        results = []
+        samples = []
+        stop = threading.Event()
+        threads = [threading.Thread(target=worker, args=(schedule, base_url, results))
+                   for _ in range(args.concurrency)]
+        if pid:
+            threads.append(threading.Thread(target=sample_usage, args=(pid, args.sample_interval, stop, samples)))
+        schedule.start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads[:args.concurrency]:
+            thread.join()
+        elapsed = time.perf_counter() - schedule.start
+        stop.set()
+        for thread in threads[args.concurrency:]:
+            thread.join()
+        report(results, elapsed, samples)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Stdlib-only local stand-in for the Functions host.
+Mounts every HTTP-triggered function of the app under /api/, as described by
+its function.json (route, methods, entryPoint), on a threaded HTTP/1.1
+server, and invokes it with real azure.functions.HttpRequest objects the way
+`func start` does, without Core Tools. Literal routes win over
+parameterized ones (/api/get_topics before the router's {resource}), as in
+the real host. Sync entry points run on the request threads, like the
+worker's thread pool; async ones run on one shared event loop.
+Function keys are not checked, as with `func start`.
+
+Streaming responses are sent with chunked transfer coding as they are made.
+With --record, every request is appended to a JSONL trace that
+load_test.py can replay.
+
+Usage (from backend/azure-functions):
+    python benchmarks/local_host.py [--port 7071] [--record trace.jsonl]
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+
+from stand_ins import APP_ROOT
+
+import azure.functions as func
+
+ROUTE_PREFIX = '/api/'
+
+# Request headers that describe the connection, not the request
+HOP_HEADERS = {'host', 'content-length', 'connection', 'keep-alive', 'transfer-encoding'}
+
+
+class Route(NamedTuple):
+    """
+    One HTTP-triggered function.
+    """
+    name: str
+    pattern: re.Pattern
+    literals: int
+    methods: frozenset
+    entry: object
+
+
+def route_pattern(template: str):
+    """
+    Regex of a route template such as '{resource}/{subject?}', and its
+    number of literal segments (for precedence).
+    """
+    parts = []
+    literals = 0
+    for segment in template.strip('/').split('/'):
+        match = re.fullmatch(r'\{(\w+)(?::[^}?]*)?(\?)?\}', segment)
+        if match:
+            name, optional = match.groups()
+            parts.append(f'(?:/(?P<{name}>[^/]+))?' if optional else f'/(?P<{name}>[^/]+)')
+        else:
+            literals += 1
+            parts.append('/' + re.escape(segment))
+    return re.compile(''.join(parts) + '/?', re.IGNORECASE), literals
+
+
+def load_routes(app_root: str = APP_ROOT) -> List[Route]:
+    """
+    Routes of every function folder with an httpTrigger binding, most
+    specific first.
+    """
+    routes = []
+    for name in sorted(os.listdir(app_root)):
+        path = os.path.join(app_root, name, 'function.json')
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding='utf-8') as config_file:
+            config = json.load(config_file)
+        trigger = next((binding for binding in config.get('bindings', ())
+                        if binding.get('type') == 'httpTrigger'), None)
+        if trigger is None:
+            continue
+        module = importlib.import_module(name)
+        entry = getattr(module, config.get('entryPoint', 'main'))
+        pattern, literals = route_pattern(trigger.get('route', name))
+        methods = frozenset(method.upper() for method in trigger.get('methods', ('get', 'post')))
+        routes.append(Route(name, pattern, literals, methods, entry))
+    routes.sort(key=lambda route: -route.literals)
+    return routes
+
+
+class FunctionHost:
+    """
+    Finds the function for a request and invokes it.
+    """
+
+    def __init__(self, routes: List[Route], record_path: str = None):
+        self.routes = routes
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._record_file = open(record_path, 'a', encoding='utf-8') if record_path else None
+        self._record_lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def match(self, method: str, path: str):
+        if not path.lower().startswith(ROUTE_PREFIX):
+            return None, None
+        for route in self.routes:
+            match = route.pattern.fullmatch(path[len(ROUTE_PREFIX) - 1:])
+            if match and method in route.methods:
+                params = {key: value for key, value in match.groupdict().items() if value is not None}
+                return route, params
+        return None, None
+
+    def invoke(self, method: str, url: str, headers: dict, body: bytes) -> func.HttpResponse:
+        """
+        Response of the function mounted at url, or a plain 404.
+        """
+        parts = urlsplit(url)
+        route, route_params = self.match(method, parts.path)
+        if route is None:
+            return func.HttpResponse(status_code=404)
+        self.record(method, url, headers, body)
+        req = func.HttpRequest(
+            method, url,
+            headers=headers,
+            params=dict(parse_qsl(parts.query, keep_blank_values=True)),
+            route_params=route_params,
+            body=body
+        )
+        if inspect.iscoroutinefunction(route.entry):
+            return asyncio.run_coroutine_threadsafe(route.entry(req), self._loop).result()
+        return route.entry(req)
+
+    def record(self, method: str, url: str, headers: dict, body: bytes) -> None:
+        if self._record_file is None:
+            return
+        parts = urlsplit(url)
+        line = {
+            "t": round(time.monotonic() - self._start, 6),
+            "method": method,
+            "path": parts.path + (f"?{parts.query}" if parts.query else ""),
+            "headers": headers
+        }
+        if body:
+            line["body"] = body.decode('utf-8', errors='replace')
+        with self._record_lock:
+            self._record_file.write(json.dumps(line, ensure_ascii=False) + '\n')
+            self._record_file.flush()
+
+
+def make_handler(host: FunctionHost):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are separate writes; Nagle would hold the body back
+        disable_nagle_algorithm = True
+
+        def _serve(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            headers = {key: value for key, value in self.headers.items() if key.lower() not in HOP_HEADERS}
+            url = f'http://{self.headers.get("Host", "localhost")}{self.path}'
+            try:
+                response = host.invoke(self.command, url, headers, body)
+            except Exception as e:
+                # The real host answers 500 when a function raises
+                logging.exception('Function failed: %s', e)
+                response = func.HttpResponse(status_code=500)
+            if hasattr(response, 'iter_body'):
+                self._stream(response)
+                return
+            payload = response.get_body()
+            self.send_response(response.status_code)
+            for key, value in response.headers.items():
+                if key.lower() not in ('content-length', 'content-type'):
+                    self.send_header(key, value)
+            if payload:
+                mimetype = response.mimetype or 'text/plain'
+                if 'charset' not in mimetype and response.charset:
+                    mimetype = f'{mimetype}; charset={response.charset}'
+                self.send_header('Content-Type', mimetype)
+            if response.status_code not in (204, 304):
+                self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(payload)
+
+        def _stream(self, response):
+            # Streaming responses (shared_code/responses.py) are sent with chunked
+            # transfer coding as their chunks are made, as a streaming host would
+            self.send_response(response.status_code)
+            for key, value in response.headers.items():
+                if key.lower() not in ('content-length', 'content-type', 'transfer-encoding'):
+                    self.send_header(key, value)
+            mimetype = response.mimetype or 'text/plain'
+            if 'charset' not in mimetype and response.charset:
+                mimetype = f'{mimetype}; charset={response.charset}'
+            self.send_header('Content-Type', mimetype)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            if self.command == 'HEAD':
+                return
+            for chunk in response.iter_body():
+                if chunk:
+                    self.wfile.write(b'%X\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _serve
+
+        def log_message(self, format, *args):
+            # Access logs would dominate a load test
+            pass
+
+    return Handler
+
+
+class HostServer(ThreadingHTTPServer):
+    """
+    Threaded server with one daemon thread per connection.
+    """
+    daemon_threads = True
+    # The default backlog of 5 drops connections opened together, which
+    # then wait a second for the SYN retransmit
+    request_queue_size = 128
+
+
+def serve(port: int, bind: str = '127.0.0.1', record_path: str = None) -> None:
+    routes = load_routes()
+    server = HostServer((bind, port), make_handler(FunctionHost(routes, record_path)))
+    for route in routes:
+        print(f'  {route.name}: [{",".join(sorted(route.methods))}] {route.pattern.pattern}')
+    print(f'Listening on http://{bind}:{server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the Function App locally without Core Tools')
+    parser.add_argument('--port', type=int, default=7071, help='0 picks a free port')
+    parser.add_argument('--bind', default='127.0.0.1')
+    parser.add_argument('--record', help='append every request to this JSONL trace')
+    parser.add_argument('--log-level', default='WARNING', help='level of the functions\' own logs')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    serve(args.port, args.bind, args.record)
@@ -0,0 +1,110 @@
+"""
+Prerequisite graph benchmark: build time and next-topic latency by catalog
+size. Synthetic curricula have every grade of every subject; each topic
+requires one to three recent topics of its subject and grade and, from the
+second grade on, the same topic of the grade before. Students have
+mastered a prefix of each subject's course, as real students do.
+Recommendations through the bitset graph are compared with a direct
+check of every topic's prerequisites against the mastered set.
+
+Usage (from backend/azure-functions):
+    python benchmarks/prerequisites.py [--grades 12] [--subjects 6 24] [--topics-per-grade 40]
+"""
+import argparse
+import random
+import time
+
+from stand_ins import APP_ROOT  # noqa: F401 (puts the app root on sys.path)
+
+from shared_code.prerequisites import PrerequisiteGraph
+
+STUDENTS = 200
+
+
+def synthetic_requires(subjects, grades, topics_per_grade, seed=0):
+    rng = random.Random(seed)
+    requires = {}
+    for subject in range(subjects):
+        for grade in range(grades):
+            for position in range(topics_per_grade):
+                earlier = rng.sample(range(max(0, position - 5), position), min(position, rng.randint(1, 3)))
+                required = [f's{subject}-g{grade}-t{item}' for item in earlier]
+                if grade:
+                    required.append(f's{subject}-g{grade - 1}-t{position}')
+                requires[f's{subject}-g{grade}-t{position}'] = required
+    return requires
+
+
+def students(requires, subjects, grades, topics_per_grade, seed=1):
+    """
+    Mastered topics of STUDENTS students: a random prefix of every subject.
+    """
+    rng = random.Random(seed)
+    course = grades * topics_per_grade
+    result = []
+    for _ in range(STUDENTS):
+        mastered = []
+        for subject in range(subjects):
+            for step in range(rng.randrange(course)):
+                grade, position = divmod(step, topics_per_grade)
+                mastered.append(f's{subject}-g{grade}-t{position}')
+        result.append(mastered)
+    return result
+
+
+def naive_unlocked(requires, mastered):
+    mastered = set(mastered)
+    covered = set(mastered)
+    # Everything the mastered topics build on, by search
+    stack = list(mastered)
+    while stack:
+        for required in requires[stack.pop()]:
+            if required not in covered:
+                covered.add(required)
+                stack.append(required)
+    return [topic for topic, required in requires.items()
+            if topic not in covered and all(item in covered for item in required)]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure prerequisite graph build and recommendation time')
+    parser.add_argument('--grades', type=int, default=12)
+    parser.add_argument('--subjects', type=int, nargs='+', default=[6, 24])
+    parser.add_argument('--topics-per-grade', type=int, default=40)
+    args = parser.parse_args()
+
+    print(f'{"topics":>8}{"build ms":>10}{"graph p50 us":>14}{"graph p99 us":>14}'
+          f'{"naive p50 us":>14}{"naive p99 us":>14}')
+    print('-' * 74)
+    for subjects in args.subjects:
+        requires = synthetic_requires(subjects, args.grades, args.topics_per_grade)
+        start = time.perf_counter()
+        graph = PrerequisiteGraph(requires)
+        build = time.perf_counter() - start
+        masks = []
+        for mastered in students(requires, subjects, args.grades, args.topics_per_grade):
+            masks.append((mastered, graph.mask(mastered)))
+
+        graph_times = []
+        naive_times = []
+        for mastered, mask in masks:
+            start = time.perf_counter()
+            unlocked = graph.unlocked(mask)
+            graph_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            expected = naive_unlocked(requires, mastered)
+            naive_times.append(time.perf_counter() - start)
+            assert sorted(graph.order[i] for i in unlocked) == sorted(expected)
+        graph_times.sort()
+        naive_times.sort()
+        print(f'{len(graph):>8}{build * 1000:>10.0f}'
+              f'{percentile(graph_times, 0.5) * 1e6:>14.0f}{percentile(graph_times, 0.99) * 1e6:>14.0f}'
+              f'{percentile(naive_times, 0.5) * 1e6:>14.0f}{percentile(naive_times, 0.99) * 1e6:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Sustained ingestion of practice attempts into the progress store.
+Threads record one attempt per call (as one request records them) for a
+population of students and catalog topics, for a fixed time; the run ends
+with the last flush, so the rate counts only attempts committed to SQLite.
+Compared with one committed UPSERT per attempt (no write-behind) and with
+attempts posted through the /api/progress handler.
+
+Usage (from backend/azure-functions):
+    python benchmarks/progress.py [--threads 8] [--seconds 5] [--students 5000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from stand_ins import BenchRequest
+
+# Handler requests act as a trusted back end (see shared_code/student_access.py)
+os.environ.setdefault('PROGRESS_API_KEY', 'benchmark-progress-key')
+
+from shared_code import handlers, progress
+from shared_code.progress import ProgressStore
+
+
+def attempts_for(args, seed):
+    rng = random.Random(seed)
+    topics = list(handlers.current_view().topic_entries)
+    return [(f'student-{rng.randrange(args.students)}', rng.choice(topics), rng.random() < 0.7)
+            for _ in range(100000)]
+
+
+def run_threads(args, work):
+    """
+    Run work(thread index, stop event) on each thread for args.seconds;
+    returns the attempts they made.
+    """
+    counts = [0] * args.threads
+    stop = threading.Event()
+
+    def target(i):
+        counts[i] = work(i, stop)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts)
+
+
+def bench_store(args, path):
+    store = ProgressStore(path)
+
+    def work(i, stop):
+        attempts = attempts_for(args, i)
+        count = 0
+        while not stop.is_set():
+            student, topic, correct = attempts[count % len(attempts)]
+            store.record(student, ((topic, correct),))
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    count = run_threads(args, work)
+    store.close()
+    return count, time.perf_counter() - start
+
+
+def bench_per_attempt(args, path):
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    for statement in progress.SCHEMA:
+        connection.execute(statement)
+    lock = threading.Lock()
+    decay = 1 - progress.MASTERY_RATE
+
+    def work(i, stop):
+        attempts = attempts_for(args, i)
+        count = 0
+        while not stop.is_set():
+            student, topic, correct = attempts[count % len(attempts)]
+            gain = progress.MASTERY_RATE if correct else 0.0
+            with lock:
+                connection.execute(progress.UPSERT, (student, topic, 1, int(correct), gain, time.time(), decay))
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    count = run_threads(args, work)
+    connection.close()
+    return count, time.perf_counter() - start
+
+
+def bench_handler(args, path):
+    progress.STORE = ProgressStore(path)
+
+    def work(i, stop):
+        requests = [
+            BenchRequest('POST', 'http://localhost:7071/api/progress', route_params={'resource': 'progress'},
+                         headers={'X-Progress-Key': os.environ['PROGRESS_API_KEY']},
+                         body={"student": student, "attempts": [{"id": topic, "correct": correct}]})
+            for student, topic, correct in attempts_for(args, i)[:5000]
+        ]
+        count = 0
+        while not stop.is_set():
+            handlers.dispatch(requests[count % len(requests)])
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    count = run_threads(args, work)
+    progress.STORE.close()
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure progress ingestion rates')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--students', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f'{args.threads} threads, {args.seconds:g} s, {args.students} students, '
+          f'{len(handlers.current_view().topic_entries)} topics\n')
+    print(f'{"mode":<26}{"attempts":>10}{"attempts/s":>12}{"rows":>10}{"db MB":>8}')
+    print('-' * 66)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, bench in (('per-attempt commit', bench_per_attempt), ('write-behind store', bench_store),
+                            ('POST /api/progress', bench_handler)):
+            path = os.path.join(directory, f'{bench.__name__}.sqlite3')
+            count, elapsed = bench(args, path)
+            with sqlite3.connect(path) as connection:
+                rows, = connection.execute('SELECT count(*) FROM progress').fetchone()
+                stored, = connection.execute('SELECT sum(attempts) FROM progress').fetchone()
+            assert stored == count, (stored, count)
+            size = sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+            print(f'{name:<26}{count:>10}{count / elapsed:>12.0f}{rows:>10}{size / 1024 / 1024:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
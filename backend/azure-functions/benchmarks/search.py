@@ -0,0 +1,114 @@
+"""
+Search benchmark: index build, incremental update and query latency.
+Builds a synthetic catalog document from the words of the bundled catalog
+plus generated words (a few thousand per language, drawn with Zipf-like
+frequencies as in real topic titles), then measures a full index
+build, an incremental update after 1% of the topics change, and p50/p99
+latency for whole-word, multi-word and prefix (autocomplete) queries.
+
+Usage (from backend/azure-functions):
+    python benchmarks/search.py [--topics-per-subject 1000]
+"""
+import argparse
+import random
+import time
+
+from stand_ins import APP_ROOT  # noqa: F401 (puts the app root on sys.path)
+
+from shared_code.catalog import CatalogSnapshot, DEFAULT_CATALOG_PATH, load_document
+from shared_code.search import build_index, tokenize
+
+SUBJECTS = ["Math", "English", "Science", "History", "Geography", "Art"]
+
+SYLLABLES = {
+    "ru": ["ка", "ро", "ми", "на", "те", "ла", "ст", "ви", "до", "пр", "ен", "ов", "ни", "за", "ль"],
+    "en": ["ca", "ro", "mi", "na", "te", "la", "st", "vi", "do", "pr", "en", "ov", "ni", "za", "th"],
+}
+
+# Generated words per language
+GENERATED_WORDS = 3000
+
+QUERIES = [
+    "дроби", "perimeter", "Present Simple", "умножение и деление", "reading short texts",
+    "перим", "frac", "г", "writ", "словар", "geometry shapes", "задач",
+]
+
+
+def vocabulary(document):
+    words = {"ru": set(), "en": set()}
+    for subject in document["subjects"]:
+        for topic in subject["topics"]:
+            for lang in words:
+                words[lang].update(word for word in tokenize(topic["names"][lang]) if len(word) > 2)
+    rng = random.Random(0)
+    vocab = {}
+    for lang, found in words.items():
+        generated = set()
+        while len(generated) < GENERATED_WORDS:
+            generated.add("".join(rng.choices(SYLLABLES[lang], k=rng.randint(2, 4))))
+        # Catalog words first, so they are the most frequent ones
+        vocab[lang] = sorted(found) + sorted(generated - found)
+    return vocab
+
+
+def synthetic_document(topics_per_subject, seed, version=1):
+    bundled = load_document(DEFAULT_CATALOG_PATH)
+    words = vocabulary(bundled)
+    rng = random.Random(seed)
+    weights = {lang: [1 / rank for rank in range(1, len(choices) + 1)] for lang, choices in words.items()}
+    subjects = []
+    for subject in SUBJECTS:
+        topics = []
+        for position in range(topics_per_subject):
+            names = {}
+            for lang, choices in words.items():
+                title = rng.choices(choices, weights[lang], k=rng.randint(2, 5))
+                names[lang] = " ".join(title).capitalize() + f" {position}"
+            topics.append({"id": f"{subject.lower()}-{position}", "names": names})
+        subjects.append({"id": subject, "names": {"ru": subject, "en": subject}, "topics": topics})
+    return {"version": version, "default_language": "ru", "languages": ["ru", "en"], "subjects": subjects}
+
+
+def time_ms(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark topic search')
+    parser.add_argument('--topics-per-subject', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200, help='runs of each query')
+    args = parser.parse_args()
+
+    document = synthetic_document(args.topics_per_subject, seed=1)
+    snapshot = CatalogSnapshot(document)
+    build_ms, index = time_ms(build_index, snapshot)
+    print(f'Indexed {len(index)} topic entries in {build_ms:.1f} ms')
+
+    # Change 1% of the topics of every subject
+    changed = synthetic_document(args.topics_per_subject, seed=1, version=2)
+    replacements = synthetic_document(args.topics_per_subject, seed=2)
+    step = 100
+    for subject, replacement in zip(changed["subjects"], replacements["subjects"]):
+        subject["topics"][::step] = replacement["topics"][::step]
+    changed_snapshot = CatalogSnapshot(changed)
+    update_ms, updated = time_ms(build_index, changed_snapshot, index)
+    full_ms, _ = time_ms(build_index, changed_snapshot)
+    print(f'Incremental update: {update_ms:.1f} ms (full rebuild {full_ms:.1f} ms)\n')
+
+    print(f'{"query":<24}{"results":>8}{"p50 us":>10}{"p99 us":>10}')
+    print('-' * 52)
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter_ns()
+            results = updated.search(query)
+            timings.append((time.perf_counter_ns() - start) / 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(0.99 * len(timings)))]
+        print(f'{query:<24}{len(results):>8}{timings[len(timings) // 2]:>10.0f}{p99:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
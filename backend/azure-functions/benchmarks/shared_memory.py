@@ -0,0 +1,96 @@
+"""
+Memory of several worker processes with private and shared catalog bodies.
+Writes a synthetic catalog (see search.py) to a temporary data file, starts
+the given number of worker processes one after another, each importing the
+router and serving every catalog answer once (handlers.warm_up), and reads
+their memory while all of them are alive: the total proportional set size
+(PSS: shared pages are divided among the processes mapping them) and the
+private heap of the workers started after the first one, which map what the
+first one published. Modes: private bodies in every worker, and bodies in
+the shared store (SHARED_CATALOG_DIR).
+Linux only (/proc/<pid>/smaps_rollup).
+
+Usage (from backend/azure-functions):
+    python benchmarks/shared_memory.py [--workers 4] [--topics-per-subject 2000]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from stand_ins import APP_ROOT
+from search import synthetic_document
+
+CHILD = r'''
+import sys
+sys.path.insert(0, 'router')
+from __init__ import main
+from shared_code import handlers
+handlers.warm_up()
+print('ready', flush=True)
+sys.stdin.readline()
+'''
+
+
+def memory_kb(pid):
+    """
+    (Pss, private heap) of a process in kB.
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return fields['Pss'], fields['Pss_Anon']
+
+
+def measure(workers, catalog_path, shared_dir):
+    env = dict(os.environ, CATALOG_PATH=catalog_path, CATALOG_SNAPSHOT='', SHARED_CATALOG_DIR=shared_dir)
+    processes = []
+    try:
+        for _ in range(workers):
+            process = subprocess.Popen([sys.executable, '-c', CHILD], cwd=APP_ROOT, env=env,
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            processes.append(process)
+            if process.stdout.readline().strip() != 'ready':
+                raise RuntimeError('Worker failed to start')
+        return [memory_kb(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare worker memory with and without the shared store')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--topics-per-subject', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    shm_dir = tempfile.mkdtemp(dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    try:
+        catalog_path = os.path.join(tmp_dir, 'catalog.json')
+        with open(catalog_path, 'w', encoding='utf-8') as catalog_file:
+            json.dump(synthetic_document(args.topics_per_subject, seed=1), catalog_file, ensure_ascii=False)
+        print(f'Catalog: {os.path.getsize(catalog_path) / 1024:.0f} kB of JSON, {args.workers} workers\n')
+        print(f'{"bodies":<10}{"total PSS MB":>14}{"per worker MB":>15}{"later heap MB":>15}')
+        print('-' * 54)
+        for mode, shared_dir in (('private', ''), ('shared', shm_dir)):
+            sizes = measure(args.workers, catalog_path, shared_dir)
+            pss = sum(size[0] for size in sizes) / 1024
+            later = [size[1] / 1024 for size in sizes[1:]] or [sizes[0][1] / 1024]
+            print(f'{mode:<10}{pss:>14.1f}{pss / len(sizes):>15.1f}{sum(later) / len(later):>15.1f}')
+        store = sum(os.path.getsize(os.path.join(shm_dir, name)) for name in os.listdir(shm_dir))
+        print(f'\nShared store: {store / 1024 / 1024:.1f} MB, counted once across workers in PSS.')
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(shm_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Lightweight stand-ins for azure.functions request objects.
+They expose only what the handlers read, without the cost of Mock or of
+building real HttpRequest objects, so benchmarks measure the handlers.
+"""
+import json
+import os
+import sys
+
+# Make the Function App root importable (get_subjects, get_topics, shared_code)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+
+class RequestHeaders(dict):
+    """
+    Case-insensitive header mapping, like HttpRequestHeaders.
+    """
+
+    def __init__(self, headers=None):
+        super().__init__((key.lower(), value) for key, value in (headers or {}).items())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+
+class BenchRequest:
+    """
+    Minimal HttpRequest: method, url, params, headers, route_params and body.
+    """
+    __slots__ = ('method', 'url', 'params', 'headers', 'route_params', '_body')
+
+    def __init__(self, method='GET', url='http://localhost:7071/api/', params=None,
+                 headers=None, route_params=None, body=None):
+        self.method = method.upper()
+        self.url = url
+        self.params = params or {}
+        self.headers = RequestHeaders(headers)
+        self.route_params = route_params or {}
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self._body = body or b''
+
+    def get_body(self) -> bytes:
+        return self._body
+
+    def get_json(self):
+        return json.loads(self._body.decode('utf-8'))
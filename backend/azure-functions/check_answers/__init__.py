@@ -0,0 +1,18 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function that grades a batch of answers to generated exercises.
+    The JSON body holds 'answers': {"id": ..., "answer": ...} objects, or
+    plain answers to the exercises of the 'topic', 'difficulty' and 'seed'
+    given. Returns correctness per item and total scores.
+    Same handler as /api/check_answers of the router function.
+    """
+    return handlers.handle("check_answers", req)
+
+
+async def main_async(req: func.HttpRequest) -> func.HttpResponse:
+    return await handlers.handle_async("check_answers", req)
@@ -0,0 +1,19 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function that returns generated practice problems with answers
+    for a Math topic ('topic': name in any language or exercise kind).
+    Optional 'difficulty' (1-3), 'count' and 'seed' query parameters; the
+    same seed always gives the same problems.
+    Supports Russian (default) and English localization.
+    Same handler as /api/exercises of the router function.
+    """
+    return handlers.handle("get_exercises", req)
+
+
+async def main_async(req: func.HttpRequest) -> func.HttpResponse:
+    return await handlers.handle_async("get_exercises", req)
@@ -0,0 +1,11 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function that exposes in-process request metrics of this worker.
+    Returns Prometheus text by default, JSON with ?format=json.
+    """
+    return handlers.handle("get_metrics", req)
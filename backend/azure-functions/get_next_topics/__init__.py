@@ -0,0 +1,20 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function recommending the topics to take up next.
+    Mastered topics are given as catalog topic ids ('mastered': comma-separated
+    in the query string or a JSON list in the body), taken from the recorded
+    progress of a 'student', or both. Returns the topics whose
+    prerequisites are all mastered, in curriculum order, optionally of one
+    'subject'.
+    Same handler as /api/next_topics of the router function.
+    """
+    return handlers.handle("next_topics", req)
+
+
+async def main_async(req: func.HttpRequest) -> func.HttpResponse:
+    return await handlers.handle_async("next_topics", req)
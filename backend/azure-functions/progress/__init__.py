@@ -0,0 +1,20 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Azure Function for a student's practice progress by catalog topic id.
+    GET ?student=... returns attempts, correct answers and mastery per
+    practiced topic; POST records attempts from a JSON body with 'student'
+    and 'attempts' ({"id": topic id, "correct": true/false} objects).
+    Only the signed-in student or a trusted back end may use it (see
+    shared_code/student_access.py).
+    Same handler as /api/progress of the router function.
+    """
+    return handlers.handle("progress", req)
+
+
+async def main_async(req: func.HttpRequest) -> func.HttpResponse:
+    return await handlers.handle_async("progress", req)
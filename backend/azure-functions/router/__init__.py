@@ -0,0 +1,19 @@
+import azure.functions as func
+
+from shared_code import handlers
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Single routed entry point: every resource shares one worker import, one
+    catalog view and its caches.
+    /api/subjects, /api/topics[/{subject}] (?format=ndjson exports the whole
+    catalog), /api/search, /api/exercises, /api/check_answers, /api/progress,
+    /api/next_topics and /api/metrics; the get_* names of the original
+    functions are accepted too.
+    """
+    return handlers.dispatch(req)
+
+
+async def main_async(req: func.HttpRequest) -> func.HttpResponse:
+    return await handlers.dispatch_async(req)
@@ -0,0 +1,4 @@
+"""
+Code shared by the HTTP functions of this Function App.
+The app root is on sys.path, so modules are imported as `shared_code.<name>`.
+"""
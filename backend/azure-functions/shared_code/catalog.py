@@ -0,0 +1,360 @@
+"""
+Curriculum catalog shared by the HTTP functions.
+The catalog is loaded from a versioned JSON data file into an immutable
+snapshot. Functions register "views" (lookup tables, pre-serialized
+responses) that are built for every snapshot before it is published, so
+the request path only reads attributes of the current snapshot.
+The file is re-checked at most once per check interval, in a background
+thread, and a changed file is swapped in atomically; requests never wait on
+the reload. The data can also come from a remote backend such as blob
+storage (see shared_code/catalog_backends.py).
+A new worker starts from the precompiled snapshot when one matches the
+data file (see shared_code/precompiled.py). With several worker processes
+the prebuilt response bodies live in one shared store that every worker
+maps (see shared_code/shared_catalog.py).
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Union
+
+from shared_code import log, precompiled, shared_catalog
+from shared_code.catalog_backends import CatalogBackend, open_backend
+from shared_code.compact_catalog import CompactCatalog
+from shared_code.prerequisites import PrerequisiteGraph
+from shared_code.responses import NO_SHARED_BODIES
+
+# Catalog data file, overridable with the CATALOG_PATH app setting or with
+# a document served over HTTP(S) by the CATALOG_URL app setting
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'data', 'catalog.json')
+
+# Catalog a worker starts from when CATALOG_URL cannot be fetched at cold start
+FALLBACK_CATALOG_PATH = os.environ.get('CATALOG_PATH', DEFAULT_CATALOG_PATH)
+
+logger = log.get_logger('catalog')
+
+# Seconds between checks of the data file's modification time (or remote ETag)
+DEFAULT_CHECK_INTERVAL = 30.0
+
+
+def topic_id(subject_id: str, position: int, topic: dict) -> str:
+    """
+    Stable, locale-independent id of a topic: its "id" in the data file.
+    Documents built in code may leave it out and get a positional id.
+    """
+    return topic.get('id') or f'{subject_id}-{position}'
+
+
+class CatalogSnapshot:
+    """
+    One loaded catalog version: localized subjects, topics, subject aliases
+    and the topic prerequisite graph, plus the views registered for it.
+    Topic names live only in the compact store; the document itself is not
+    kept once the snapshot is built.
+    key identifies the snapshot's bodies in the shared catalog store; a
+    catalog that shares them sets it (None otherwise).
+    shared_bodies are the bodies of the shared catalog store the catalog
+    mapped for this version, or of the precompiled snapshot the document
+    came from (empty without either), which views pass on to the prebuilt
+    responses they build.
+    """
+
+    def __init__(self, document: dict):
+        self.key = None
+        self.version = document['version']
+        self.default_language = document['default_language']
+        self.languages = tuple(document['languages'])
+        self.subject_ids = tuple(subject['id'] for subject in document['subjects'])
+
+        # Localized subject names: {lang: [name, ...]}
+        self.subjects = {
+            lang: [subject['names'][lang] for subject in document['subjects']]
+            for lang in self.languages
+        }
+
+        self.curriculum = document.get('curriculum', '')
+        self.grade = document.get('grade', 0)
+
+        # Interned, array-backed topic storage
+        self.compact = CompactCatalog.from_documents([document], self.languages)
+
+        # Subject aliases accepted in requests: {lang: {alias: subject_id}}
+        aliases = {}
+        for subject in document['subjects']:
+            aliases[subject['id']] = subject['id']
+            for name in subject['names'].values():
+                aliases[name] = subject['id']
+            for alias in subject.get('aliases', ()):
+                aliases[alias] = subject['id']
+        self.subject_mapping = {lang: dict(aliases) for lang in self.languages}
+
+        # Localized names by stable id: {subject_id: names} and
+        # {topic_id: (subject_id, names)}, in catalog order; topic names are
+        # read from the compact store's rows, which follow the same order
+        self.subject_names = {subject['id']: subject['names'] for subject in document['subjects']}
+        self.topic_entries = {}
+        row = 0
+        for subject in document['subjects']:
+            for position, topic in enumerate(subject.get('topics', ())):
+                self.topic_entries[topic_id(subject['id'], position, topic)] = (subject['id'], self.compact.names(row))
+                row += 1
+
+        # Exercise kind of every topic that has generated exercises: {topic_id: kind}
+        self.exercises = {
+            topic_id(subject['id'], position, topic): topic['exercise']
+            for subject in document['subjects']
+            for position, topic in enumerate(subject.get('topics', ()))
+            if topic.get('exercise')
+        }
+
+        # Topic prerequisites in topological order; raises ValueError for a cycle
+        self.prerequisites = PrerequisiteGraph({
+            topic_id(subject['id'], position, topic): topic.get('requires', ())
+            for subject in document['subjects']
+            for position, topic in enumerate(subject.get('topics', ()))
+        })
+
+        self.shared_bodies = NO_SHARED_BODIES
+        self.views = {}
+
+    @property
+    def topics(self) -> Dict[str, Dict[str, list]]:
+        """
+        Localized topics: {lang: {subject_id: [topic, ...]}}, built from the
+        compact store on every access (views read it once while they build).
+        """
+        return {
+            lang: {
+                subject_id: self.compact.topics(self.curriculum, self.grade, subject_id, lang)
+                for subject_id in self.subject_ids
+            }
+            for lang in self.languages
+        }
+
+
+def _check_names(names, languages, owner: str) -> None:
+    if not isinstance(names, dict):
+        raise ValueError(f'{owner} must have a "names" object')
+    for lang in languages:
+        if lang not in names:
+            raise ValueError(f'{owner} has no name in {lang}')
+        if not isinstance(names[lang], str) or not names[lang]:
+            raise ValueError(f'{owner} must have a non-empty string name in {lang}')
+
+
+def validate_document(document: dict) -> None:
+    """
+    Check the structure and value types of a catalog document.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(document, dict):
+        raise ValueError('Catalog must be a JSON object')
+    for key in ('version', 'default_language', 'languages', 'subjects'):
+        if key not in document:
+            raise ValueError(f'Catalog is missing "{key}"')
+    languages = document['languages']
+    if not isinstance(languages, list) or not languages or \
+            not all(isinstance(lang, str) and lang for lang in languages):
+        raise ValueError('Catalog languages must be a non-empty list of language tags')
+    if document['default_language'] not in languages:
+        raise ValueError('Default language is not one of the catalog languages')
+    if not isinstance(document['version'], int) or isinstance(document['version'], bool) or document['version'] < 1:
+        raise ValueError('Catalog version must be a positive integer')
+    if not isinstance(document.get('curriculum', ''), str):
+        raise ValueError('Catalog "curriculum" must be a string')
+    grade = document.get('grade', 0)
+    # Grades are stored as bytes (see shared_code/compact_catalog.py)
+    if not isinstance(grade, int) or isinstance(grade, bool) or not 0 <= grade <= 255:
+        raise ValueError('Catalog "grade" must be an integer from 0 to 255')
+    if not isinstance(document['subjects'], list):
+        raise ValueError('Catalog subjects must be a list')
+    seen = set()
+    seen_topics = set()
+    for subject in document['subjects']:
+        if not isinstance(subject, dict):
+            raise ValueError('Every subject must be a JSON object')
+        subject_id = subject.get('id')
+        if not isinstance(subject_id, str) or not subject_id or subject_id in seen:
+            raise ValueError(f'Missing or duplicate subject id: {subject_id!r}')
+        seen.add(subject_id)
+        _check_names(subject.get('names'), languages, f'Subject {subject_id}')
+        aliases = subject.get('aliases', [])
+        if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+            raise ValueError(f'Subject {subject_id} aliases must be a list of strings')
+        topics = subject.get('topics', [])
+        if not isinstance(topics, list):
+            raise ValueError(f'Subject {subject_id} topics must be a list')
+        for topic in topics:
+            if not isinstance(topic, dict):
+                raise ValueError(f'Every topic of {subject_id} must be a JSON object')
+            identifier = topic.get('id')
+            if not isinstance(identifier, str) or not identifier or identifier in seen_topics:
+                raise ValueError(f'Missing or duplicate topic id in {subject_id}: {identifier!r}')
+            seen_topics.add(identifier)
+            _check_names(topic.get('names'), languages, f'Topic {identifier}')
+            if not isinstance(topic.get('exercise', ''), str):
+                raise ValueError(f'Topic of {subject_id} has a non-string exercise kind')
+            required = topic.get('requires', [])
+            if not isinstance(required, list) or not all(isinstance(item, str) for item in required):
+                raise ValueError(f'Topic {identifier} must list the ids it requires')
+
+
+def load_document(path: str) -> dict:
+    """
+    Read and validate a catalog data file.
+    """
+    with open(path, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    validate_document(document)
+    return document
+
+
+class Catalog:
+    """
+    Hot-reloadable catalog backed by a data file or a remote document.
+    current() is lock-free; the reload check runs at most once per interval,
+    started by whichever request notices the interval has passed. The check
+    runs in a background thread and every request keeps getting the current
+    snapshot until a newer one is published (stale-while-revalidate), so
+    neither a slow origin nor a large file holds up a request.
+    """
+
+    def __init__(self, source: Union[str, CatalogBackend], check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 shared_directory: str = None):
+        self.backend = open_backend(source, FALLBACK_CATALOG_PATH) if isinstance(source, str) else source
+        self.check_interval = check_interval
+        self.shared_directory = shared_catalog.DIRECTORY if shared_directory is None else shared_directory
+        self._builders: Dict[str, Callable] = {}
+        self._reload_lock = threading.Lock()
+        self._revalidate = threading.Event()
+        self._revalidator = None
+        self._stamp, document = self.backend.initial()
+        validate_document(document)
+        self._snapshot = CatalogSnapshot(document)
+        # A precompiled snapshot's bodies serve until a shared store has them
+        self._snapshot.shared_bodies = precompiled.take_bodies(document)
+        self._attach(self._snapshot, self._stamp)
+        # A fallback copy (no stamp) is replaced as soon as a request notices
+        self._next_check = time.monotonic() + (check_interval if self._stamp is not None else 0)
+
+    def register_view(self, name: str, builder: Callable, incremental: bool = False) -> None:
+        """
+        Register a view built from every snapshot as builder(snapshot), or as
+        builder(snapshot, previous_view) if incremental (None the first time).
+        The view for the current snapshot is built immediately.
+        """
+        with self._reload_lock:
+            self._builders[name] = (builder, incremental)
+            snapshot = self._snapshot
+            snapshot.views[name] = builder(snapshot, None) if incremental else builder(snapshot)
+            self._share(snapshot)
+
+    def _attach(self, snapshot: CatalogSnapshot, stamp) -> None:
+        # Views of the snapshot take their bodies from this catalog's store, if one was published.
+        # A fallback copy (no stamp) is not shared: its version may be that of another document
+        self._shared = None
+        if self.shared_directory and stamp is not None:
+            snapshot.key = shared_catalog.catalog_key(repr(self.backend), snapshot.version, stamp)
+            self._shared = shared_catalog.attach(snapshot.key, self.shared_directory)
+        if self._shared is not None:
+            snapshot.shared_bodies = self._shared.bodies
+
+    def _share(self, snapshot: CatalogSnapshot) -> None:
+        # The first worker to build a catalog version publishes its responses
+        if snapshot.key is not None and self._shared is None:
+            self._shared = shared_catalog.share(snapshot.key, snapshot.views.values(),
+                                                self.shared_directory)
+            if self._shared is not None:
+                snapshot.shared_bodies = self._shared.bodies
+
+    def current(self) -> CatalogSnapshot:
+        """
+        Current snapshot; starts a background check if the interval has passed.
+        """
+        if time.monotonic() >= self._next_check:
+            self.revalidate()
+        return self._snapshot
+
+    def revalidate(self) -> bool:
+        """
+        Wake the background reload thread unless a reload is already running
+        (single flight). Returns True if a reload was started.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        # Requests arriving before the reload finishes must not start another one
+        self._next_check = time.monotonic() + self.check_interval
+        if self._revalidator is None:
+            # Started once: starting a thread waits for it to run, which a busy worker makes slow
+            self._revalidator = threading.Thread(target=self._revalidate_forever, name='catalog-revalidate',
+                                                 daemon=True)
+            self._revalidator.start()
+        self._revalidate.set()
+        return True
+
+    def _revalidate_forever(self) -> None:
+        while True:
+            self._revalidate.wait()
+            self._revalidate.clear()
+            try:
+                self._reload_locked(False)
+            finally:
+                self._reload_lock.release()
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the catalog again if it changed (or if forced).
+        Returns True if a new snapshot was published. Never blocks: if another
+        request is already reloading, the current snapshot keeps being served.
+        Changed content is only published with a higher version.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            return self._reload_locked(force)
+        finally:
+            self._reload_lock.release()
+
+    def _reload_locked(self, force: bool) -> bool:
+        # Never raises: the revalidate thread would die with the exception and no later check would run
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            stamp, document = self.backend.load(None if force else self._stamp)
+            if document is None:
+                return False
+            validate_document(document)
+            current = self._snapshot
+            # Whatever version a fallback copy has, the first real document replaces it
+            if self._stamp is not None and document['version'] <= current.version:
+                if document['version'] < current.version:
+                    raise ValueError(f'Catalog version {document["version"]} is older than {current.version}')
+                # ?since= deltas and client caches know a catalog only by its version, so a
+                # document under the same version is the same catalog, whatever it holds
+                self._stamp = stamp
+                logger.warning('catalog_version_unchanged', version=current.version)
+                return False
+            snapshot = CatalogSnapshot(document)
+            self._attach(snapshot, stamp)
+            for name, (builder, incremental) in self._builders.items():
+                if incremental:
+                    snapshot.views[name] = builder(snapshot, self._snapshot.views.get(name))
+                else:
+                    snapshot.views[name] = builder(snapshot)
+            self._share(snapshot)
+            # Publish with a single reference assignment
+            self._stamp = stamp
+            self._snapshot = snapshot
+            logger.info('catalog_reloaded', version=snapshot.version)
+            return True
+        except Exception as e:
+            # Keep serving the last good snapshot, whatever was wrong with the new one
+            logger.error('catalog_reload_failed', version=self._snapshot.version, error=str(e))
+            return False
+
+
+# Catalog instance shared by all functions in this worker process
+CATALOG = Catalog(
+    os.environ.get('CATALOG_URL') or os.environ.get('CATALOG_PATH', DEFAULT_CATALOG_PATH),
+    float(os.environ.get('CATALOG_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL))
+)
@@ -0,0 +1,195 @@
+"""
+Where the catalog data file comes from.
+A backend loads the catalog document when it changed since a stamp the
+backend handed out before (a file's mtime and size, an HTTP ETag), so an
+unchanged catalog costs a stat or a conditional request, never a parse.
+
+FileBackend reads a local file (or catalog.json in a directory), as
+shipped with the app. HttpBackend reads a document published over HTTP,
+such as a blob in a storage container (a SAS URL or a public blob), over
+one persistent connection shared by every thread of the worker; it asks
+with If-None-Match / If-Modified-Since, so an unchanged blob answers 304.
+Loads run in the background while the catalog keeps serving the copy it
+has (see Catalog in shared_code/catalog.py). A worker whose first fetch fails or
+takes longer than INITIAL_TIMEOUT starts from a local fallback file (the
+bundled catalog) instead of failing or stalling its import, and picks up
+the remote document once it answers.
+
+The backend is chosen by the CATALOG_URL app setting (http:// or https://),
+else CATALOG_PATH.
+"""
+import http.client
+import json
+import os
+import threading
+from typing import Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+from shared_code import log, precompiled
+
+# Catalog file looked up in a directory
+CATALOG_FILE_NAME = 'catalog.json'
+
+# Seconds to wait for the catalog server
+HTTP_TIMEOUT = 10.0
+
+# Seconds a worker with a fallback waits for the catalog server at cold start
+INITIAL_TIMEOUT = 2.0
+
+logger = log.get_logger('catalog')
+
+
+class CatalogBackend:
+    """
+    Source of catalog documents.
+    """
+
+    def load(self, stamp: Any = None) -> Tuple[Any, Optional[dict]]:
+        """
+        (stamp, document) of the current catalog, or (stamp, None) if it has
+        not changed since stamp (None always loads). The document is not yet
+        validated. Raises OSError when the catalog cannot be read and
+        ValueError when it is not JSON.
+        """
+        raise NotImplementedError
+
+    def initial(self) -> Tuple[Any, Optional[dict]]:
+        """
+        load() for the first snapshot of a worker; backends may start from
+        a precompiled copy of the document, or from a fallback copy with a
+        None stamp (so the next load fetches the real one).
+        """
+        return self.load()
+
+
+class FileBackend(CatalogBackend):
+    """
+    Catalog data file on the local file system.
+    """
+
+    def __init__(self, path: str):
+        if os.path.isdir(path):
+            path = os.path.join(path, CATALOG_FILE_NAME)
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f'FileBackend({self.path!r})'
+
+    def _stamp(self) -> tuple:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, stamp: Any = None) -> Tuple[Any, Optional[dict]]:
+        # Stamped before reading, so a change during the read is seen next time
+        current = self._stamp()
+        if stamp is not None and current == stamp:
+            return current, None
+        with open(self.path, encoding='utf-8') as catalog_file:
+            return current, json.load(catalog_file)
+
+    def initial(self) -> Tuple[Any, Optional[dict]]:
+        stamp = self._stamp()
+        document = precompiled.load_snapshot(self.path)
+        if document is not None:
+            return stamp, document
+        return self.load()
+
+
+class HttpBackend(CatalogBackend):
+    """
+    Catalog document served over HTTP(S), fetched with conditional requests
+    over one keep-alive connection. With a fallback path, a worker that
+    cannot fetch it within initial_timeout at cold start starts from that file.
+    """
+
+    def __init__(self, url: str, timeout: float = HTTP_TIMEOUT, headers: dict = None, fallback: str = None,
+                 initial_timeout: float = INITIAL_TIMEOUT):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError(f'Not an http(s) URL: {url}')
+        self.url = url
+        self.timeout = timeout
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self._target = parts.path + (f'?{parts.query}' if parts.query else '') or '/'
+        self._headers = {"Accept": "application/json", "Accept-Encoding": "gzip", **(headers or {})}
+        self.fallback = fallback
+        self.initial_timeout = initial_timeout
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        # The query string may hold a SAS token
+        return f'HttpBackend({self.url.split("?", 1)[0]!r})'
+
+    def _request(self, headers: dict, timeout: float) -> Tuple[int, dict, bytes]:
+        # A kept-alive connection the server has closed fails on first use; retry once on a new one
+        for attempt in (0, 1):
+            reused = self._connection is not None
+            if not reused:
+                self._connection = self._connection_class(self._netloc, timeout=timeout)
+            try:
+                self._connection.request('GET', self._target, headers=headers)
+                response = self._connection.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, {key.lower(): value for key, value in response.getheaders()}, body
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt or not reused:
+                    raise OSError(f'Catalog request to {self!r} failed: {e}') from e
+
+    def load(self, stamp: Any = None) -> Tuple[Any, Optional[dict]]:
+        return self._load(stamp, self.timeout)
+
+    def _load(self, stamp: Any, timeout: float) -> Tuple[Any, Optional[dict]]:
+        headers = dict(self._headers)
+        if stamp is not None:
+            etag, last_modified = stamp
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        # One request at a time on the shared connection
+        with self._lock:
+            status, response_headers, body = self._request(headers, timeout)
+        if status == 304 and stamp is not None:
+            return stamp, None
+        if status != 200:
+            raise OSError(f'Catalog request to {self!r} answered {status}')
+        if response_headers.get('content-encoding', '').lower() == 'gzip':
+            # Imported on first use: file-backed workers never decompress a catalog
+            import gzip
+            body = gzip.decompress(body)
+        document = json.loads(body.decode('utf-8'))
+        return (response_headers.get('etag'), response_headers.get('last-modified')), document
+
+    def initial(self) -> Tuple[Any, Optional[dict]]:
+        if not self.fallback:
+            return self.load()
+        try:
+            return self._load(None, self.initial_timeout)
+        except (OSError, ValueError) as e:
+            # Serve the fallback until a background revalidation gets the remote document
+            logger.error('catalog_fetch_failed_at_start', backend=repr(self), fallback=self.fallback, error=str(e))
+            return None, FileBackend(self.fallback).initial()[1]
+        finally:
+            # Later loads connect again with the regular timeout
+            self.close()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def open_backend(location: str, fallback: str = None) -> CatalogBackend:
+    """
+    Backend of a catalog location: an http(s) URL (starting from the
+    fallback file if it cannot be fetched at cold start) or a file or
+    directory path.
+    """
+    if location.startswith(('http://', 'https://')):
+        return HttpBackend(location, fallback=fallback)
+    return FileBackend(location)
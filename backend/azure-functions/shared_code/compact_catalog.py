@@ -0,0 +1,219 @@
+"""
+Compact in-memory catalog for many curricula, grades, subjects and locales.
+Every distinct string is stored once in an interned string table; topics
+are rows of typed arrays (curriculum, grade, subject codes and one string id
+per locale) grouped into contiguous ranges per (curriculum, grade, subject).
+TopicRecord and TopicNames objects are small __slots__ views of one row.
+"""
+from array import array
+from collections.abc import Mapping as MappingBase
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+# String id of the empty string, used for topics without a name in a locale
+MISSING = 0
+
+
+class StringTable:
+    """
+    Interned strings addressed by integer id.
+    The reverse index is only needed while building and can be dropped.
+    """
+    __slots__ = ('strings', '_ids')
+
+    def __init__(self):
+        self.strings: List[str] = ['']
+        self._ids: Dict[str, int] = {'': MISSING}
+
+    def intern(self, text: str) -> int:
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._ids[text] = string_id
+            self.strings.append(text)
+        return string_id
+
+    def freeze(self) -> None:
+        self._ids = None
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class TopicRecord:
+    """
+    One topic row: its codes and localized names, resolved on access.
+    """
+    __slots__ = ('_catalog', 'row')
+
+    def __init__(self, catalog: 'CompactCatalog', row: int):
+        self._catalog = catalog
+        self.row = row
+
+    @property
+    def curriculum(self) -> str:
+        return self._catalog.curricula[self._catalog._curriculum_codes[self.row]]
+
+    @property
+    def grade(self) -> int:
+        return self._catalog._grades[self.row]
+
+    @property
+    def subject(self) -> str:
+        return self._catalog.subjects[self._catalog._subject_codes[self.row]]
+
+    def name(self, locale: str) -> str:
+        catalog = self._catalog
+        offset = self.row * len(catalog.locales) + catalog.locale_index[locale]
+        return catalog.strings[catalog._names[offset]]
+
+    def __repr__(self):
+        return f'TopicRecord({self.curriculum!r}, {self.grade}, {self.subject!r}, row={self.row})'
+
+
+class TopicNames(MappingBase):
+    """
+    Read-only {locale: name} mapping of one topic row, in place of the
+    document's names object. Locales without a name are left out.
+    """
+    __slots__ = ('_catalog', 'row')
+
+    def __init__(self, catalog: 'CompactCatalog', row: int):
+        self._catalog = catalog
+        self.row = row
+
+    def __getitem__(self, locale: str) -> str:
+        catalog = self._catalog
+        string_id = catalog._names[self.row * len(catalog.locales) + catalog.locale_index[locale]]
+        if string_id == MISSING:
+            raise KeyError(locale)
+        return catalog.strings[string_id]
+
+    def __iter__(self) -> Iterator[str]:
+        catalog = self._catalog
+        offset = self.row * len(catalog.locales)
+        return (locale for i, locale in enumerate(catalog.locales) if catalog._names[offset + i] != MISSING)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'TopicNames({dict(self)!r})'
+
+
+class CompactCatalog:
+    """
+    Topics addressed by (curriculum, grade, subject, locale).
+    Rows for one (curriculum, grade, subject) are appended together, so the
+    index only keeps a (start, stop) range per key.
+    """
+
+    def __init__(self, locales: Sequence[str]):
+        self.locales = tuple(locales)
+        self.locale_index = {locale: i for i, locale in enumerate(self.locales)}
+        self.strings = StringTable()
+        self.curricula: List[str] = []
+        self.subjects: List[str] = []
+        self._curriculum_index: Dict[str, int] = {}
+        self._subject_index: Dict[str, int] = {}
+        self._curriculum_codes = array('H')
+        self._grades = array('B')
+        self._subject_codes = array('H')
+        # Row-major string ids: one entry per (row, locale)
+        self._names = array('I')
+        self._ranges: Dict[Tuple[int, int, int], Tuple[int, int]] = {}
+
+    @staticmethod
+    def _code(values: List[str], index: Dict[str, int], value: str) -> int:
+        code = index.get(value)
+        if code is None:
+            code = len(values)
+            index[value] = code
+            values.append(value)
+        return code
+
+    def add_topics(self, curriculum: str, grade: int, subject: str,
+                   topics: Iterable[Mapping[str, str]]) -> None:
+        """
+        Append the topics of one (curriculum, grade, subject) as {locale: name} maps.
+        Raises ValueError if the key was already added.
+        """
+        key = (
+            self._code(self.curricula, self._curriculum_index, curriculum),
+            grade,
+            self._code(self.subjects, self._subject_index, subject)
+        )
+        if key in self._ranges:
+            raise ValueError(f'Topics already added for {curriculum}, grade {grade}, {subject}')
+        start = len(self._grades)
+        intern = self.strings.intern
+        for names in topics:
+            self._curriculum_codes.append(key[0])
+            self._grades.append(grade)
+            self._subject_codes.append(key[2])
+            self._names.extend(intern(names.get(locale, '')) for locale in self.locales)
+        self._ranges[key] = (start, len(self._grades))
+
+    def freeze(self) -> None:
+        """
+        Drop build-time structures once all topics are added.
+        """
+        self.strings.freeze()
+
+    def _range(self, curriculum: str, grade: int, subject: str) -> Tuple[int, int]:
+        curriculum_code = self._curriculum_index.get(curriculum)
+        subject_code = self._subject_index.get(subject)
+        return self._ranges.get((curriculum_code, grade, subject_code), (0, 0))
+
+    def topics(self, curriculum: str, grade: int, subject: str, locale: str) -> List[str]:
+        """
+        Localized topic names; topics without a name in the locale are skipped.
+        """
+        start, stop = self._range(curriculum, grade, subject)
+        width = len(self.locales)
+        column = self.locale_index[locale]
+        strings = self.strings.strings
+        names = self._names[start * width + column:stop * width:width]
+        return [strings[string_id] for string_id in names if string_id != MISSING]
+
+    def names(self, row: int) -> TopicNames:
+        """
+        Localized names of one row.
+        """
+        return TopicNames(self, row)
+
+    def records(self, curriculum: str, grade: int, subject: str) -> List[TopicRecord]:
+        start, stop = self._range(curriculum, grade, subject)
+        return [TopicRecord(self, row) for row in range(start, stop)]
+
+    def keys(self) -> List[Tuple[str, int, str]]:
+        """
+        All (curriculum, grade, subject) keys in insertion order.
+        """
+        return [
+            (self.curricula[curriculum], grade, self.subjects[subject])
+            for curriculum, grade, subject in self._ranges
+        ]
+
+    def __len__(self) -> int:
+        return len(self._grades)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict], locales: Sequence[str]) -> 'CompactCatalog':
+        """
+        Build from catalog documents (see shared_code/data/catalog.json);
+        each document holds one curriculum and grade.
+        """
+        catalog = cls(locales)
+        for document in documents:
+            curriculum = document.get('curriculum', '')
+            grade = document.get('grade', 0)
+            for subject in document['subjects']:
+                catalog.add_topics(
+                    curriculum, grade, subject['id'],
+                    (topic['names'] for topic in subject.get('topics', ()))
+                )
+        catalog.freeze()
+        return catalog
@@ -0,0 +1,81 @@
+"""
+CORS policy shared by the HTTP functions.
+Allowed origins come from the CORS_ALLOWED_ORIGINS app setting, a comma-
+separated list such as "https://tutor.example.com,http://localhost:3000";
+"*" (the default) allows any origin. Preflight (OPTIONS) answers are built
+once at import and carry Access-Control-Max-Age (CORS_MAX_AGE seconds), so
+browsers cache them instead of preflighting every cross-origin POST.
+"""
+import azure.functions as func
+import os
+import types
+
+ALLOW_METHODS = "GET, POST, OPTIONS"
+ALLOW_HEADERS = "Content-Type, Accept-Language, X-Correlation-ID, X-Request-ID"
+
+# Seconds a browser may cache a preflight answer (browsers cap it, e.g. at 2 hours)
+MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+
+
+def parse_origins(spec: str) -> frozenset:
+    """
+    Parse a comma-separated origin list; trailing slashes are ignored.
+    """
+    return frozenset(origin.strip().rstrip('/') for origin in spec.split(',') if origin.strip())
+
+
+ALLOWED_ORIGINS = parse_origins(os.environ.get('CORS_ALLOWED_ORIGINS', '*'))
+ALLOW_ALL = '*' in ALLOWED_ORIGINS
+
+# Headers of every actual (non-preflight) response; with an allowlist the
+# Access-Control-Allow-Origin value depends on the request (see allowed_origin)
+RESPONSE_HEADERS = {
+    "Access-Control-Allow-Methods": ALLOW_METHODS,
+    "Access-Control-Allow-Headers": ALLOW_HEADERS
+}
+if ALLOW_ALL:
+    RESPONSE_HEADERS = {"Access-Control-Allow-Origin": "*", **RESPONSE_HEADERS}
+
+
+def allowed_origin(origin: str) -> str:
+    """
+    Access-Control-Allow-Origin value for a request Origin, or None if the
+    origin is not allowed.
+    """
+    if ALLOW_ALL:
+        return "*"
+    if origin in ALLOWED_ORIGINS:
+        return origin
+    return None
+
+
+def _preflight_headers(origin: str = None) -> types.MappingProxyType:
+    headers = {
+        "Access-Control-Allow-Methods": ALLOW_METHODS,
+        "Access-Control-Allow-Headers": ALLOW_HEADERS,
+        "Access-Control-Max-Age": str(MAX_AGE)
+    }
+    if origin:
+        headers["Access-Control-Allow-Origin"] = origin
+    if not ALLOW_ALL:
+        headers["Vary"] = "Origin"
+    return types.MappingProxyType(headers)
+
+
+# Prebuilt preflight headers per allowed origin; None is the answer for
+# origins that are not allowed (no CORS headers, so the browser refuses)
+PREFLIGHT_HEADERS = {None: types.MappingProxyType({"Vary": "Origin"})}
+if ALLOW_ALL:
+    PREFLIGHT_HEADERS["*"] = _preflight_headers("*")
+else:
+    PREFLIGHT_HEADERS.update({origin: _preflight_headers(origin) for origin in ALLOWED_ORIGINS})
+
+
+def preflight_response(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    204 answer to a preflight request: no body parsing, no negotiation.
+    """
+    return func.HttpResponse(
+        status_code=204,
+        headers=PREFLIGHT_HEADERS[allowed_origin(req.headers.get('Origin'))]
+    )
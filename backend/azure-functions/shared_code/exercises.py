@@ -0,0 +1,333 @@
+"""
+Seeded practice-problem generator for Math topics.
+Each exercise kind draws one row of uniform numbers per problem with
+NumPy and turns it into operands and answers with array arithmetic, so a
+batch of thousands of problems takes a few milliseconds. Rows are drawn in
+one call in row-major order, so problem i only depends on (kind,
+difficulty, seed, i): any problem can be regenerated from its id.
+Questions are formatted from per-language templates.
+Answers are checked the same way: expected answers of a batch of ids are
+regenerated per (kind, difficulty) in one vectorized call.
+"""
+import functools
+import math
+import re
+import unicodedata
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+DIFFICULTIES = (1, 2, 3)
+MAX_COUNT = 10000
+MAX_SEED = 2 ** 64 - 1
+
+# Uniform numbers drawn per problem; every kind uses at most this many
+COLUMNS = 3
+
+# Stable codes mixed into the seed, so kinds do not share problems
+KIND_CODES = {
+    "add_sub": 1,
+    "mul_div": 2,
+    "fractions": 3,
+    "measurement": 4,
+    "perimeter_area": 5
+}
+
+# Rows drawn in full up to this multiple of the rows needed; sparser ids
+# are drawn one by one after advancing the generator
+DENSE_FACTOR = 8
+
+# Distinct answer strings with a cached parse; worksheets repeat answers a lot
+ANSWER_CACHE_SIZE = 4096
+
+# Integers with optional space- or comma-grouped thousands and decimals
+# ('1 000', '1,000', '2,5'), fractions ('3/4') and mixed numbers ('1 1/2').
+# A comma followed by groups of exactly three digits groups thousands
+# ('1,000' and '12,500.5'); any other comma is a decimal comma ('1,5', '2,50')
+_COMMA_GROUPED = r'[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?'
+_NUMBER = rf'{_COMMA_GROUPED}|[+-]?(?:\d{{1,3}}(?: \d{{3}})+|\d+)(?:[.,]\d+)?'
+_ANSWER = re.compile(rf'({_NUMBER})(?: (\d+)/(\d+)|/(\d+))?')
+_THOUSANDS = re.compile(_COMMA_GROUPED)
+
+# Languages with question templates, the first one is the fallback
+LANGUAGES = ("ru", "en")
+
+# Question templates per kind and language, selected per problem by index
+TEMPLATES = {
+    "add_sub": {
+        "ru": ("{} + {} = ?", "{} − {} = ?"),
+        "en": ("{} + {} = ?", "{} − {} = ?")
+    },
+    "mul_div": {
+        "ru": ("{} × {} = ?", "{} : {} = ?"),
+        "en": ("{} × {} = ?", "{} ÷ {} = ?")
+    },
+    "fractions": {
+        "ru": ("{}/{} от {} = ?",),
+        "en": ("{}/{} of {} = ?",)
+    },
+    "measurement": {
+        "ru": ("{} м = ? см", "{} см = ? м", "{} кг = ? г", "{} г = ? кг",
+               "{} ч = ? мин", "{} мин = ? ч", "{} км = ? м", "{} м = ? км"),
+        "en": ("{} m = ? cm", "{} cm = ? m", "{} kg = ? g", "{} g = ? kg",
+               "{} h = ? min", "{} min = ? h", "{} km = ? m", "{} m = ? km")
+    },
+    "perimeter_area": {
+        "ru": ("Прямоугольник {} см × {} см. Найди периметр (см).",
+               "Прямоугольник {} см × {} см. Найди площадь (см²).",
+               "Площадь прямоугольника {} см², одна сторона {} см. Найди другую сторону (см)."),
+        "en": ("Rectangle {} cm × {} cm. Find the perimeter (cm).",
+               "Rectangle {} cm × {} cm. Find the area (cm²).",
+               "A rectangle has area {} cm² and one side {} cm. Find the other side (cm).")
+    }
+}
+
+# Conversion factors of the measurement templates, one per unit pair
+MEASUREMENT_FACTORS = np.array([100, 1000, 60, 1000])
+
+
+def _scale(u: np.ndarray, low, high) -> np.ndarray:
+    """
+    Integers in [low, high] from uniform numbers in [0, 1); bounds may be arrays.
+    """
+    return (low + np.floor(u * (np.asarray(high) - low + 1))).astype(np.int64)
+
+
+def _add_sub(u: np.ndarray, difficulty: int):
+    # Sums stay within 100, then 1000 in tens, then 1000
+    limit, step = {1: (100, 1), 2: (1000, 10), 3: (1000, 1)}[difficulty]
+    units = limit // step
+    a = _scale(u[:, 0], 1, units - 1)
+    b = _scale(u[:, 1], 1, units - a)
+    a, b = a * step, b * step
+    total = a + b
+    subtract = (u[:, 2] >= 0.5).astype(np.int64)
+    # a + b = total, or total − b = a
+    first = np.where(subtract, total, a)
+    answer = np.where(subtract, a, total)
+    return subtract, np.column_stack((first, b)), answer
+
+
+def _mul_div(u: np.ndarray, difficulty: int):
+    (a_low, a_high), (b_low, b_high) = {
+        1: ((2, 5), (2, 5)),
+        2: ((2, 10), (2, 10)),
+        3: ((11, 99), (2, 9))
+    }[difficulty]
+    a = _scale(u[:, 0], a_low, a_high)
+    b = _scale(u[:, 1], b_low, b_high)
+    divide = (u[:, 2] >= 0.5).astype(np.int64)
+    # a × b = product, or product ÷ b = a
+    product = a * b
+    first = np.where(divide, product, a)
+    answer = np.where(divide, a, product)
+    return divide, np.column_stack((first, b)), answer
+
+
+def _fractions(u: np.ndarray, difficulty: int):
+    denominators, multiples = {
+        1: (np.array([2, 4]), 5),
+        2: (np.array([2, 3, 4, 5, 10]), 10),
+        3: (np.arange(2, 11), 12)
+    }[difficulty]
+    denominator = denominators[_scale(u[:, 0], 0, len(denominators) - 1)]
+    k = _scale(u[:, 1], 1, multiples)
+    # Unit fractions first; proper fractions on the hardest level
+    numerator = _scale(u[:, 2], 1, denominator - 1) if difficulty == 3 else np.ones_like(k)
+    fields = np.column_stack((numerator, denominator, denominator * k))
+    return np.zeros_like(k), fields, numerator * k
+
+
+def _measurement(u: np.ndarray, difficulty: int):
+    # Large to small units first; both directions and larger values later
+    pairs, values, both_ways = {1: (2, 9, False), 2: (3, 20, True), 3: (4, 99, True)}[difficulty]
+    pair = _scale(u[:, 0], 0, pairs - 1)
+    value = _scale(u[:, 1], 1, values)
+    to_large = (u[:, 2] >= 0.5).astype(np.int64) if both_ways else np.zeros_like(value)
+    small = value * MEASUREMENT_FACTORS[pair]
+    given = np.where(to_large, small, value)
+    answer = np.where(to_large, value, small)
+    return pair * 2 + to_large, given[:, None], answer
+
+
+def _perimeter_area(u: np.ndarray, difficulty: int):
+    sides, questions = {1: (10, 1), 2: (12, 2), 3: (20, 3)}[difficulty]
+    a = _scale(u[:, 0], 1, sides)
+    b = _scale(u[:, 1], 1, sides)
+    question = _scale(u[:, 2], 0, questions - 1)
+    area = a * b
+    # Perimeter and area of a × b, or the side b of an a-wide rectangle of that area
+    first = np.where(question == 2, area, a)
+    second = np.where(question == 2, a, b)
+    answer = np.select([question == 0, question == 1], [2 * (a + b), area], b)
+    return question, np.column_stack((first, second)), answer
+
+
+GENERATORS = {
+    "add_sub": _add_sub,
+    "mul_div": _mul_div,
+    "fractions": _fractions,
+    "measurement": _measurement,
+    "perimeter_area": _perimeter_area
+}
+
+
+def generate(kind: str, difficulty: int, seed: int, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (template index, operand rows, answers) of problems 0..count-1.
+    """
+    rng = np.random.default_rng([seed, KIND_CODES[kind], difficulty])
+    return GENERATORS[kind](rng.random((count, COLUMNS)), difficulty)
+
+
+def exercise_id(kind: str, difficulty: int, seed: int, index: int) -> str:
+    return f"{kind}.{difficulty}.{seed}.{index}"
+
+
+def parse_exercise_id(value: str):
+    """
+    (kind, difficulty, seed, index) of an exercise id, or None if malformed.
+    """
+    try:
+        kind, difficulty, seed, index = value.split('.')
+        parsed = kind, int(difficulty), int(seed), int(index)
+    except (AttributeError, ValueError):
+        return None
+    if (kind not in GENERATORS or parsed[1] not in DIFFICULTIES
+            or not 0 <= parsed[2] <= MAX_SEED or not 0 <= parsed[3] < MAX_COUNT):
+        return None
+    return parsed
+
+
+def render(kind: str, difficulty: int, seed: int, count: int, language: str) -> bytes:
+    """
+    JSON array items (without brackets) of count problems with ids,
+    localized questions and answers.
+    """
+    template_index, fields, answers = generate(kind, difficulty, seed, count)
+    # One %-format per problem: templates hold no characters that need JSON
+    # escaping and every value is an integer
+    prefix = exercise_id(kind, difficulty, seed, '%d')
+    items = [
+        f'{{"id":"{prefix}","question":"' + template.replace('%', '%%').replace('{}', '%d') + '","answer":%d}'
+        for template in TEMPLATES[kind][language]
+    ]
+    rows = np.column_stack((np.arange(count), fields, answers)).tolist()
+    return ','.join([items[template] % tuple(row) for template, row in zip(template_index.tolist(), rows)]).encode('utf-8')
+
+
+def _uniforms(kind: str, difficulty: int, seed: int, indexes: np.ndarray) -> np.ndarray:
+    """
+    The uniform rows generate() draws for problems indexes (in any order,
+    repeats allowed).
+    """
+    rng = np.random.default_rng([seed, KIND_CODES[kind], difficulty])
+    count = int(indexes.max()) + 1
+    if count <= DENSE_FACTOR * len(indexes):
+        return rng.random((count, COLUMNS))[indexes]
+    # Each uniform takes one 64-bit draw, so row i starts at draw i * COLUMNS
+    unique, inverse = np.unique(indexes, return_inverse=True)
+    rows = np.empty((len(unique), COLUMNS))
+    position = 0
+    for row, index in enumerate(unique.tolist()):
+        rng.bit_generator.advance(index * COLUMNS - position)
+        rows[row] = rng.random(COLUMNS)
+        position = (index + 1) * COLUMNS
+    return rows[inverse]
+
+
+def expected_answers(ids: Sequence[str]) -> np.ndarray:
+    """
+    Expected answer of every exercise id, NaN for malformed ids. Ids are
+    grouped by seed to draw their rows and by (kind, difficulty) to compute
+    the answers, so a worksheet of thousands of ids takes a few array calls.
+    """
+    expected = np.full(len(ids), np.nan)
+    # "<kind>.<difficulty>.<seed>" -> (parsed prefix, positions, problem indexes);
+    # each distinct prefix is parsed once
+    groups = {}
+    for position, value in enumerate(ids):
+        try:
+            prefix, _, index = value.rpartition('.')
+            index = int(index)
+        except (AttributeError, ValueError):
+            continue
+        group = groups.get(prefix)
+        if group is None:
+            group = groups[prefix] = (parse_exercise_id(prefix + '.0'), [], [])
+        if group[0] is not None and 0 <= index < MAX_COUNT:
+            group[1].append(position)
+            group[2].append(index)
+
+    by_kind = {}
+    for parsed, positions, indexes in groups.values():
+        if not positions:
+            continue
+        kind, difficulty, seed, _ = parsed
+        rows = _uniforms(kind, difficulty, seed, np.array(indexes))
+        kind_positions, kind_rows = by_kind.setdefault((kind, difficulty), ([], []))
+        kind_positions.extend(positions)
+        kind_rows.append(rows)
+    for (kind, difficulty), (positions, rows) in by_kind.items():
+        expected[positions] = GENERATORS[kind](np.concatenate(rows), difficulty)[2]
+    return expected
+
+
+@functools.lru_cache(maxsize=ANSWER_CACHE_SIZE)
+def _parse_answer_text(text: str) -> float:
+    text = ' '.join(unicodedata.normalize('NFKC', text).replace('\u2212', '-').split())
+    match = _ANSWER.fullmatch(text)
+    if not match:
+        return math.nan
+    number, numerator, denominator, divisor = match.groups()
+    number = number.replace(',', '') if _THOUSANDS.fullmatch(number) else number.replace(',', '.')
+    value = float(number.replace(' ', ''))
+    if divisor:
+        return value / int(divisor) if int(divisor) else math.nan
+    if denominator:
+        if not int(denominator) or '.' in number:
+            return math.nan
+        return math.copysign(abs(value) + int(numerator) / int(denominator), value)
+    return value
+
+
+def parse_answer(value) -> float:
+    """
+    Numeric value of a student answer: a JSON number or a string holding an
+    integer ('1 000', '1,000' and '−5' included), a decimal ('2.5' or '2,5'), a
+    fraction ('6/2') or a mixed number ('1 1/2'). NaN if unreadable.
+    """
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and len(value) <= 64:
+        # Plain whole numbers skip the cache and the pattern
+        stripped = value.strip()
+        if stripped.isascii() and stripped.isdigit():
+            return float(stripped)
+        return _parse_answer_text(value)
+    return math.nan
+
+
+def check(ids: Sequence[str], answers: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (correct flags, expected answers) of student answers to exercise ids;
+    expected answers are NaN for malformed ids, which are never correct.
+    """
+    expected = expected_answers(ids)
+    given = np.fromiter((parse_answer(answer) for answer in answers), dtype=float, count=len(answers))
+    return given == expected, expected
+
+
+def score_summary(ids: Sequence[str], correct: np.ndarray, expected: np.ndarray) -> List[dict]:
+    """
+    Totals per exercise kind, in order of first appearance.
+    """
+    kinds = {}
+    for value, is_correct, is_valid in zip(ids, correct.tolist(), (~np.isnan(expected)).tolist()):
+        if is_valid:
+            totals = kinds.setdefault(value.split('.', 1)[0], [0, 0])
+            totals[0] += 1
+            totals[1] += is_correct
+    return [{"kind": kind, "total": total, "correct": right} for kind, (total, right) in kinds.items()]
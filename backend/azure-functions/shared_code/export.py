@@ -0,0 +1,97 @@
+"""
+Whole-catalog export as NDJSON (one JSON object per line) for offline
+clients: one record per topic and language, with the topic's stable id,
+its subject and the ids it requires.
+
+The export is a pipeline of generators, so only one output chunk exists at
+a time however large the catalog grows: records are made from the topic
+entries the API view already holds, serialized one line at a time,
+gathered into chunks of CHUNK_SIZE bytes and, if the client accepts it,
+compressed chunk by chunk. Nothing builds the whole export as one string.
+"""
+import json
+import zlib
+from typing import Iterable, Iterator, Sequence
+
+from shared_code.negotiation import IDENTITY
+
+NDJSON_MIMETYPE = "application/x-ndjson; charset=utf-8"
+
+# Bytes gathered before a chunk is passed on (compressed or sent)
+CHUNK_SIZE = 64 * 1024
+
+# zlib window bits of each content coding: gzip wrapper, zlib wrapper
+WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+# Exports are compressed per request, so a middle level
+COMPRESSION_LEVEL = 6
+
+
+def topic_records(view, languages: Sequence[str], subjects: Iterable[str] = None) -> Iterator[dict]:
+    """
+    Records of the view's topics, language by language in catalog order,
+    optionally only of some subject ids.
+    """
+    subjects = frozenset(subjects) if subjects is not None else None
+    graph = view.prerequisites
+    for lang in languages:
+        for topic, (subject, names) in view.topic_entries.items():
+            if subjects is not None and subject not in subjects:
+                continue
+            yield {
+                "id": topic,
+                "subject": subject,
+                "lang": lang,
+                "subject_name": view.subject_names[subject][lang],
+                "name": names[lang],
+                "requires": graph.requires[graph.index[topic]]
+            }
+
+
+def ndjson_lines(records: Iterable[dict]) -> Iterator[bytes]:
+    """
+    One UTF-8 JSON line per record.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for record in records:
+        yield (encoder.encode(record) + '\n').encode('utf-8')
+
+
+def chunked(parts: Iterable[bytes], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Parts gathered into chunks of at least size bytes (the last may be smaller).
+    """
+    pending = []
+    length = 0
+    for part in parts:
+        pending.append(part)
+        length += len(part)
+        if length >= size:
+            yield b''.join(pending)
+            pending = []
+            length = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def compressed(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Chunks compressed as one gzip or deflate stream; unchanged for identity.
+    """
+    if encoding == IDENTITY:
+        yield from chunks
+        return
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, WBITS[encoding])
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(view, languages: Sequence[str], subjects: Iterable[str] = None,
+                  encoding: str = IDENTITY) -> Iterator[bytes]:
+    """
+    The NDJSON export of a view as body chunks in a content coding.
+    """
+    return compressed(chunked(ndjson_lines(topic_records(view, languages, subjects))), encoding)
@@ -0,0 +1,1164 @@
+"""
+Request handlers shared by every HTTP function of the app.
+All handlers read one ApiView per catalog snapshot: a single language
+negotiator (and its cache), the subject alias indexes and every
+pre-serialized subjects/topics answer. The router function and the
+get_subjects/get_topics compatibility functions all dispatch through
+handle(), which owns request logging, timing and the 500 error response.
+"""
+import azure.functions as func
+import functools
+import json
+import math
+import random
+
+from shared_code import cors, log, search, student_access
+from shared_code.catalog import CATALOG, CatalogSnapshot
+from shared_code.negotiation import LanguageNegotiator, choose_encoding
+from shared_code.responses import (CACHE_CONTROL, CORS_HEADERS, JSON_MIMETYPE, CachedResponse, StreamingResponse,
+                                   build_body_response, build_json_response)
+from shared_code.subject_index import SubjectIndex, normalize_name
+from shared_code.timing import StageTimer
+
+# Name of the shared view in every catalog snapshot
+VIEW_NAME = "api"
+
+# Largest number of items accepted in one batch request
+MAX_BATCH_ITEMS = 100
+
+# Distinct search queries with a cached response per catalog snapshot
+SEARCH_CACHE_SIZE = 1024
+
+# Catalog versions remembered for ?since= deltas; older clients get a full list.
+# Each worker process remembers only the versions it loaded since it started
+CATALOG_HISTORY = 32
+
+# Distinct (resource, since, language, subject) deltas cached per catalog snapshot
+DELTA_CACHE_SIZE = 256
+
+# Exercises returned when 'count' is not given
+DEFAULT_EXERCISE_COUNT = 10
+
+# Largest number of answers checked in one request
+MAX_CHECK_ITEMS = 10000
+
+# Largest number of practice attempts recorded in one request
+MAX_PROGRESS_ITEMS = 10000
+
+# Largest number of mastered topics sent for recommendations
+MAX_MASTERED_ITEMS = 10000
+
+# Distinct (mastered topics, language, subject) recommendations cached per catalog snapshot
+NEXT_TOPICS_CACHE_SIZE = 1024
+
+MISSING_QUERY_RESPONSE = build_json_response({
+    "error": "Query parameter is required",
+    "message": "Please provide the search text in the 'q' query parameter"
+}, status_code=400)
+
+INVALID_SINCE_RESPONSE = build_json_response({
+    "error": "Invalid catalog version",
+    "message": "'since' must be a catalog version number (0 for everything)"
+}, status_code=400)
+
+MISSING_TOPIC_RESPONSE = build_json_response({
+    "error": "Topic parameter is required",
+    "message": "Please provide the exercise topic (name or kind) in the 'topic' query parameter"
+}, status_code=400)
+
+INVALID_EXERCISE_PARAMS_RESPONSE = build_json_response({
+    "error": "Invalid exercise parameters",
+    "message": "'difficulty' must be 1, 2 or 3, 'count' a positive integer and 'seed' a non-negative integer"
+}, status_code=400)
+
+INVALID_CHECK_REQUEST_RESPONSE = build_json_response({
+    "error": "Invalid answers",
+    "message": f"Body must be a JSON object with 'answers': at most {MAX_CHECK_ITEMS} objects with 'id' and "
+               "'answer', or plain answers to exercises 0, 1, ... of the 'topic', 'difficulty' and 'seed' given"
+}, status_code=400)
+
+MISSING_STUDENT_RESPONSE = build_json_response({
+    "error": "Student parameter is required",
+    "message": "Please provide the student id in the 'student' query parameter or request body"
+}, status_code=400)
+
+STUDENT_FORBIDDEN_RESPONSE = build_json_response({
+    "error": "Not allowed",
+    "message": "A student's progress is only available to that signed-in student or to trusted back ends"
+}, status_code=403)
+
+INVALID_PROGRESS_REQUEST_RESPONSE = build_json_response({
+    "error": "Invalid attempts",
+    "message": f"Body must be a JSON object with 'student' and 'attempts': at most {MAX_PROGRESS_ITEMS} "
+               "objects with a catalog topic 'id' and 'correct' (true or false)"
+}, status_code=400)
+
+INVALID_MASTERED_RESPONSE = build_json_response({
+    "error": "Invalid mastered topics",
+    "message": f"'mastered' must list at most {MAX_MASTERED_ITEMS} catalog topic ids (comma-separated in the "
+               "query string or a JSON list in the body), and 'student' must be a student id"
+}, status_code=400)
+
+INVALID_EXPORT_LANGUAGE_RESPONSE = build_json_response({
+    "error": "Invalid export request",
+    "message": "'lang' must list catalog languages separated by commas"
+}, status_code=400)
+
+INVALID_BATCH_RESPONSE = build_json_response({
+    "error": "Invalid batch request",
+    "message": f"'requests' must be a list of at most {MAX_BATCH_ITEMS} objects with 'subject' and optional 'lang'"
+}, status_code=400)
+
+
+def _join_batch_items(items) -> bytes:
+    return b'{"results":[' + b','.join(items) + b']}'
+
+
+class ApiView:
+    """
+    Lookup tables for one catalog snapshot, built before it is published:
+    language negotiation, subject alias indexes and pre-serialized responses
+    for every language, (language, subject) pair, batch item and
+    whole-catalog answer, the topic search index, updated from the
+    previous snapshot's view when there is one, the exercise topics, the
+    topics by stable id and their prerequisites, and the subjects and
+    topics of recent catalog versions for ?since= deltas.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, previous: 'ApiView' = None):
+        self.version = snapshot.version
+        self.default_lang = snapshot.default_language
+        self.languages = snapshot.languages
+        self.subject_list = ", ".join(snapshot.subject_ids)
+
+        # Accept-Language negotiation with a per-header-value LRU cache
+        self.negotiator = LanguageNegotiator(snapshot.languages, snapshot.default_language)
+
+        # Normalized alias index per language for constant-time subject resolution
+        self.subject_indexes = {
+            lang: SubjectIndex(mapping)
+            for lang, mapping in snapshot.subject_mapping.items()
+        }
+
+        # Pre-serialized subject lists per language
+        self.subject_responses = {
+            lang: build_json_response(subjects, language=lang, cache_version=snapshot.version,
+                                      shared_name=("subjects", lang), shared_bodies=snapshot.shared_bodies)
+            for lang, subjects in snapshot.subjects.items()
+        }
+
+        self.missing_subject_response = build_json_response({
+            "error": "Subject parameter is required",
+            "message": f"Please provide 'subject' parameter ({' or '.join(snapshot.subject_ids)}) via query string or request body"
+        }, status_code=400)
+
+        # Pre-serialized responses and batch items for every (language, subject) pair;
+        # the topic lists themselves are not kept
+        topics_by_lang = snapshot.topics
+        self.topic_responses = {}
+        self.batch_items = {}
+        for lang, topics_by_subject in topics_by_lang.items():
+            for subject, topics in topics_by_subject.items():
+                self.topic_responses[(lang, subject)] = build_json_response(
+                    topics, language=lang, cache_version=snapshot.version, shared_name=("topics", lang, subject),
+                    shared_bodies=snapshot.shared_bodies
+                )
+                item = {"subject": subject, "lang": lang, "status": 200, "topics": topics}
+                self.batch_items[(lang, subject)] = json.dumps(item, ensure_ascii=False).encode('utf-8')
+
+        # Whole-catalog (subjects=*) responses per language
+        self.catalog_responses = {
+            lang: build_body_response(
+                _join_batch_items([self.batch_items[(lang, subject)] for subject in topics_by_subject]),
+                language=lang,
+                cache_version=snapshot.version,
+                shared_name=("catalog", lang),
+                shared_bodies=snapshot.shared_bodies
+            )
+            for lang, topics_by_subject in topics_by_lang.items()
+        }
+
+        # Full-text topic search; repeated (autocomplete) queries hit the LRU cache
+        self.search_index = search.build_index(snapshot, previous.search_index if previous else None)
+        self.search_response = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search_response)
+
+        # Topics with generated exercises, by kind and normalized name in every language,
+        # and the topic id of every kind (for progress)
+        self.exercise_topics = {}
+        self.exercise_topic_ids = {}
+        for topic, kind in snapshot.exercises.items():
+            names = snapshot.topic_entries[topic][1]
+            for key in (kind, *names.values()):
+                self.exercise_topics[normalize_name(key)] = (kind, names)
+            self.exercise_topic_ids.setdefault(kind, topic)
+
+        # (subject id, names) by stable topic id, and the topics each one unlocks
+        self.subject_names = snapshot.subject_names
+        self.topic_entries = snapshot.topic_entries
+        self.prerequisites = snapshot.prerequisites
+        self.next_topics_response = functools.lru_cache(maxsize=NEXT_TOPICS_CACHE_SIZE)(self._next_topics_response)
+        self.exercise_kinds = ", ".join(sorted({kind for kind, _ in self.exercise_topics.values()}))
+
+        # Subjects and topics by stable id of the last CATALOG_HISTORY versions
+        self.history = dict(previous.history) if previous else {}
+        self.history[snapshot.version] = (snapshot.subject_names, snapshot.topic_entries)
+        for version in sorted(self.history)[:-CATALOG_HISTORY]:
+            del self.history[version]
+        self.delta_response = functools.lru_cache(maxsize=DELTA_CACHE_SIZE)(self._delta_response)
+
+    def cached_responses(self) -> list:
+        """
+        Every prebuilt catalog answer, for the precompiled snapshot and the
+        shared catalog store.
+        """
+        return [*self.subject_responses.values(), *self.topic_responses.values(),
+                *self.catalog_responses.values()]
+
+    def subject_index(self, language: str) -> SubjectIndex:
+        return self.subject_indexes.get(language, self.subject_indexes[self.default_lang])
+
+    def _search_response(self, query: str, lang: str, limit: int) -> CachedResponse:
+        results = [
+            {
+                "subject": entry.subject,
+                "subject_name": entry.subject_name,
+                "lang": entry.lang,
+                "topic": entry.topic,
+                "score": score
+            }
+            for entry, score in self.search_index.search(query, limit, lang)
+        ]
+        return build_json_response({"query": query, "results": results}, precompress=False)
+
+    def _next_topics_response(self, mastered: int, lang: str, subject: str = None) -> CachedResponse:
+        """
+        Topics unlocked by a bitset of mastered topics, in curriculum order,
+        optionally of one subject.
+        """
+        graph = self.prerequisites
+        topics = []
+        for i in graph.unlocked(mastered):
+            topic = graph.order[i]
+            owner, names = self.topic_entries[topic]
+            if subject is None or owner == subject:
+                topics.append({"id": topic, "subject": owner, "name": names[lang],
+                               "requires": list(graph.requires[i])})
+        return build_json_response({
+            "lang": lang,
+            "mastered": bin(mastered).count('1'),
+            "next": topics
+        }, language=lang, precompress=False, cache_version=self.version)
+
+    def _delta_response(self, resource: str, since: int, lang: str, subject: str = None) -> CachedResponse:
+        """
+        Subjects or topics (of one subject or all) added, renamed in lang or
+        removed since a catalog version. A version that is no longer (or
+        never was) known gets everything as added with "full": true, so the
+        client replaces its copy; since=0 asks for that on purpose.
+        Deltas come from the versions this worker process loaded (history),
+        not from the catalog document: after a redeploy or a cold start, or
+        from another instance, a client's version is unknown and it gets a
+        full list once.
+        """
+        known = self.history.get(since)
+        subjects, topics = self.history[self.version]
+        old_subjects, old_topics = known or ({}, {})
+        if resource == "subjects":
+            current = {key: (names[lang],) for key, names in subjects.items()}
+            old = {key: (names.get(lang),) for key, names in old_subjects.items()}
+        else:
+            current = {
+                key: (owner, names[lang]) for key, (owner, names) in topics.items()
+                if subject is None or owner == subject
+            }
+            old = {
+                key: (owner, names.get(lang)) for key, (owner, names) in old_topics.items()
+                if subject is None or owner == subject
+            }
+        fields = ("name",) if resource == "subjects" else ("subject", "name")
+        added = []
+        changed = []
+        for key, values in current.items():
+            if old.get(key) != values:
+                item = {"id": key, **dict(zip(fields, values))}
+                (changed if key in old else added).append(item)
+        removed = [key for key in old if key not in current]
+        return build_json_response({
+            "version": self.version,
+            "since": since,
+            "full": known is None,
+            "added": added,
+            "changed": changed,
+            "removed": removed
+        }, language=lang, precompress=False, cache_version=self.version)
+
+
+CATALOG.register_view(VIEW_NAME, ApiView, incremental=True)
+
+
+def current_view() -> ApiView:
+    return CATALOG.current().views[VIEW_NAME]
+
+
+def get_language_from_request(req: func.HttpRequest, view: ApiView) -> str:
+    """
+    Extract language from request.
+    Checks query parameter 'lang' or 'language', then Accept-Language header
+    (honoring q-values and region fallbacks such as 'en-GB' -> 'en').
+    Returns the catalog default (Russian) if no valid language found in request.
+    """
+    return view.negotiator.from_request(req)
+
+
+def get_json_body(req: func.HttpRequest) -> dict:
+    """
+    Parse the request body once; returns None unless it is a JSON object.
+    Empty bodies are skipped without raising and catching a decode error.
+    """
+    if not req.get_body():
+        return None
+    try:
+        body = req.get_json()
+    except ValueError:
+        # Not JSON
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def get_subject_names_from_request(req: func.HttpRequest, body: dict) -> list:
+    """
+    Collect subject names as sent by the client.
+    Checks query parameter, then request body (JSON), then route parameter.
+    """
+    names = []
+
+    # Check query parameter
+    subject = req.params.get('subject')
+    if subject and subject.strip():
+        names.append(subject)
+
+    # Check request body (for POST requests)
+    if body and isinstance(body.get('subject'), str) and body['subject'].strip():
+        names.append(body['subject'])
+
+    # Check route parameter (/api/topics/{subject})
+    subject = req.route_params.get('subject')
+    if isinstance(subject, str) and subject.strip():
+        names.append(subject)
+
+    return names
+
+
+def get_subject_from_request(req: func.HttpRequest, body: dict, language: str, view: ApiView) -> str:
+    """
+    Extract subject from request.
+    Names are matched exactly or by their normalized, case-insensitive form.
+    Returns None if subject not found.
+    """
+    index = view.subject_index(language)
+    for name in get_subject_names_from_request(req, body):
+        subject = index.resolve(name)
+        if subject:
+            return subject
+    return None
+
+
+def _unknown_subject_error(name: str, language: str, view: ApiView) -> dict:
+    """
+    Error payload for an unknown subject, with a "did you mean" suggestion
+    when one is close enough.
+    """
+    index = view.subject_index(language)
+    name = name.strip()[:100]
+    error_response = {
+        "error": "Subject not found",
+        "message": f"Topics not available for subject: {name}. Available subjects: {view.subject_list}"
+    }
+    match = index.suggest(name)
+    if match:
+        alias, subject = match
+        error_response["message"] = f"Topics not available for subject: {name}. Did you mean: {alias}?"
+        error_response["suggestion"] = alias
+        error_response["subject"] = subject
+    return error_response
+
+
+def build_unknown_subject_response(req: func.HttpRequest, body: dict, language: str,
+                                   view: ApiView) -> CachedResponse:
+    """
+    Error response for a missing (400) or unknown (404) subject.
+    """
+    names = get_subject_names_from_request(req, body)
+    if not names:
+        return view.missing_subject_response
+
+    error_response = _unknown_subject_error(names[0], language, view)
+    return build_json_response(error_response, status_code=404, precompress=False)
+
+
+def get_batch_from_request(req: func.HttpRequest, body: dict, language: str, view: ApiView) -> list:
+    """
+    Extract a batch of (subject name, language) items from request.
+    Checks query parameter 'subjects' ('*' or a comma-separated list), then
+    a JSON body {"requests": [{"subject": ..., "lang": ...}, ...]}.
+    Items without a valid 'lang' use the request language.
+    Returns '*' for the whole catalog, None if the request is not a batch request.
+    Raises ValueError for a malformed batch.
+    """
+    # Check query parameter
+    subjects = req.params.get('subjects')
+    if subjects:
+        if subjects.strip() == '*':
+            return '*'
+        names = [name for name in subjects.split(',') if name.strip()]
+        if len(names) > MAX_BATCH_ITEMS:
+            raise ValueError('Too many batch items')
+        return [(name, language) for name in names]
+
+    # Check request body (for POST requests)
+    if not body or 'requests' not in body:
+        return None
+
+    items = body['requests']
+    if not isinstance(items, list) or len(items) > MAX_BATCH_ITEMS:
+        raise ValueError('Batch requests must be a bounded list')
+    batch = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Batch items must be objects')
+        lang = view.negotiator.resolve_param(item.get('lang') or item.get('language'))
+        batch.append((item.get('subject'), lang or language))
+    return batch
+
+
+def build_batch_response(batch: list, view: ApiView) -> CachedResponse:
+    """
+    Combine pre-serialized items into one response; each item has its own status.
+    """
+    items = []
+    for name, language in batch:
+        subject = None
+        if isinstance(name, str) and name.strip():
+            subject = view.subject_index(language).resolve(name)
+        if subject:
+            items.append(view.batch_items[(language, subject)])
+            continue
+        if isinstance(name, str) and name.strip():
+            item = {"subject": name.strip()[:100], "lang": language, "status": 404}
+            item.update(_unknown_subject_error(name, language, view))
+        else:
+            item = {"subject": None, "lang": language, "status": 400}
+            item.update(json.loads(bytes(view.missing_subject_response.body)))
+        items.append(json.dumps(item, ensure_ascii=False).encode('utf-8'))
+    return build_body_response(_join_batch_items(items), precompress=False)
+
+
+def build_delta_response(since: str, resource: str, language: str, subject: str,
+                         view: ApiView) -> CachedResponse:
+    """
+    Cached ?since= delta of a resource, or 400 for a malformed version.
+    A client at or past the served version gets an empty delta since it.
+    """
+    try:
+        version = int(since)
+    except ValueError:
+        return INVALID_SINCE_RESPONSE
+    if version < 0:
+        return INVALID_SINCE_RESPONSE
+    return view.delta_response(resource, min(version, view.version), language, subject)
+
+
+def handle_subjects(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                    logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Localized list of subjects for the request language, or the subject
+    changes since a catalog version (?since=).
+    """
+    # Get language from request, default to Russian
+    language = get_language_from_request(req, view)
+    logger.debug('language_selected', language=language)
+    timer.mark('lang')
+
+    since = req.params.get('since')
+    if since is not None:
+        # Changes since the client's catalog version
+        response = build_delta_response(since, "subjects", language, None, view)
+        logger.info('delta_returned', since=since, language=language, status=response.status_code)
+    else:
+        # Look up the pre-serialized response (UTF-8 body with CORS headers)
+        response = view.subject_responses.get(language, view.subject_responses[view.default_lang])
+        logger.info('subjects_returned', language=language, status=response.status_code)
+    timer.mark('serialize')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def handle_topics(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                  logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Topics for one subject, a batch of subjects or the whole catalog, the
+    topic changes since a catalog version (?since=), or the NDJSON export
+    of the catalog (?format=ndjson).
+    """
+    if req.params.get('format') == 'ndjson':
+        return handle_export(req, view, timer, logger)
+
+    # Get language from request, default to Russian
+    language = get_language_from_request(req, view)
+    logger.debug('language_selected', language=language)
+    timer.mark('lang')
+
+    body = get_json_body(req)
+
+    since = req.params.get('since')
+    if since is not None:
+        # Changes since the client's catalog version, of one subject or all
+        names = get_subject_names_from_request(req, body)
+        subject = get_subject_from_request(req, body, language, view) if names else None
+        timer.mark('subject')
+        if names and not subject:
+            response = build_unknown_subject_response(req, body, language, view)
+        else:
+            response = build_delta_response(since, "topics", language, subject, view)
+            logger.info('delta_returned', since=since, language=language, status=response.status_code)
+    else:
+        # Batch of subjects and languages in one round-trip
+        try:
+            batch = get_batch_from_request(req, body, language, view)
+        except ValueError:
+            response = INVALID_BATCH_RESPONSE
+        else:
+            if batch == '*':
+                logger.info('catalog_returned', language=language)
+                response = view.catalog_responses[language]
+            elif batch is not None:
+                logger.info('batch_returned', language=language, items=len(batch))
+                timer.mark('subject')
+                response = build_batch_response(batch, view)
+            else:
+                # Get subject from request
+                subject = get_subject_from_request(req, body, language, view)
+                timer.mark('subject')
+
+                if not subject:
+                    response = build_unknown_subject_response(req, body, language, view)
+                else:
+                    # Look up the pre-serialized topics for the subject and language
+                    response = view.topic_responses[(language, subject)]
+                    logger.info('topics_returned', subject=subject, language=language)
+    timer.mark('serialize')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def get_export_languages(req: func.HttpRequest, view: ApiView) -> tuple:
+    """
+    Languages of an export: the comma-separated 'lang' parameter, or every
+    catalog language. Raises ValueError for a language not in the catalog.
+    """
+    lang = req.params.get('lang')
+    if not lang:
+        return view.languages
+    languages = tuple(dict.fromkeys(item.strip() for item in lang.split(',')))
+    if not all(language in view.languages for language in languages):
+        raise ValueError('Unknown language')
+    return languages
+
+
+def handle_export(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                  logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    The whole catalog as NDJSON, one line per topic and language, streamed
+    chunk by chunk; optionally only in some languages (?lang=en,ru) or of
+    some subjects (?subject=Math,English, in any catalog language).
+    """
+    # Not needed on the catalog fast path, so not imported at startup
+    from shared_code import export
+
+    try:
+        languages = get_export_languages(req, view)
+    except ValueError:
+        return INVALID_EXPORT_LANGUAGE_RESPONSE.to_http_response(req)
+
+    subjects = None
+    names = [name for names in get_subject_names_from_request(req, get_json_body(req))
+             for name in names.split(',') if name.strip()]
+    if names:
+        index = view.subject_index(view.default_lang)
+        subjects = []
+        for name in names:
+            subject = index.resolve(name)
+            if not subject:
+                error_response = _unknown_subject_error(name, view.default_lang, view)
+                return build_json_response(error_response, status_code=404, precompress=False).to_http_response(req)
+            subjects.append(subject)
+    timer.mark('subject')
+
+    encoding = choose_encoding(req.headers.get('Accept-Encoding', ''))
+    headers = dict(CORS_HEADERS)
+    headers["Cache-Control"] = CACHE_CONTROL
+    headers["Vary"] = "Accept-Encoding"
+    if encoding != export.IDENTITY:
+        headers["Content-Encoding"] = encoding
+    if not cors.ALLOW_ALL:
+        headers["Vary"] = "Origin, Accept-Encoding"
+        allowed = cors.allowed_origin(req.headers.get('Origin'))
+        if allowed:
+            headers["Access-Control-Allow-Origin"] = allowed
+    logger.info('catalog_exported', languages=len(languages), subjects=len(subjects) if subjects else None,
+                encoding=encoding)
+    return StreamingResponse(
+        export.export_chunks(view, languages, subjects, encoding),
+        mimetype=export.NDJSON_MIMETYPE,
+        status_code=200,
+        headers=headers
+    )
+
+
+def get_search_limit(req: func.HttpRequest) -> int:
+    """
+    Number of results from the 'limit' query parameter, within 1..MAX_LIMIT.
+    """
+    try:
+        return min(search.MAX_LIMIT, max(1, int(req.params.get('limit', search.DEFAULT_LIMIT))))
+    except (TypeError, ValueError):
+        return search.DEFAULT_LIMIT
+
+
+def handle_search(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                  logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Ranked topics of all subjects matching 'q'; the last word also matches as
+    a prefix (autocomplete). Searches every locale unless 'lang' is given.
+    """
+    query = ' '.join(req.params.get('q', '').split())[:search.MAX_QUERY_LENGTH]
+    if not query:
+        return MISSING_QUERY_RESPONSE.to_http_response(req)
+
+    lang = view.negotiator.resolve_param(req.params.get('lang') or req.params.get('language'))
+    timer.mark('lang')
+
+    response = view.search_response(query, lang, get_search_limit(req))
+    logger.info('search_returned', language=lang)
+    timer.mark('search')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def get_exercise_params(req: func.HttpRequest) -> tuple:
+    """
+    (difficulty, count, seed) from the query parameters; a missing seed is
+    drawn at random. Raises ValueError for values out of range.
+    """
+    from shared_code import exercises
+
+    difficulty = int(req.params.get('difficulty', exercises.DIFFICULTIES[0]))
+    count = int(req.params.get('count', DEFAULT_EXERCISE_COUNT))
+    seed = req.params.get('seed')
+    seed = random.randrange(2 ** 32) if seed is None else int(seed)
+    if (difficulty not in exercises.DIFFICULTIES or not 1 <= count <= exercises.MAX_COUNT
+            or not 0 <= seed <= exercises.MAX_SEED):
+        raise ValueError('Exercise parameters out of range')
+    return difficulty, count, seed
+
+
+def handle_exercises(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                     logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Generated practice problems with answers for a Math topic. The same
+    topic, difficulty, seed and count always give the same problems; the
+    seed is returned so a random set can be requested again.
+    """
+    # NumPy is loaded by the first exercise request, not at startup
+    from shared_code import exercises
+
+    # Get language from request, default to Russian
+    language = get_language_from_request(req, view)
+    if language not in exercises.LANGUAGES:
+        language = exercises.LANGUAGES[0]
+    timer.mark('lang')
+
+    name = req.params.get('topic')
+    if not name or not name.strip():
+        return MISSING_TOPIC_RESPONSE.to_http_response(req)
+    topic = view.exercise_topics.get(normalize_name(name))
+    if topic is None:
+        return build_json_response({
+            "error": "Topic not found",
+            "message": f"No exercises for topic: {name.strip()[:100]}. Available topics: {view.exercise_kinds}"
+        }, status_code=404, precompress=False).to_http_response(req)
+    kind, names = topic
+    try:
+        difficulty, count, seed = get_exercise_params(req)
+    except ValueError:
+        return INVALID_EXERCISE_PARAMS_RESPONSE.to_http_response(req)
+
+    items = exercises.render(kind, difficulty, seed, count, language)
+    logger.info('exercises_returned', kind=kind, language=language, count=count)
+    timer.mark('generate')
+
+    header = json.dumps({
+        "topic": names[language],
+        "kind": kind,
+        "difficulty": difficulty,
+        "seed": seed,
+        "lang": language
+    }, ensure_ascii=False).encode('utf-8')
+    response = build_body_response(header[:-1] + b',"exercises":[' + items + b']}',
+                                   language=language, precompress=False)
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def get_answers_from_request(body: dict, view: ApiView) -> tuple:
+    """
+    (exercise ids, answers) of a check request. Items are {"id": ..., "answer": ...}
+    objects, or plain answers numbered from 0 when the body gives 'topic',
+    'seed' and optional 'difficulty' of a generated set.
+    Raises ValueError for a malformed request.
+    """
+    from shared_code import exercises
+
+    items = body.get('answers') if body else None
+    if not isinstance(items, list) or len(items) > MAX_CHECK_ITEMS:
+        raise ValueError('Answers must be a bounded list')
+
+    prefix = None
+    if body.get('topic') is not None or body.get('seed') is not None:
+        topic = view.exercise_topics.get(normalize_name(str(body.get('topic', ''))))
+        seed = body.get('seed')
+        difficulty = body.get('difficulty', exercises.DIFFICULTIES[0])
+        if topic is None or type(seed) is not int or type(difficulty) is not int:
+            raise ValueError('Unknown topic or invalid seed')
+        prefix = exercises.exercise_id(topic[0], difficulty, seed, '')
+
+    ids = []
+    answers = []
+    for position, item in enumerate(items):
+        if isinstance(item, dict):
+            ids.append(item.get('id'))
+            answers.append(item.get('answer'))
+        elif prefix is not None:
+            ids.append(f'{prefix}{position}')
+            answers.append(item)
+        else:
+            raise ValueError('Answers without ids need a topic and seed')
+    return ids, answers
+
+
+def handle_check_answers(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                         logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Grade a worksheet of answers to generated exercises in one request:
+    correctness and expected answer per item, plus totals overall and per
+    exercise kind. Numbers may be sent as JSON numbers or as text such as
+    '1 000', '2,5' or '3/4'. With a 'student' in the body, every graded
+    answer is recorded as practice of its topic.
+    """
+    # NumPy is loaded by the first exercise request, not at startup
+    from shared_code import exercises
+
+    body = get_json_body(req)
+    try:
+        ids, answers = get_answers_from_request(body, view)
+        student = get_student(req, body.get('student')) if 'student' in body else None
+    except PermissionError:
+        return STUDENT_FORBIDDEN_RESPONSE.to_http_response(req)
+    except ValueError:
+        return INVALID_CHECK_REQUEST_RESPONSE.to_http_response(req)
+    timer.mark('parse')
+
+    correct, expected = exercises.check(ids, answers)
+    timer.mark('check')
+
+    # Malformed ids have no expected answer (NaN)
+    results = [
+        {"id": value, "correct": is_correct, "expected": None if math.isnan(answer) else int(answer)}
+        for value, is_correct, answer in zip(ids, correct.tolist(), expected.tolist())
+    ]
+    total = len(results)
+    right = int(correct.sum())
+    payload = {
+        "total": total,
+        "correct": right,
+        "invalid": sum(1 for result in results if result["expected"] is None),
+        "score": round(right / total, 4) if total else 0.0,
+        "kinds": exercises.score_summary(ids, correct, expected),
+        "results": results
+    }
+    if student is not None:
+        from shared_code import progress
+
+        topic_ids = view.exercise_topic_ids
+        payload["recorded"] = progress.STORE.record(student, [
+            (topic_ids[result["id"].split('.', 1)[0]], result["correct"])
+            for result in results
+            if result["expected"] is not None and result["id"].split('.', 1)[0] in topic_ids
+        ])
+        timer.mark('record')
+    response = build_json_response(payload, precompress=False)
+    logger.info('answers_checked', total=total, correct=right)
+    timer.mark('serialize')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def get_student(req: func.HttpRequest, value) -> str:
+    """
+    Student a request acts for (see shared_code/student_access.py): the
+    signed-in user, or the id a trusted back end sent as value (stripped).
+    Raises ValueError unless the id is a non-empty string of at most
+    progress.MAX_STUDENT_LENGTH characters, and PermissionError if the
+    request may not act for that student.
+    """
+    from shared_code.progress import MAX_STUDENT_LENGTH
+
+    if value is not None:
+        value = value.strip() if isinstance(value, str) else ''
+        if not value or len(value) > MAX_STUDENT_LENGTH:
+            raise ValueError('Invalid student id')
+    student = student_access.authorize(req, value)
+    if len(student) > MAX_STUDENT_LENGTH:
+        raise ValueError('Invalid student id')
+    return student
+
+
+def get_attempts_from_request(body: dict, view: ApiView) -> list:
+    """
+    (topic id, correct) pairs of a progress request, in order. Raises
+    ValueError for a malformed request or a topic id not in the catalog.
+    """
+    items = body.get('attempts') if body else None
+    if not isinstance(items, list) or len(items) > MAX_PROGRESS_ITEMS:
+        raise ValueError('Attempts must be a bounded list')
+    attempts = []
+    for item in items:
+        if (not isinstance(item, dict) or not isinstance(item.get('id'), str)
+                or item['id'] not in view.topic_entries or not isinstance(item.get('correct'), bool)):
+            raise ValueError('Invalid attempt')
+        attempts.append((item['id'], item['correct']))
+    return attempts
+
+
+def handle_progress(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                    logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    A student's practice progress by catalog topic id. GET returns
+    attempts, correct answers and mastery per practiced topic, with the
+    topic's subject and name in the negotiated language. POST records
+    attempts (written to the database in the background) and answers 202.
+    Only the signed-in student or a trusted back end gets an answer (see
+    shared_code/student_access.py); anyone else gets 403.
+    """
+    # The database is opened by the first progress request, not at startup
+    from shared_code import progress
+
+    if req.method == 'POST':
+        body = get_json_body(req)
+        try:
+            student = get_student(req, body.get('student') if body else None)
+            attempts = get_attempts_from_request(body, view)
+        except PermissionError:
+            return STUDENT_FORBIDDEN_RESPONSE.to_http_response(req)
+        except ValueError:
+            return INVALID_PROGRESS_REQUEST_RESPONSE.to_http_response(req)
+        timer.mark('parse')
+        recorded = progress.STORE.record(student, attempts)
+        logger.info('progress_recorded', attempts=recorded)
+        timer.mark('record')
+        return build_json_response({"student": student, "recorded": recorded},
+                                   status_code=202, precompress=False).to_http_response(req)
+
+    try:
+        student = get_student(req, req.params.get('student'))
+    except PermissionError:
+        return STUDENT_FORBIDDEN_RESPONSE.to_http_response(req)
+    except ValueError:
+        return MISSING_STUDENT_RESPONSE.to_http_response(req)
+    language = get_language_from_request(req, view)
+    timer.mark('lang')
+
+    summaries = progress.STORE.summary(student)
+    timer.mark('load')
+    topics = []
+    for topic, summary in summaries.items():
+        # Topics removed from the catalog are left out
+        entry = view.topic_entries.get(topic)
+        if entry is not None:
+            subject, names = entry
+            topics.append({**summary, "subject": subject, "name": names.get(language)})
+    topics.sort(key=lambda item: item["topic"])
+    response = build_json_response({
+        "student": student,
+        "lang": language,
+        "mastered": sum(1 for item in topics if item["mastered"]),
+        "topics": topics
+    }, language=language, precompress=False)
+    timer.mark('serialize')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def get_mastered_from_request(req: func.HttpRequest, body: dict) -> tuple:
+    """
+    (mastered topic ids, student id or None) of a recommendation request:
+    'mastered' as a comma-separated query parameter or a JSON list in the
+    body, and 'student' from either. Raises ValueError for malformed values
+    and PermissionError for a student the request may not act for.
+    """
+    mastered = []
+    value = req.params.get('mastered')
+    if value:
+        mastered.extend(item.strip() for item in value.split(',') if item.strip())
+    if body and body.get('mastered') is not None:
+        if not isinstance(body['mastered'], list) or not all(isinstance(item, str) for item in body['mastered']):
+            raise ValueError('Mastered topics must be a list of ids')
+        mastered.extend(body['mastered'])
+    if len(mastered) > MAX_MASTERED_ITEMS:
+        raise ValueError('Too many mastered topics')
+    student = req.params.get('student')
+    if student is None and body:
+        student = body.get('student')
+    return mastered, None if student is None else get_student(req, student)
+
+
+def handle_next_topics(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                       logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Topics a student can take up next: those not yet mastered (nor built on
+    by a mastered topic) whose prerequisites are all covered. Mastered
+    topics are sent as ids, taken from the student's progress, or both;
+    'subject' restricts the answer to one subject.
+    """
+    body = get_json_body(req)
+    language = get_language_from_request(req, view)
+    timer.mark('lang')
+    try:
+        mastered, student = get_mastered_from_request(req, body)
+        mask = view.prerequisites.mask(mastered)
+    except PermissionError:
+        return STUDENT_FORBIDDEN_RESPONSE.to_http_response(req)
+    except (ValueError, KeyError):
+        return INVALID_MASTERED_RESPONSE.to_http_response(req)
+
+    subject = None
+    if get_subject_names_from_request(req, body):
+        subject = get_subject_from_request(req, body, language, view)
+        if subject is None:
+            return build_unknown_subject_response(req, body, language, view).to_http_response(req)
+    timer.mark('parse')
+
+    if student is not None:
+        # The database is opened by the first progress request, not at startup
+        from shared_code import progress
+
+        index = view.prerequisites.index
+        mask |= view.prerequisites.mask(
+            topic for topic, summary in progress.STORE.summary(student).items()
+            if summary["mastered"] and topic in index
+        )
+        timer.mark('progress')
+
+    response = view.next_topics_response(mask, language, subject)
+    logger.info('next_topics_returned', language=language)
+    timer.mark('recommend')
+
+    http_response = response.to_http_response(req)
+    timer.mark('response')
+    return http_response
+
+
+def handle_metrics(req: func.HttpRequest, view: ApiView, timer: StageTimer,
+                   logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    In-process request metrics: Prometheus text, or JSON with ?format=json.
+    """
+    # Not needed on the catalog fast path, so not imported at startup
+    from shared_code import metrics
+
+    if req.params.get('format') == 'json':
+        return func.HttpResponse(metrics.render_json(), mimetype=JSON_MIMETYPE, status_code=200)
+    return func.HttpResponse(metrics.render_prometheus(), mimetype=metrics.PROMETHEUS_MIMETYPE, status_code=200)
+
+
+# Router resources; the get_* names keep the original function URLs working
+HANDLERS = {
+    "subjects": ("get_subjects", handle_subjects),
+    "get_subjects": ("get_subjects", handle_subjects),
+    "topics": ("get_topics", handle_topics),
+    "get_topics": ("get_topics", handle_topics),
+    "search": ("search_topics", handle_search),
+    "exercises": ("get_exercises", handle_exercises),
+    "get_exercises": ("get_exercises", handle_exercises),
+    "check_answers": ("check_answers", handle_check_answers),
+    "progress": ("progress", handle_progress),
+    "next_topics": ("get_next_topics", handle_next_topics),
+    "get_next_topics": ("get_next_topics", handle_next_topics),
+    "metrics": ("get_metrics", handle_metrics),
+    "get_metrics": ("get_metrics", handle_metrics)
+}
+
+# Handlers that may wait on the progress database (opening it, loading a
+# student, writing a full write-behind buffer); the async entry point runs them in a worker thread
+STORE_HANDLERS = frozenset({handle_progress, handle_check_answers, handle_next_topics})
+
+UNKNOWN_RESOURCE_RESPONSE = build_json_response({
+    "error": "Resource not found",
+    "message": "Available resources: subjects, topics, search, exercises, check_answers, progress, next_topics, metrics"
+}, status_code=404)
+
+
+def build_error_response(e: Exception, logger: log.StructuredLogger) -> func.HttpResponse:
+    """
+    Safe 500 response for an unexpected exception.
+    """
+    # Extract safe error message - only use string representation
+    # Avoid passing exception objects to prevent serialization issues
+    try:
+        error_message = str(e) if e else "Unknown error"
+        # Clean the error message to ensure it's JSON-safe
+        error_message = error_message.replace('\n', ' ').replace('\r', ' ')[:500]
+    except Exception:
+        error_message = "Internal server error occurred"
+
+    # Log error without exc_info to avoid serialization issues
+    try:
+        logger.error('request_failed', error=error_message)
+    except Exception:
+        pass  # Silently fail logging if it causes issues
+
+    # Create safe error response - only use string representation
+    try:
+        error_response = {
+            "error": "Internal server error",
+            "message": error_message
+        }
+        response_body = json.dumps(error_response, ensure_ascii=False)
+    except Exception:
+        # Fallback if JSON serialization fails
+        response_body = json.dumps({"error": "Internal server error"}, ensure_ascii=False)
+
+    try:
+        return func.HttpResponse(
+            response_body.encode('utf-8'),
+            mimetype=JSON_MIMETYPE,
+            status_code=500,
+            headers=CORS_HEADERS
+        )
+    except Exception:
+        # Ultimate fallback - return minimal safe response
+        return func.HttpResponse(
+            b'{"error":"Internal server error"}',
+            mimetype=JSON_MIMETYPE,
+            status_code=500
+        )
+
+
+def _handle(resource: str, req: func.HttpRequest, view: ApiView) -> func.HttpResponse:
+    """
+    Run the handler for a resource on one catalog view, with request
+    logging, stage timing and the shared 500 error response.
+    """
+    # Preflights are answered before any logging, parsing or negotiation
+    if req.method == 'OPTIONS':
+        return cors.preflight_response(req)
+
+    name, handler = HANDLERS.get(resource, (None, None))
+    logger = log.get_logger(name or "router")
+    try:
+        log.start_request(req)
+        logger.info('request_received', method=req.method, resource=resource)
+
+        if handler is None:
+            return UNKNOWN_RESOURCE_RESPONSE.to_http_response(req)
+
+        timer = StageTimer(name)
+        response = handler(req, view, timer, logger)
+        timer.finish(response)
+        return response
+
+    except Exception as e:
+        return build_error_response(e, logger)
+
+
+def handle(resource: str, req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Run the handler for a resource on the current catalog snapshot (one
+    snapshot for the whole request).
+    """
+    return _handle(resource, req, current_view())
+
+
+async def handle_async(resource: str, req: func.HttpRequest) -> func.HttpResponse:
+    """
+    handle() for async entry points, returning identical responses.
+    Every HTTP function deploys its main_async ("entryPoint" in its
+    function.json), which runs on the worker's event loop instead of its
+    thread pool; its sync main stays for callers without a loop. The
+    handlers that use the progress store (STORE_HANDLERS) run in a worker
+    thread, so the event loop keeps serving other invocations. The shared state is safe to
+    use from both: views are immutable, the negotiation caches are
+    lru_caches and compressed variants are published with dict.setdefault.
+    """
+    view = current_view()
+    if HANDLERS.get(resource, (None, None))[1] in STORE_HANDLERS:
+        # Already loaded whenever an event loop is running
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(None, _handle, resource, req, view)
+    return _handle(resource, req, view)
+
+
+def warm_up() -> int:
+    """
+    Serve every catalog answer once, in each language and encoding, without
+    recording metrics, so the first user request finds the caches filled and
+    the response code paths loaded. Returns the number of requests served.
+    """
+    view = current_view()
+    logger = log.get_logger("warmup")
+    requests = []
+    for encoding in ("", "gzip"):
+        headers = {"Accept-Encoding": encoding} if encoding else {}
+        for lang in view.subject_responses:
+            requests.append((handle_subjects, {"lang": lang}, headers))
+            requests.append((handle_topics, {"subjects": "*", "lang": lang}, headers))
+        for lang, subject in view.topic_responses:
+            requests.append((handle_topics, {"subject": subject, "lang": lang}, headers))
+    for handler, params, headers in requests:
+        req = func.HttpRequest("GET", "http://localhost/api/warmup", headers=headers, params=params, body=b"")
+        handler(req, view, StageTimer("warmup"), logger)
+
+    # Prime language negotiation for the plain language tags
+    for lang in view.subject_responses:
+        view.negotiator.negotiate(lang)
+    return len(requests)
+
+
+def _resource(req: func.HttpRequest) -> str:
+    resource = req.route_params.get('resource')
+    return resource.lower() if isinstance(resource, str) else ''
+
+
+def dispatch(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Entry point of the router: /api/{resource}/{subject?}.
+    """
+    return handle(_resource(req), req)
+
+
+async def dispatch_async(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Async entry point of the router.
+    """
+    return await handle_async(_resource(req), req)
@@ -0,0 +1,166 @@
+"""
+Structured, sampled logging facade shared by the HTTP functions.
+Records are an event name plus key/value fields; the message text is only
+built if a handler actually formats the record, so disabled or sampled-out
+calls cost a level check. Every record of a request carries its
+correlation id, and INFO/DEBUG records are sampled per request with a rate
+per logger (WARNING and above are always kept).
+
+Sampling rates are read at startup from the LOG_SAMPLING_RATES app setting,
+e.g. "get_topics=0.1,get_subjects=0.25,*=1".
+"""
+import contextvars
+import itertools
+import logging
+import os
+import random
+from typing import Dict
+
+_request_context = contextvars.ContextVar('log_request_context', default=None)
+_request_ids = itertools.count(1)
+_ID_PREFIX = f'{os.getpid():x}'
+
+# Request headers that may carry a caller-provided correlation id
+CORRELATION_HEADERS = ('x-correlation-id', 'x-request-id')
+
+
+def parse_sampling_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse "name=rate,name=rate" into {name: rate}; malformed parts are ignored.
+    """
+    rates = {}
+    for part in spec.split(','):
+        name, _, rate = part.partition('=')
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+SAMPLING_RATES = parse_sampling_rates(os.environ.get('LOG_SAMPLING_RATES', ''))
+
+
+class _RequestContext:
+    """
+    Per-request logging state; the id and the sampling draw are made lazily,
+    only when a record is about to be emitted.
+    """
+    __slots__ = ('_correlation_id', '_draw')
+
+    def __init__(self, correlation_id: str = None):
+        self._correlation_id = correlation_id
+        self._draw = None
+
+    @property
+    def correlation_id(self) -> str:
+        if self._correlation_id is None:
+            self._correlation_id = f'{_ID_PREFIX}-{next(_request_ids):x}'
+        return self._correlation_id
+
+    def draw(self) -> float:
+        if self._draw is None:
+            self._draw = random.random()
+        return self._draw
+
+
+def start_request(req) -> None:
+    """
+    Bind a correlation id for the records of this request: taken from the
+    X-Correlation-ID or X-Request-ID header, or generated on first use.
+    """
+    correlation_id = None
+    for header in CORRELATION_HEADERS:
+        correlation_id = req.headers.get(header)
+        if correlation_id:
+            correlation_id = correlation_id[:64]
+            break
+    _request_context.set(_RequestContext(correlation_id))
+
+
+def correlation_id() -> str:
+    """
+    Correlation id of the current request, or None outside a request.
+    """
+    context = _request_context.get()
+    return context.correlation_id if context is not None else None
+
+
+class _Message:
+    """
+    Log message formatted on demand as 'event key=value ...'.
+    """
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event: str, fields: dict):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self):
+        parts = [self.event]
+        parts.extend(f'{key}={value}' for key, value in self.fields.items())
+        return ' '.join(parts)
+
+
+class StructuredLogger:
+    """
+    Thin wrapper over logging.Logger taking an event name and fields.
+    Fields are also attached as record.custom_dimensions for Application Insights.
+    """
+    __slots__ = ('name', 'logger', 'sampling_rate')
+
+    def __init__(self, name: str, sampling_rate: float = 1.0):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        self.sampling_rate = sampling_rate
+
+    def _log(self, level: int, event: str, fields: dict) -> None:
+        context = _request_context.get()
+        if level < logging.WARNING and self.sampling_rate < 1.0:
+            draw = context.draw() if context is not None else random.random()
+            if draw >= self.sampling_rate:
+                return
+        if context is not None:
+            fields['correlation_id'] = context.correlation_id
+        self.logger.log(level, _Message(event, fields), extra={'custom_dimensions': fields})
+
+    def debug(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields)
+
+
+_loggers: Dict[str, StructuredLogger] = {}
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Shared StructuredLogger for name, sampled at SAMPLING_RATES[name]
+    (or the '*' rate, or 1.0).
+    """
+    logger = _loggers.get(name)
+    if logger is None:
+        rate = SAMPLING_RATES.get(name, SAMPLING_RATES.get('*', 1.0))
+        logger = _loggers.setdefault(name, StructuredLogger(name, rate))
+    return logger
+
+
+def configure_sampling(rates: Dict[str, float]) -> None:
+    """
+    Replace the sampling rates, including for loggers already created.
+    """
+    SAMPLING_RATES.clear()
+    SAMPLING_RATES.update(rates)
+    for name, logger in _loggers.items():
+        logger.sampling_rate = rates.get(name, rates.get('*', 1.0))
@@ -0,0 +1,73 @@
+"""
+In-process metrics of this worker: stage latency histograms and the
+hit/miss counters of the negotiation caches, rendered as Prometheus text
+or JSON.
+"""
+import json
+
+from shared_code.catalog import CATALOG
+from shared_code.timing import BUCKETS_US, HISTOGRAMS
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_cache_stats() -> list:
+    """
+    Hit/miss counters of the negotiation caches of every catalog view.
+    """
+    stats = []
+    for name, view in CATALOG.current().views.items():
+        negotiator = getattr(view, 'negotiator', None)
+        if negotiator is not None:
+            info = negotiator.cache_info()
+            stats.append({"function": name, "cache": "accept_language", "hits": info.hits, "misses": info.misses})
+    return stats
+
+
+def render_json() -> str:
+    """
+    Recent percentiles and cumulative counts per (function, stage).
+    """
+    stages = []
+    for histogram in list(HISTOGRAMS.values()):
+        stages.append({
+            "function": histogram.function,
+            "stage": histogram.stage,
+            "count": histogram.count,
+            "sum_us": round(histogram.sum_us, 1),
+            "recent_p50_us": histogram.recent_percentile(0.50),
+            "recent_p95_us": histogram.recent_percentile(0.95),
+            "recent_p99_us": histogram.recent_percentile(0.99)
+        })
+    return json.dumps({
+        "catalog_version": CATALOG.current().version,
+        "stages": stages,
+        "caches": collect_cache_stats()
+    })
+
+
+def render_prometheus() -> str:
+    """
+    Prometheus text exposition of the stage histograms and cache counters.
+    """
+    lines = [
+        "# HELP tutorai_stage_duration_seconds Time spent in each request stage.",
+        "# TYPE tutorai_stage_duration_seconds histogram"
+    ]
+    bounds = [f"{bound / 1e6:g}" for bound in BUCKETS_US] + ["+Inf"]
+    for histogram in list(HISTOGRAMS.values()):
+        labels = f'function="{histogram.function}",stage="{histogram.stage}"'
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, list(histogram.counts)):
+            cumulative += bucket_count
+            lines.append(f'tutorai_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'tutorai_stage_duration_seconds_sum{{{labels}}} {histogram.sum_us / 1e6:.6f}')
+        lines.append(f'tutorai_stage_duration_seconds_count{{{labels}}} {cumulative}')
+
+    lines.append("# HELP tutorai_cache_requests_total Cache lookups by result.")
+    lines.append("# TYPE tutorai_cache_requests_total counter")
+    for stats in collect_cache_stats():
+        labels = f'function="{stats["function"]}",cache="{stats["cache"]}"'
+        lines.append(f'tutorai_cache_requests_total{{{labels},result="hit"}} {stats["hits"]}')
+        lines.append(f'tutorai_cache_requests_total{{{labels},result="miss"}} {stats["misses"]}')
+    return "\n".join(lines) + "\n"
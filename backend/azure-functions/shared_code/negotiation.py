@@ -0,0 +1,160 @@
+"""
+Content negotiation shared by the HTTP functions.
+Accept-Language: parses language ranges with q-values (RFC 7231 section
+5.3.5) and picks a supported language with the RFC 4647 "lookup" scheme, so
+'en-GB' falls back to 'en' and 'en;q=0.1, ru;q=0.9' resolves to 'ru'.
+Accept-Encoding: picks gzip, deflate or identity (RFC 7231 section 5.3.4).
+"""
+import functools
+import re
+
+# Parsing cost caps: headers are truncated and only the first ranges are read
+MAX_HEADER_LENGTH = 512
+MAX_LANGUAGE_RANGES = 16
+
+# Distinct raw header values kept in the negotiation cache
+DEFAULT_CACHE_SIZE = 256
+
+_LANGUAGE_RANGE = re.compile(r'^(?:\*|[a-z]{1,8}(?:-[a-z0-9]{1,8})*)$')
+_QVALUE = re.compile(r'^q=(0(?:\.\d{0,3})?|1(?:\.0{0,3})?)$')
+_CODING = re.compile(r"^[a-z0-9!#$%&'*+.^_`|~-]+$")
+
+# Content codings the responses can be compressed with, in preference order
+SUPPORTED_ENCODINGS = ('gzip', 'deflate')
+IDENTITY = 'identity'
+
+
+def _parse_weighted(header: str, token_pattern) -> list:
+    """
+    Parse 'token;q=0.5, token' lists into (token, q) pairs, highest q first.
+    Tokens are lowercased; malformed entries are skipped.
+    Tokens with equal q keep their header order.
+    """
+    header = header[:MAX_HEADER_LENGTH]
+    ranges = []
+    for part in header.split(',', MAX_LANGUAGE_RANGES)[:MAX_LANGUAGE_RANGES]:
+        tag, _, params = part.partition(';')
+        tag = tag.strip().lower()
+        if not token_pattern.match(tag):
+            continue
+        q = 1.0
+        if params:
+            match = _QVALUE.match(params.strip().lower().replace(' ', ''))
+            if not match:
+                continue
+            q = float(match.group(1))
+        ranges.append((tag, q))
+    ranges.sort(key=lambda item: -item[1])
+    return ranges
+
+
+def parse_accept_language(header: str) -> list:
+    """
+    Parse an Accept-Language header into (range, q) pairs, highest q first.
+    """
+    return _parse_weighted(header, _LANGUAGE_RANGE)
+
+
+@functools.lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def _choose_encoding(header: str) -> str:
+    weights = {}
+    for coding, q in _parse_weighted(header, _CODING):
+        coding = 'gzip' if coding == 'x-gzip' else coding
+        weights.setdefault(coding, q)
+    best, best_q = IDENTITY, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def choose_encoding(header: str) -> str:
+    """
+    Resolve an Accept-Encoding header value to 'gzip', 'deflate' or 'identity'.
+    Results are memoized per header value.
+    """
+    if not header:
+        return IDENTITY
+    return _choose_encoding(header[:MAX_HEADER_LENGTH])
+
+
+class LanguageNegotiator:
+    """
+    Picks a response language from the request.
+    Checks query parameter 'lang' or 'language', then Accept-Language header,
+    then falls back to the default language.
+    Header results are memoized in an LRU cache keyed on the header string.
+    """
+
+    def __init__(self, supported, default: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.supported = frozenset(supported)
+        self.default = default
+        self._negotiate_cached = functools.lru_cache(maxsize=cache_size)(self._negotiate)
+
+    def _lookup(self, tag: str):
+        """
+        RFC 4647 lookup: drop trailing subtags until a supported language matches.
+        """
+        while tag:
+            if tag in self.supported:
+                return tag
+            tag = tag.rpartition('-')[0]
+        return None
+
+    def _negotiate(self, header: str) -> str:
+        ranges = parse_accept_language(header)
+        excluded = {tag for tag, q in ranges if q == 0}
+        for tag, q in ranges:
+            if q == 0:
+                break
+            if tag == '*':
+                # Wildcard: any supported language not explicitly refused
+                if self.default not in excluded:
+                    return self.default
+                remaining = sorted(self.supported - excluded)
+                if remaining:
+                    return remaining[0]
+                continue
+            lang = self._lookup(tag)
+            if lang and lang not in excluded:
+                return lang
+        return self.default
+
+    def negotiate(self, header: str) -> str:
+        """
+        Resolve an Accept-Language header value to a supported language.
+        """
+        if not header:
+            return self.default
+        return self._negotiate_cached(header[:MAX_HEADER_LENGTH])
+
+    def resolve_param(self, value) -> str:
+        """
+        Resolve an explicit language parameter such as 'en' or 'en-US'.
+        Returns None if it does not name a supported language.
+        """
+        if not value or not isinstance(value, str):
+            return None
+        lang = value.lower()[:2]
+        return lang if lang in self.supported else None
+
+    def from_request(self, req) -> str:
+        """
+        Extract language from request.
+        Checks query parameter 'lang' or 'language', then Accept-Language header.
+        Returns the default language if no valid language found in request.
+        """
+        # Check query parameters
+        lang = self.resolve_param(req.params.get('lang') or req.params.get('language'))
+        if lang:
+            return lang
+
+        # Check Accept-Language header
+        return self.negotiate(req.headers.get('Accept-Language', ''))
+
+    def cache_info(self):
+        """
+        Hit/miss counters of the header cache (functools CacheInfo).
+        """
+        return self._negotiate_cached.cache_info()
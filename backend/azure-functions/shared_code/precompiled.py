@@ -0,0 +1,140 @@
+"""
+Precompiled catalog snapshot for faster cold starts.
+At build time the catalog document and the ready-to-serve bodies of every
+prebuilt catalog response (uncompressed and in each content coding) are
+written with marshal into one file next to the data file. A new worker
+reads that file in one go instead of parsing and validating the JSON, and
+its first catalog snapshot takes the bodies instead of serializing and
+compressing each response. The rest of the API view (subject and search
+indexes, lookup tables, ETags) is still built from the document at startup.
+The snapshot records the hash of the data file it was built from, so it is
+never used for an edited catalog, whatever happened to the file's times; a
+missing, stale or unreadable snapshot is ignored and the catalog is loaded
+from JSON as usual.
+
+The same build step compiles the app's bytecode: a package mounted
+read-only cannot cache .pyc files, so otherwise every cold start compiles
+the modules again.
+
+Build both before publishing (from backend/azure-functions):
+    python -m shared_code.precompiled
+"""
+import hashlib
+import marshal
+import os
+import sys
+import types
+
+from shared_code import responses
+from shared_code.negotiation import IDENTITY
+
+# Bumped when the layout of the snapshot changes
+SNAPSHOT_FORMAT = 2
+
+# (document, bodies) of the snapshot loaded last, until a catalog takes the bodies
+_loaded = None
+
+
+def default_snapshot_path(catalog_path: str) -> str:
+    """
+    Snapshot path for a data file, overridable with the CATALOG_SNAPSHOT app
+    setting (an empty value disables snapshots).
+    """
+    return os.environ.get('CATALOG_SNAPSHOT', os.path.splitext(catalog_path)[0] + '.snapshot')
+
+
+def _source_hash(catalog_path: str) -> str:
+    with open(catalog_path, 'rb') as catalog_file:
+        return hashlib.sha256(catalog_file.read()).hexdigest()
+
+
+def load_snapshot(catalog_path: str, snapshot_path: str = None) -> dict:
+    """
+    Catalog document from a snapshot that matches the data file, or None.
+    The snapshot's bodies are kept for take_bodies().
+    """
+    global _loaded
+    if snapshot_path is None:
+        snapshot_path = default_snapshot_path(catalog_path)
+    if not snapshot_path:
+        return None
+    try:
+        with open(snapshot_path, 'rb') as snapshot_file:
+            snapshot = marshal.loads(snapshot_file.read())
+        if (snapshot['format'] != SNAPSHOT_FORMAT or snapshot['python'] != tuple(sys.version_info[:2])
+                or snapshot['source'] != _source_hash(catalog_path)):
+            return None
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        return None
+    _loaded = (snapshot['document'], snapshot['bodies'])
+    return snapshot['document']
+
+
+def take_bodies(document: dict) -> types.MappingProxyType:
+    """
+    Bodies {(response name, encoding): bytes} of the prebuilt responses of
+    the snapshot document was loaded from, to build its views with (see
+    CachedResponse); empty for any other document. Handed out once.
+    """
+    global _loaded
+    if _loaded is None or _loaded[0] is not document:
+        return responses.NO_SHARED_BODIES
+    bodies = _loaded[1]
+    _loaded = None
+    return types.MappingProxyType(bodies)
+
+
+def build_snapshot(catalog_path: str, snapshot_path: str = None) -> int:
+    """
+    Write the snapshot for a data file; returns the number of bodies
+    stored. Views are built the same way the functions build them.
+    """
+    from shared_code.catalog import CatalogSnapshot, load_document
+    from shared_code.handlers import ApiView
+
+    if snapshot_path is None:
+        snapshot_path = default_snapshot_path(catalog_path)
+    document = load_document(catalog_path)
+    view = ApiView(CatalogSnapshot(document))
+
+    bodies = {}
+    for response in view.cached_responses():
+        bodies[(response.shared_name, IDENTITY)] = bytes(response.body)
+        for encoding in responses.COMPRESSORS:
+            variant = response.variant(encoding)
+            if variant.body is not response.body:
+                bodies[(response.shared_name, encoding)] = bytes(variant.body)
+
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'python': tuple(sys.version_info[:2]),
+        'source': _source_hash(catalog_path),
+        'document': document,
+        'bodies': bodies
+    }
+    # Replace atomically so a running worker never reads a partial file
+    temp_path = snapshot_path + '.tmp'
+    with open(temp_path, 'wb') as snapshot_file:
+        marshal.dump(snapshot, snapshot_file)
+    os.replace(temp_path, snapshot_path)
+    return len(bodies)
+
+
+def compile_bytecode(app_root: str) -> bool:
+    """
+    Write .pyc files for the Function App, skipping what is not deployed.
+    """
+    import compileall
+    import re
+    skip = re.compile(r'[\\/](\.venv|\.python_packages|benchmarks|node_modules)[\\/]')
+    return compileall.compile_dir(app_root, quiet=1, rx=skip)
+
+
+if __name__ == '__main__':
+    from shared_code.catalog import DEFAULT_CATALOG_PATH
+
+    path = os.environ.get('CATALOG_PATH', DEFAULT_CATALOG_PATH)
+    count = build_snapshot(path)
+    print(f'Wrote {default_snapshot_path(path)} with {count} response bodies')
+    if not compile_bytecode(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))):
+        sys.exit(1)
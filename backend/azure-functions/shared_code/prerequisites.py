@@ -0,0 +1,144 @@
+"""
+Prerequisite graph of the catalog topics.
+Topics list the ids of the topics they build on ("requires"). The graph is
+checked for cycles when a catalog is loaded and laid out in topological
+order, so every topic's prerequisites come before it. Sets of topics are
+bitsets (Python ints, bit i for the i-th topic in that order): each topic
+has its direct prerequisites and their transitive closure precomputed.
+
+Recommendations for a set of mastered topics first add everything those
+topics build on (a student who has mastered fractions needs no
+multiplication lesson), then find the topics whose prerequisites are all
+covered. That check runs on every topic at once: prerequisite edges are
+grouped by their distance in topological order, and one shifted bitset
+operation per distinct distance checks every edge of that length. Topics
+mostly build on nearby topics of their own subject and grade, so there are
+few distances, and the cost per topic is a few bit operations on machine
+words however large the catalog grows.
+"""
+import heapq
+import re
+from typing import Dict, Iterable, List, Tuple
+
+_SET_BIT = re.compile('1')
+
+
+class PrerequisiteGraph:
+    """
+    Topics in topological order with direct and transitive prerequisites as
+    bitsets. Never changed once built.
+    """
+
+    def __init__(self, requires: Dict[str, Iterable[str]]):
+        """
+        requires maps every topic id, in catalog order, to the ids it
+        requires. Raises ValueError for an unknown id or a cycle.
+        """
+        requires = {topic: tuple(dict.fromkeys(required)) for topic, required in requires.items()}
+        dependents = {topic: [] for topic in requires}
+        for topic, required in requires.items():
+            for prerequisite in required:
+                if prerequisite not in dependents:
+                    raise ValueError(f'Topic {topic} requires unknown topic {prerequisite!r}')
+                if prerequisite == topic:
+                    raise ValueError(f'Topic {topic} requires itself')
+                dependents[prerequisite].append(topic)
+
+        # Kahn's algorithm, taking the ready topic that comes first in the catalog
+        position = {topic: i for i, topic in enumerate(requires)}
+        waiting = {topic: len(required) for topic, required in requires.items()}
+        ready = [position[topic] for topic, count in waiting.items() if count == 0]
+        topics = list(requires)
+        order = []
+        while ready:
+            topic = topics[heapq.heappop(ready)]
+            order.append(topic)
+            for dependent in dependents[topic]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    heapq.heappush(ready, position[dependent])
+        if len(order) < len(requires):
+            raise ValueError(f'Topic prerequisites form a cycle: {" -> ".join(_find_cycle(requires, waiting))}')
+
+        self.order: Tuple[str, ...] = tuple(order)
+        self.index: Dict[str, int] = {topic: i for i, topic in enumerate(order)}
+        self.requires: Tuple[Tuple[str, ...], ...] = tuple(requires[topic] for topic in order)
+        self.all = (1 << len(order)) - 1
+
+        # Transitive prerequisites of the i-th topic as (lowest index, bits
+        # from there): they lie just below the topic in topological order, so
+        # storing the span instead of every bit from 0 keeps them small
+        closure = []
+        # Topics with a prerequisite d places before them, by distance d
+        by_distance = {}
+        for i, topic in enumerate(order):
+            mask = 0
+            for prerequisite in requires[topic]:
+                j = self.index[prerequisite]
+                low, bits = closure[j]
+                mask |= 1 << j | bits << low
+                by_distance[i - j] = by_distance.get(i - j, 0) | 1 << i
+            low = (mask & -mask).bit_length() - 1 if mask else 0
+            closure.append((low, mask >> low))
+        self.closure: Tuple[Tuple[int, int], ...] = tuple(closure)
+        self.distances: Tuple[Tuple[int, int], ...] = tuple(sorted(by_distance.items()))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def mask(self, topics: Iterable[str]) -> int:
+        """
+        Bitset of topic ids; raises KeyError for an unknown id.
+        """
+        mask = 0
+        for topic in topics:
+            mask |= 1 << self.index[topic]
+        return mask
+
+    def covered(self, mastered: int) -> int:
+        """
+        Mastered topics and everything they build on: the closures of the
+        mastered topics that no other mastered topic requires (the closure
+        of any other one is part of theirs).
+        """
+        required = 0
+        for distance, dependents in self.distances:
+            required |= (dependents & mastered) >> distance
+        covered = mastered
+        for i in members(mastered & ~required):
+            low, bits = self.closure[i]
+            covered |= bits << low
+        return covered
+
+    def unlocked(self, mastered: int) -> List[int]:
+        """
+        Topics, in topological order, not covered by the mastered ones whose
+        prerequisites all are.
+        """
+        covered = self.covered(mastered)
+        # A topic is blocked by a prerequisite d places before it that is not
+        # covered: the covered bitset shifted by d checks every such topic at once
+        blocked = covered
+        for distance, dependents in self.distances:
+            blocked |= dependents & ~(covered << distance)
+        return members(self.all & ~blocked)
+
+
+def _find_cycle(requires: Dict[str, tuple], waiting: Dict[str, int]) -> List[str]:
+    # A topic left waiting has a prerequisite left waiting; following them must repeat
+    topic = next(topic for topic, count in waiting.items() if count)
+    path = {}
+    while topic not in path:
+        path[topic] = len(path)
+        topic = next(required for required in requires[topic] if waiting[required])
+    return [*list(path)[path[topic]:], topic]
+
+
+def members(mask: int) -> List[int]:
+    """
+    Indexes of the set bits of a bitset, in increasing order.
+    """
+    # One C-level scan of the binary digits instead of a shift per bit
+    digits = bin(mask)[:1:-1]
+    return [match.start() for match in _SET_BIT.finditer(digits)]
+
@@ -0,0 +1,383 @@
+"""
+Per-student practice progress, by stable topic id.
+Progress is kept in SQLite in WAL mode, so readers never wait for the
+writer, as one aggregate row per (student, topic): attempts, correct
+answers, a mastery score and the time of the last attempt. Recording an
+attempt never touches the database on the request path: attempts are
+coalesced per (student, topic) in a write-behind buffer that a background
+thread writes in one transaction when FLUSH_SIZE attempts are buffered or
+every FLUSH_INTERVAL seconds, whichever comes first. Attempts still
+buffered when a worker is killed are lost; a normal exit flushes them.
+
+Mastery is an exponentially weighted average of correctness (recent
+attempts count most). A run of attempts is folded in as a decay factor
+and a gain, mastery = mastery * decay + gain, so coalesced runs are
+written with plain SQL arithmetic.
+
+Summaries are served from an in-memory cache of recently active students,
+which includes buffered attempts. A student missing from the cache is
+loaded from the database together with the attempts not yet written; a
+batch counter written in the same transaction as each flush tells which
+attempts a read already saw. Cached students are reloaded after
+CACHE_TTL seconds, so attempts written by other worker processes show up.
+
+The database file comes from the PROGRESS_DB_PATH app setting, which is
+required in Azure: the default in the temp directory is per instance and
+lost on restarts and scale-out. SQLite in WAL mode needs a local file
+system, so one database serves the worker processes of one instance;
+progress is not shared between scaled-out instances.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+from shared_code import log
+
+# Database outside Azure (func start, tests and benchmarks) without PROGRESS_DB_PATH
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), 'tutor-progress.sqlite3')
+
+# Buffered attempts that wake the writer, and seconds between timed flushes
+FLUSH_SIZE = 2048
+FLUSH_INTERVAL = 1.0
+
+# Buffered attempts at which recording writes itself instead of waiting for
+# the writer (the database is falling behind)
+MAX_BUFFERED = 16 * FLUSH_SIZE
+
+# Pooled connections; reads of different students run in parallel
+POOL_SIZE = 4
+
+# Students with cached summaries, and seconds before a cached one is reloaded
+CACHE_SIZE = 10000
+CACHE_TTL = 60.0
+
+# Weight of the newest attempt in the mastery score
+MASTERY_RATE = 0.3
+
+# A topic is mastered with enough attempts and a high enough score
+MASTERY_THRESHOLD = 0.8
+MASTERY_MIN_ATTEMPTS = 5
+
+MAX_STUDENT_LENGTH = 128
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS progress (
+        student TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        mastery REAL NOT NULL,
+        last_attempt REAL NOT NULL,
+        PRIMARY KEY (student, topic)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS flushes (
+        writer TEXT PRIMARY KEY,
+        batch INTEGER NOT NULL
+    )
+    """
+)
+
+UPSERT = """
+    INSERT INTO progress (student, topic, attempts, correct, mastery, last_attempt)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (student, topic) DO UPDATE SET
+        attempts = attempts + excluded.attempts,
+        correct = correct + excluded.correct,
+        mastery = mastery * ? + excluded.mastery,
+        last_attempt = max(last_attempt, excluded.last_attempt)
+"""
+
+logger = log.get_logger('progress')
+
+
+class ConnectionPool:
+    """
+    Up to size SQLite connections in WAL mode, opened on demand and shared
+    by threads one at a time.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # WAL with synchronous=NORMAL stays consistent; a power loss may drop the last commits
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            yield connection
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _chain(first: list, then: list) -> list:
+    # Buffered runs [attempts, correct, decay, gain, last attempt], first before then
+    return [first[0] + then[0], first[1] + then[1], first[2] * then[2], first[3] * then[2] + then[3],
+            max(first[4], then[4])]
+
+
+def _fold(entry: list, attempts: int, correct: int, decay: float, gain: float, at: float) -> None:
+    # entry: [attempts, correct, mastery, last attempt]
+    entry[0] += attempts
+    entry[1] += correct
+    entry[2] = entry[2] * decay + gain
+    entry[3] = max(entry[3], at)
+
+
+def topic_summary(topic: str, entry: list) -> dict:
+    attempts, correct, mastery, last_attempt = entry
+    return {
+        "topic": topic,
+        "attempts": attempts,
+        "correct": correct,
+        "mastery": round(mastery, 4),
+        "mastered": attempts >= MASTERY_MIN_ATTEMPTS and mastery >= MASTERY_THRESHOLD,
+        "last_attempt": last_attempt
+    }
+
+
+class ProgressStore:
+    """
+    Write-behind progress store over one SQLite database file.
+    """
+
+    def __init__(self, path: str, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 cache_size: int = CACHE_SIZE, cache_ttl: float = CACHE_TTL):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.pool = ConnectionPool(path)
+        with self.pool.connection() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+        # Student -> {topic: [attempts, correct, decay, gain, last attempt]}
+        self._buffer: Dict[str, Dict[str, list]] = {}
+        self._buffered = 0
+        # Batches by number: the one being written and the last one written,
+        # for reads that started before they were committed
+        self._batches: Dict[int, Dict[str, Dict[str, list]]] = {}
+        self._batch = 0
+        self._writer_id = uuid.uuid4().hex
+        # Student -> (load time, {topic: [attempts, correct, mastery, last attempt]}), least recent first
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = None
+
+    def record(self, student: str, attempts: Iterable[Tuple[str, bool]], at: float = None) -> int:
+        """
+        Buffer a student's attempts as (topic id, correct) in order; returns
+        how many were recorded.
+        """
+        at = time.time() if at is None else at
+        # Each topic's run of attempts as one (attempts, correct, decay, gain)
+        runs = {}
+        for topic, correct in attempts:
+            run = runs.setdefault(topic, [0, 0, 1.0, 0.0])
+            run[0] += 1
+            run[1] += bool(correct)
+            run[2] *= 1 - MASTERY_RATE
+            run[3] = run[3] * (1 - MASTERY_RATE) + (MASTERY_RATE if correct else 0.0)
+        if not runs:
+            return 0
+        count = sum(run[0] for run in runs.values())
+        with self._lock:
+            buffered = self._buffer.setdefault(student, {})
+            cached = self._cache.get(student)
+            for topic, (total, correct, decay, gain) in runs.items():
+                run = [total, correct, decay, gain, at]
+                entry = buffered.get(topic)
+                buffered[topic] = run if entry is None else _chain(entry, run)
+                if cached is not None:
+                    _fold(cached[1].setdefault(topic, [0, 0, 0.0, 0.0]), total, correct, decay, gain, at)
+            self._buffered += count
+            buffered_total = self._buffered
+        if self._writer is None:
+            self._start_writer()
+        if buffered_total >= MAX_BUFFERED:
+            self.flush()
+        elif buffered_total >= self.flush_size:
+            self._wake.set()
+        return count
+
+    def summary(self, student: str) -> Dict[str, dict]:
+        """
+        Summaries of the topics a student has practiced, by topic id.
+        """
+        with self._lock:
+            cached = self._cache.get(student)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(student)
+                return {topic: topic_summary(topic, entry) for topic, entry in cached[1].items()}
+        entries = self._load(student)
+        return {topic: topic_summary(topic, entry) for topic, entry in entries.items()}
+
+    def _read(self, student: str) -> tuple:
+        """
+        A student's rows and the number of this store's last batch they
+        include, read in one transaction.
+        """
+        with self.pool.connection() as connection:
+            connection.execute('BEGIN')
+            try:
+                rows = connection.execute(
+                    'SELECT topic, attempts, correct, mastery, last_attempt FROM progress WHERE student = ?',
+                    (student,)
+                ).fetchall()
+                written = connection.execute(
+                    'SELECT batch FROM flushes WHERE writer = ?', (self._writer_id,)
+                ).fetchone()
+            finally:
+                connection.execute('COMMIT')
+        return rows, written[0] if written else 0
+
+    def _load(self, student: str) -> Dict[str, list]:
+        while True:
+            loaded = time.monotonic()
+            rows, written = self._read(student)
+            with self._lock:
+                # Batches committed after the read; if the writer has moved
+                # past the ones still kept, read again
+                missed = range(written + 1, self._batch + 1)
+                if not all(number in self._batches for number in missed):
+                    continue
+                entries = {topic: [attempts, correct, mastery, last]
+                           for topic, attempts, correct, mastery, last in rows}
+                for batch in [*(self._batches[number] for number in missed), self._buffer]:
+                    for topic, (total, correct, decay, gain, at) in batch.get(student, {}).items():
+                        _fold(entries.setdefault(topic, [0, 0, 0.0, 0.0]), total, correct, decay, gain, at)
+                self._cache[student] = (loaded, entries)
+                self._cache.move_to_end(student)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                return {topic: list(entry) for topic, entry in entries.items()}
+
+    def flush(self) -> int:
+        """
+        Write the buffered attempts in one transaction; returns how many.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, {}
+                count, self._buffered = self._buffered, 0
+                self._batch += 1
+                number = self._batch
+                self._batches = {number - 1: self._batches[number - 1], number: batch} \
+                    if number - 1 in self._batches else {number: batch}
+            rows = [
+                (student, topic, total, correct, gain, at, decay)
+                for student, topics in batch.items()
+                for topic, (total, correct, decay, gain, at) in topics.items()
+            ]
+            try:
+                with self.pool.connection() as connection:
+                    connection.execute('BEGIN IMMEDIATE')
+                    try:
+                        connection.executemany(UPSERT, rows)
+                        connection.execute(
+                            'INSERT INTO flushes (writer, batch) VALUES (?, ?) '
+                            'ON CONFLICT (writer) DO UPDATE SET batch = excluded.batch',
+                            (self._writer_id, number)
+                        )
+                        connection.execute('COMMIT')
+                    except BaseException:
+                        connection.execute('ROLLBACK')
+                        raise
+            except sqlite3.Error as e:
+                # Put the attempts back in front of newer ones and retry on the next flush
+                with self._lock:
+                    for student, topics in batch.items():
+                        newer = self._buffer.setdefault(student, {})
+                        for topic, run in topics.items():
+                            entry = newer.get(topic)
+                            newer[topic] = run if entry is None else _chain(run, entry)
+                    self._buffered += count
+                    del self._batches[number]
+                    self._batch -= 1
+                logger.error('progress_flush_failed', attempts=count, error=str(e))
+                return 0
+            logger.debug('progress_flushed', attempts=count, rows=len(rows))
+            return count
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is not None or self._closed:
+                return
+            self._writer = threading.Thread(target=self._run_writer, name='progress-writer', daemon=True)
+            self._writer.start()
+
+    def _run_writer(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error('progress_writer_failed', error=str(e))
+
+    def close(self) -> None:
+        """
+        Stop the writer, write what is buffered and close the connections.
+        """
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        self.pool.close()
+
+
+def database_path() -> str:
+    """
+    Database file from the PROGRESS_DB_PATH app setting; DEFAULT_DB_PATH
+    only when not running in Azure (no WEBSITE_INSTANCE_ID). Raises
+    RuntimeError in Azure without the setting.
+    """
+    path = os.environ.get('PROGRESS_DB_PATH')
+    if path:
+        return path
+    if os.environ.get('WEBSITE_INSTANCE_ID'):
+        raise RuntimeError('PROGRESS_DB_PATH must name a database file that outlives the instance')
+    return DEFAULT_DB_PATH
+
+
+# Store shared by all functions in this worker process
+STORE = ProgressStore(database_path())
+atexit.register(STORE.close)
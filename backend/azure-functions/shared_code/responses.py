@@ -0,0 +1,288 @@
+import azure.functions as func
+import hashlib
+import io
+import json
+import os
+import types
+import zlib
+from typing import Iterable, Iterator
+
+from shared_code import cors
+from shared_code.negotiation import IDENTITY, choose_encoding
+
+JSON_MIMETYPE = "application/json; charset=utf-8"
+
+# CORS headers sent with every response (see shared_code/cors.py)
+CORS_HEADERS = cors.RESPONSE_HEADERS
+
+# Bodies smaller than this are always sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 256))
+
+
+# zlib level for per-request answers, compressed while the client waits (1-9)
+DYNAMIC_COMPRESSION_LEVEL = int(os.environ.get('DYNAMIC_COMPRESSION_LEVEL', 6))
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # Imported on first use: with a precompiled snapshot nothing is gzipped at startup
+    import gzip
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+# Static answers are compressed once, so they can afford the best level
+COMPRESSORS = {
+    "gzip": lambda body: _gzip(body, 9),
+    "deflate": lambda body: zlib.compress(body, 9)
+}
+
+# Dynamic answers trade a few percent of size for several times less CPU
+DYNAMIC_COMPRESSORS = {
+    "gzip": lambda body: _gzip(body, DYNAMIC_COMPRESSION_LEVEL),
+    "deflate": lambda body: zlib.compress(body, DYNAMIC_COMPRESSION_LEVEL)
+}
+
+# Shared bodies of responses built without a shared catalog store
+NO_SHARED_BODIES = types.MappingProxyType({})
+
+# Cache-Control for cacheable (catalog) answers
+CACHE_MAX_AGE = int(os.environ.get('CACHE_MAX_AGE', 300))
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}"
+
+# Headers repeated on a 304 Not Modified answer
+NOT_MODIFIED_HEADERS = ("ETag", "Cache-Control", "Vary", "Content-Language")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against a strong ETag.
+    """
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class ResponseVariant:
+    """
+    One representation of a cached response: body bytes, frozen headers and,
+    for cacheable responses, its ETag and the headers of a 304 answer.
+    """
+    __slots__ = ('body', 'headers', 'etag', 'not_modified_headers', '_origin_headers')
+
+    def __init__(self, body: bytes, headers: dict, etag: str = None):
+        if etag:
+            headers["ETag"] = etag
+        self.body = body
+        self.etag = etag
+        self.headers = types.MappingProxyType(headers)
+        self.not_modified_headers = types.MappingProxyType({
+            key: value for key, value in headers.items()
+            if key in NOT_MODIFIED_HEADERS or key.startswith("Access-Control-")
+        })
+        self._origin_headers = {}
+
+    def headers_for(self, origin: str, not_modified: bool = False) -> types.MappingProxyType:
+        """
+        Headers for a request Origin. With a CORS allowlist, the headers with
+        Access-Control-Allow-Origin are made once per allowed origin.
+        """
+        headers = self.not_modified_headers if not_modified else self.headers
+        if cors.ALLOW_ALL:
+            return headers
+        allowed = cors.allowed_origin(origin)
+        if allowed is None:
+            return headers
+        key = (allowed, not_modified)
+        found = self._origin_headers.get(key)
+        if found is None:
+            found = dict(headers)
+            found["Access-Control-Allow-Origin"] = allowed
+            found = self._origin_headers.setdefault(key, types.MappingProxyType(found))
+        return found
+
+
+class CachedResponse:
+    """
+    Ready-to-serve response: status code, UTF-8 body and a frozen header set.
+    Built once when the module loads, so handlers only look up and send bytes.
+    Compressed variants are made once per encoding and reused, at the best
+    level for precompressed responses and at DYNAMIC_COMPRESSION_LEVEL for
+    the others; bodies of at least COMPRESSION_MIN_SIZE bytes carry
+    'Vary: Accept-Encoding'.
+    Responses built with a cache version get a strong ETag per variant
+    (version + content hash), Cache-Control, and 304 answers to If-None-Match.
+    Named (prebuilt catalog) responses take their bodies from the shared
+    bodies of their catalog ({(response name, encoding): body}) when it has
+    them: the mapped shared_code/shared_catalog.py store, so worker
+    processes share one copy, or the precompiled snapshot a worker started
+    from (shared_code/precompiled.py), so it neither serializes nor
+    compresses them.
+    """
+    __slots__ = ('status_code', 'body', 'headers', 'shared_name', '_shared_bodies', '_etag_base', '_variants',
+                 '_compressors')
+
+    def __init__(self, status_code: int, body: bytes, headers: dict, precompress: bool = True,
+                 cache_version=None, shared_name: tuple = None, shared_bodies=NO_SHARED_BODIES):
+        self.status_code = status_code
+        self.shared_name = shared_name
+        self._shared_bodies = shared_bodies
+        self._compressors = COMPRESSORS if precompress else DYNAMIC_COMPRESSORS
+        self.body = body
+        vary = [headers.pop("Vary")] if "Vary" in headers else []
+        if not cors.ALLOW_ALL:
+            vary.append("Origin")
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            vary.append("Accept-Encoding")
+        if vary:
+            headers["Vary"] = ", ".join(vary)
+        self._etag_base = None
+        if cache_version is not None:
+            headers["Cache-Control"] = CACHE_CONTROL
+            self._etag_base = f'{cache_version}-{hashlib.sha256(body).hexdigest()[:20]}'
+        identity = ResponseVariant(body, headers, self._etag(IDENTITY))
+        self.headers = identity.headers
+        self._variants = {IDENTITY: identity}
+        if precompress:
+            for encoding in COMPRESSORS:
+                self.variant(encoding)
+
+    def _etag(self, encoding: str) -> str:
+        if self._etag_base is None:
+            return None
+        if encoding == IDENTITY:
+            return f'"{self._etag_base}"'
+        return f'"{self._etag_base}-{encoding}"'
+
+    def variant(self, encoding: str) -> ResponseVariant:
+        """
+        Representation for a content coding; identity if the body is too
+        small or does not get smaller.
+        """
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = self._variants[IDENTITY]
+            if encoding in COMPRESSORS and len(self.body) >= COMPRESSION_MIN_SIZE:
+                body = self._shared_bodies.get((self.shared_name, encoding)) if self.shared_name else None
+                if body is None:
+                    body = self._compressors[encoding](self.body)
+                if len(body) < len(self.body):
+                    headers = dict(self.headers)
+                    headers["Content-Encoding"] = encoding
+                    variant = ResponseVariant(body, headers, self._etag(encoding))
+            variant = self._variants.setdefault(encoding, variant)
+        return variant
+
+    def share(self, shared_bodies) -> None:
+        """
+        Swap the body and compressed variants for their copies in the shared
+        bodies of a newly published store, and take variants made later from it.
+        """
+        self._shared_bodies = shared_bodies
+        for encoding, variant in self._variants.items():
+            shared = shared_bodies.get((self.shared_name, encoding))
+            if shared is not None:
+                variant.body = shared
+        self.body = self._variants[IDENTITY].body
+
+    def to_http_response(self, req: func.HttpRequest = None) -> func.HttpResponse:
+        """
+        Create a new HttpResponse from the cached parts, compressed as the
+        request's Accept-Encoding allows, or a body-less 304 when a GET's
+        If-None-Match matches. CORS headers follow the request's Origin.
+        The body bytes are shared, not copied.
+        """
+        encoding = IDENTITY
+        origin = None
+        if req is not None:
+            encoding = choose_encoding(req.headers.get('Accept-Encoding', ''))
+            origin = req.headers.get('Origin')
+        variant = self.variant(encoding)
+        if variant.etag and req is not None and req.method in ('GET', 'HEAD'):
+            if_none_match = req.headers.get('If-None-Match')
+            if if_none_match and etag_matches(if_none_match, variant.etag):
+                return func.HttpResponse(
+                    status_code=304,
+                    mimetype=JSON_MIMETYPE,
+                    headers=variant.headers_for(origin, not_modified=True)
+                )
+        body = variant.body
+        if type(body) is memoryview:
+            # HttpResponse only takes bytes; the shared copy stays mapped
+            body = body.tobytes()
+        return func.HttpResponse(
+            body,
+            mimetype=JSON_MIMETYPE,
+            status_code=self.status_code,
+            headers=variant.headers_for(origin)
+        )
+
+
+class StreamingResponse(func.HttpResponse):
+    """
+    HttpResponse whose body is produced by an iterator of byte chunks, for
+    answers too large to build in one piece. A host that can stream (such as
+    benchmarks/local_host.py) sends the chunks as they are made through
+    iter_body(); the Functions host takes get_body(), which collects them
+    once into a single bytes object. Either can be used, once.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], **kwargs):
+        super().__init__(**kwargs)
+        self._chunks = iter(chunks)
+        self._body = None
+
+    def iter_body(self) -> Iterator[bytes]:
+        if self._body is not None:
+            return iter((self._body,))
+        chunks, self._chunks = self._chunks, iter(())
+        return chunks
+
+    def get_body(self) -> bytes:
+        if self._body is None:
+            # BytesIO hands over its buffer without copying it, unlike b''.join or bytes(bytearray)
+            buffer = io.BytesIO()
+            for chunk in self.iter_body():
+                buffer.write(chunk)
+            self._body = buffer.getvalue()
+        return self._body
+
+
+def build_body_response(body: bytes, status_code: int = 200, language: str = None, precompress: bool = True,
+                        cache_version=None, shared_name: tuple = None,
+                        shared_bodies=NO_SHARED_BODIES) -> CachedResponse:
+    """
+    Wrap an already serialized UTF-8 JSON body and freeze the response headers.
+    Adds Content-Language when language is given. Per-request (dynamic)
+    responses pass precompress=False and are compressed only if asked for.
+    Catalog answers pass the catalog version as cache_version to become
+    cacheable; with a language they also vary on Accept-Language.
+    A shared_name (unique per catalog version) takes the body from the
+    shared bodies of the catalog's store when they have one.
+    """
+    if shared_name is not None:
+        body = shared_bodies.get((shared_name, IDENTITY), body)
+    headers = dict(CORS_HEADERS)
+    if language:
+        headers["Content-Language"] = language
+        if cache_version is not None:
+            headers["Vary"] = "Accept-Language"
+    return CachedResponse(status_code, body, headers, precompress, cache_version, shared_name, shared_bodies)
+
+
+def build_json_response(payload, status_code: int = 200, language: str = None, precompress: bool = True,
+                        cache_version=None, shared_name: tuple = None,
+                        shared_bodies=NO_SHARED_BODIES) -> CachedResponse:
+    """
+    Serialize payload to UTF-8 JSON once and freeze the response headers.
+    Adds Content-Language when language is given. Payloads found in the
+    shared catalog store (see build_body_response) are not serialized.
+    """
+    body = shared_bodies.get((shared_name, IDENTITY)) if shared_name is not None else None
+    if body is None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return build_body_response(body, status_code, language, precompress, cache_version, shared_name, shared_bodies)
@@ -0,0 +1,273 @@
+"""
+Full-text topic search shared by the HTTP functions.
+Topic names of every subject and locale go into an inverted index of
+lightly stemmed, casefolded terms; the last word of a query also matches as
+a prefix through a sorted token array, so the index answers autocomplete
+as the user types. Results are ranked by term rarity and coverage of the
+query.
+A new catalog version updates the index incrementally: only added and
+removed topics are (un)indexed, and unchanged posting lists are shared
+with the previous index, which keeps serving requests unchanged.
+"""
+import bisect
+import functools
+import heapq
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+# Words that count for ranking; punctuation and brackets are separators
+_WORD = re.compile(r'\w+')
+
+# Light Russian stemming: longest matching ending is cut if a stem of at
+# least MIN_STEM_LENGTH letters remains
+_RUSSIAN_ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ией', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ых', 'их', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю',
+    'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ия', 'ья', 'ов', 'ев', 'ию', 'ью',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й'
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+# Subject names are searchable too, at a lower weight than topic words
+SUBJECT_WEIGHT = 0.5
+
+# Prefix matches rank below whole-word matches
+PREFIX_WEIGHT = 0.6
+
+# Tokens a prefix may expand to; a one-letter prefix must not scan the vocabulary
+MAX_PREFIX_EXPANSION = 64
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_QUERY_LENGTH = 200
+
+# Distinct words with a cached stem; titles repeat words a lot
+STEM_CACHE_SIZE = 65536
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    NFKC-normalized, casefolded words of text ('ё' folded to 'е').
+    """
+    return _WORD.findall(unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е'))
+
+
+@functools.lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(token: str) -> str:
+    """
+    Light stem of a casefolded Russian or English word.
+    """
+    if token.isdigit():
+        return token
+    if 'а' <= token[-1] <= 'я':
+        for ending in _RUSSIAN_ENDINGS:
+            if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+                return token[:-len(ending)]
+        return token
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 5 and token.endswith('ing'):
+        return token[:-3]
+    if len(token) > 4 and token.endswith('ed'):
+        return token[:-2]
+    if len(token) > 4 and token.endswith(('ses', 'xes', 'zes', 'ches', 'shes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+class SearchEntry(NamedTuple):
+    """
+    One searchable topic.
+    """
+    subject: str
+    lang: str
+    topic: str
+    subject_name: str
+
+
+def _terms(entry: SearchEntry) -> Tuple[Dict[str, float], set]:
+    """
+    Weighted stems and plain tokens of an entry.
+    """
+    weights = {}
+    tokens = set()
+    for text, weight in ((entry.topic, 1.0), (entry.subject_name, SUBJECT_WEIGHT)):
+        for token in tokenize(text):
+            tokens.add(token)
+            term = stem(token)
+            weights[term] = weights.get(term, 0.0) + weight
+    return weights, tokens
+
+
+class SearchIndex:
+    """
+    Inverted index over SearchEntry documents.
+    An index is never changed once built; updated() returns a new one.
+    """
+
+    def __init__(self, entries: Iterable[SearchEntry] = ()):
+        self.entries: Dict[int, SearchEntry] = {}
+        self._ids: Dict[SearchEntry, int] = {}
+        self._next_id = 0
+        # Stem -> {doc id: weight}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # Plain token -> {doc id, ...} and the sorted tokens for prefix lookups
+        self._token_docs: Dict[str, frozenset] = {}
+        self._sorted_tokens: List[str] = []
+        self._apply(entries, ())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _apply(self, added: Iterable[SearchEntry], removed: Iterable[SearchEntry]) -> None:
+        # Posting lists are copied before their first change, so an index
+        # this one was copied from keeps its own
+        copied = set()
+
+        def postings(term):
+            if term not in copied:
+                copied.add(term)
+                self._postings[term] = dict(self._postings.get(term, ()))
+            return self._postings[term]
+
+        token_changes = {}
+        for entry in removed:
+            doc_id = self._ids.pop(entry)
+            del self.entries[doc_id]
+            weights, tokens = _terms(entry)
+            for term in weights:
+                del postings(term)[doc_id]
+            for token in tokens:
+                token_changes.setdefault(token, [set(), set()])[1].add(doc_id)
+        for entry in added:
+            doc_id = self._next_id
+            self._next_id += 1
+            self._ids[entry] = doc_id
+            self.entries[doc_id] = entry
+            weights, tokens = _terms(entry)
+            for term, weight in weights.items():
+                postings(term)[doc_id] = weight
+            for token in tokens:
+                token_changes.setdefault(token, [set(), set()])[0].add(doc_id)
+        for term in copied:
+            if not self._postings[term]:
+                del self._postings[term]
+
+        vocabulary_changed = False
+        for token, (added_ids, removed_ids) in token_changes.items():
+            docs = (self._token_docs.get(token, frozenset()) - removed_ids) | added_ids
+            if docs:
+                vocabulary_changed |= token not in self._token_docs
+                self._token_docs[token] = frozenset(docs)
+            else:
+                del self._token_docs[token]
+                vocabulary_changed = True
+        if vocabulary_changed:
+            self._sorted_tokens = sorted(self._token_docs)
+
+    def updated(self, entries: Iterable[SearchEntry]) -> 'SearchIndex':
+        """
+        New index holding exactly entries, built from this one by indexing
+        only the entries that were added and removing the ones that are gone.
+        """
+        entries = set(entries)
+        index = SearchIndex.__new__(SearchIndex)
+        index.entries = dict(self.entries)
+        index._ids = dict(self._ids)
+        index._next_id = self._next_id
+        index._postings = dict(self._postings)
+        index._token_docs = dict(self._token_docs)
+        index._sorted_tokens = self._sorted_tokens
+        index._apply(entries - self._ids.keys(), self._ids.keys() - entries)
+        return index
+
+    def _prefix_docs(self, prefix: str) -> set:
+        tokens = self._sorted_tokens
+        start = bisect.bisect_left(tokens, prefix)
+        stop = min(len(tokens), start + MAX_PREFIX_EXPANSION)
+        docs = set()
+        for i in range(start, stop):
+            if not tokens[i].startswith(prefix):
+                break
+            docs.update(self._token_docs[tokens[i]])
+        return docs
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, lang: str = None) -> List[Tuple[SearchEntry, float]]:
+        """
+        Best matching entries with their scores, best first. Entries matching
+        every query word come first, partial matches fill the remaining
+        places. The last query word also matches as a prefix; lang restricts
+        results to one locale.
+        """
+        tokens = tokenize(query[:MAX_QUERY_LENGTH])
+        if not tokens:
+            return []
+        total = len(self.entries)
+
+        # Per query word: (exact matches {doc id: weight}, idf, prefix-only matches, prefix idf)
+        terms = []
+        for position, token in enumerate(tokens):
+            posting = self._postings.get(stem(token), {})
+            idf = math.log(1 + total / len(posting)) if posting else 0.0
+            prefix_docs, prefix_idf = set(), 0.0
+            if position == len(tokens) - 1:
+                prefix_docs = self._prefix_docs(token)
+                if prefix_docs:
+                    prefix_idf = math.log(1 + total / len(prefix_docs)) * PREFIX_WEIGHT
+                    prefix_docs.difference_update(posting)
+            terms.append((posting, idf, prefix_docs, prefix_idf))
+
+        entries = self.entries
+        matches = [posting.keys() | prefix_docs for posting, _, prefix_docs, _ in terms]
+        # Score only the entries matching every word when there are enough of them
+        candidates = set.intersection(*sorted(matches, key=len))
+        if lang:
+            candidates = {doc_id for doc_id in candidates if entries[doc_id].lang == lang}
+        if len(candidates) < limit and len(terms) > 1:
+            candidates = set().union(*matches)
+            if lang:
+                candidates = {doc_id for doc_id in candidates if entries[doc_id].lang == lang}
+
+        ranked = {}
+        for doc_id in candidates:
+            score = 0.0
+            covered = 0
+            for posting, idf, prefix_docs, prefix_idf in terms:
+                weight = posting.get(doc_id)
+                if weight is not None:
+                    score += idf * weight
+                    covered += 1
+                elif doc_id in prefix_docs:
+                    score += prefix_idf
+                    covered += 1
+            ranked[doc_id] = (covered, round(score, 4))
+        best = heapq.nlargest(limit, ranked, key=ranked.__getitem__)
+        best.sort(key=lambda doc_id: (-ranked[doc_id][0], -ranked[doc_id][1], entries[doc_id].topic))
+        return [(entries[doc_id], ranked[doc_id][1]) for doc_id in best]
+
+
+def build_index(snapshot, previous: SearchIndex = None) -> SearchIndex:
+    """
+    Index of a catalog snapshot, updated from the previous snapshot's index
+    when there is one.
+    """
+    entries = entries_from_snapshot(snapshot)
+    if previous is None:
+        return SearchIndex(entries)
+    return previous.updated(entries)
+
+
+def entries_from_snapshot(snapshot) -> List[SearchEntry]:
+    """
+    One entry per topic name of every subject and language of a catalog snapshot.
+    """
+    entries = []
+    for lang, topics_by_subject in snapshot.topics.items():
+        subject_names = dict(zip(snapshot.subject_ids, snapshot.subjects[lang]))
+        for subject, topics in topics_by_subject.items():
+            entries.extend(SearchEntry(subject, lang, topic, subject_names[subject]) for topic in topics)
+    return entries
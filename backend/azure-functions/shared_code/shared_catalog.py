@@ -0,0 +1,226 @@
+"""
+Catalog response bodies shared by the worker processes of one host.
+With FUNCTIONS_WORKER_PROCESS_COUNT above 1 every worker would keep its own
+copy of every prebuilt catalog answer and its compressed variants. With the
+SHARED_CATALOG_DIR app setting the first worker to load a catalog version
+writes them all into one store file (in /dev/shm where available, so it
+stays in memory) and every worker maps it read-only: named CachedResponses
+(the prebuilt catalog answers) take their bodies as memoryview slices of the
+mapping instead of serializing and compressing them, and the operating
+system keeps a single copy for all workers. Each Catalog keeps the store it
+mapped and hands its bodies to the views it builds, so catalogs never see
+each other's bodies.
+
+Only the response bodies are shared, which is a small part of a worker's
+catalog memory: the search index, lookup tables and the compact topic store
+are Python objects every worker still builds for itself, and take many
+times the memory of the bodies (see benchmarks/catalog_memory.py). Sharing also
+trades allocations for memory: HttpResponse only takes bytes, so every
+answer served from the store copies its body out of the mapping (see
+benchmarks/shared_memory.py and benchmarks/handlers.py). It is therefore
+off unless SHARED_CATALOG_DIR names a directory; set it when the memory of
+several workers matters more than that copy.
+
+Store files are numbered by generation. A small pointer file names the
+current generation and the catalog it holds, and is replaced atomically
+after the store is complete, so a worker maps either the old or the new
+generation, never a partial one. A mapping stays valid after a newer
+generation replaces it. The pointer names the store by the catalog's
+source, version and stamp and the hash of the code that serializes it, so a
+worker never maps bodies of another catalog or another deployment.
+"""
+import functools
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+from typing import Dict, Iterable, Optional
+
+from shared_code import log, responses
+from shared_code.negotiation import IDENTITY
+
+# Bumped when the layout of the store changes
+STORE_FORMAT = 1
+
+MAGIC = b'TCATSHM1'
+
+# Magic, then offset and length of the marshalled index after the bodies
+HEADER_SIZE = len(MAGIC) + 16
+
+POINTER_NAME = 'current'
+
+logger = log.get_logger('shared_catalog')
+
+
+def default_directory() -> str:
+    """
+    Store directory from the SHARED_CATALOG_DIR app setting; unset or empty
+    disables sharing.
+    """
+    return os.environ.get('SHARED_CATALOG_DIR', '')
+
+
+DIRECTORY = default_directory()
+
+
+@functools.lru_cache(maxsize=1)
+def _code_hash() -> bytes:
+    # The shared_code modules decide what the bodies look like
+    digest = hashlib.sha256(f'{STORE_FORMAT}:{sys.version_info[0]}.{sys.version_info[1]}'.encode('ascii'))
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as source:
+                digest.update(source.read())
+    return digest.digest()
+
+
+def catalog_key(source: str, version: int, stamp) -> str:
+    """
+    Identity of the bodies of a catalog: where it is loaded from, its
+    version and the backend's stamp of the document (a file's mtime and
+    size, an ETag), with this code, the store layout and the Python version.
+    Every worker of a host reads the same file or blob, so they agree on it
+    without hashing the document.
+    """
+    return hashlib.sha256(_code_hash() + repr((source, version, stamp)).encode('utf-8')).hexdigest()
+
+
+def _store_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f'catalog-{generation}.bin')
+
+
+def _read_pointer(directory: str):
+    """
+    (generation, catalog key) of the current store, or (0, None).
+    """
+    try:
+        with open(os.path.join(directory, POINTER_NAME), encoding='ascii') as pointer_file:
+            generation, key = pointer_file.read().split()
+        return int(generation), key
+    except (OSError, ValueError):
+        return 0, None
+
+
+def _replace(path: str, chunks: Iterable[bytes]) -> None:
+    # Written under a name of this process, then renamed over the target
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as temp_file:
+        for chunk in chunks:
+            temp_file.write(chunk)
+    os.replace(temp_path, path)
+
+
+class SharedStore:
+    """
+    One mapped generation: bodies by (response name, encoding), as
+    read-only memoryview slices of the mapping.
+    """
+
+    def __init__(self, path: str, generation: int):
+        with open(path, 'rb') as store_file:
+            self._map = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._map)
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'Not a catalog store: {path}')
+        offset = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], 'little')
+        length = int.from_bytes(data[len(MAGIC) + 8:HEADER_SIZE], 'little')
+        index = marshal.loads(data[offset:offset + length])
+        self.generation = generation
+        self.bodies: Dict[tuple, memoryview] = {
+            key: data[start:start + size] for key, (start, size) in index.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+
+def open_store(key: str, directory: str = None) -> Optional[SharedStore]:
+    """
+    Map the current store if it holds the catalog with this key (see
+    catalog_key()), else None.
+    """
+    directory = DIRECTORY if directory is None else directory
+    if not directory:
+        return None
+    generation, published = _read_pointer(directory)
+    if published != key:
+        return None
+    try:
+        return SharedStore(_store_path(directory, generation), generation)
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        logger.error('shared_store_unreadable', generation=generation, error=str(e))
+        return None
+
+
+def publish(key: str, cached: Iterable, directory: str = None) -> Optional[SharedStore]:
+    """
+    Write the bodies and compressed variants of cached responses as the next
+    generation, point the other workers at it and map it. Older generations
+    but the previous one are removed.
+    """
+    directory = DIRECTORY if directory is None else directory
+    if not directory:
+        return None
+    bodies = {}
+    for response in cached:
+        bodies[(response.shared_name, IDENTITY)] = response.body
+        for encoding in responses.COMPRESSORS:
+            variant = response.variant(encoding)
+            if variant.body is not response.body:
+                bodies[(response.shared_name, encoding)] = variant.body
+    if not bodies:
+        return None
+
+    parts = []
+    index = {}
+    offset = HEADER_SIZE
+    for name, body in bodies.items():
+        index[name] = (offset, len(body))
+        parts.append(body)
+        offset += len(body)
+    index_bytes = marshal.dumps(index)
+    header = MAGIC + offset.to_bytes(8, 'little') + len(index_bytes).to_bytes(8, 'little')
+
+    os.makedirs(directory, exist_ok=True)
+    generation = _read_pointer(directory)[0] + 1
+    path = _store_path(directory, generation)
+    _replace(path, [header, *parts, index_bytes])
+    _replace(os.path.join(directory, POINTER_NAME),
+             [f'{generation} {key}\n'.encode('ascii')])
+    for name in os.listdir(directory):
+        if name.startswith('catalog-') and name.endswith('.bin'):
+            try:
+                if int(name[len('catalog-'):-len('.bin')]) < generation - 1:
+                    os.remove(os.path.join(directory, name))
+            except (OSError, ValueError):
+                # Still mapped on a platform that forbids it, or not ours
+                pass
+    logger.info('shared_store_published', generation=generation, bodies=len(bodies), size=offset)
+    return SharedStore(path, generation)
+
+
+def attach(key: str, directory: str = None) -> Optional[SharedStore]:
+    """
+    The store of the catalog with this key, if a worker has published one;
+    views built with its bodies take their responses from it.
+    """
+    return open_store(key, directory)
+
+
+def share(key: str, views: Iterable, directory: str = None) -> Optional[SharedStore]:
+    """
+    Publish the prebuilt responses of a snapshot's views (when no worker has
+    yet) and swap this worker's copies for the shared ones.
+    """
+    cached = [
+        response
+        for view in views if hasattr(view, 'cached_responses')
+        for response in view.cached_responses() if response.shared_name is not None
+    ]
+    store = publish(key, cached, directory)
+    if store is not None:
+        for response in cached:
+            response.share(store.bodies)
+    return store
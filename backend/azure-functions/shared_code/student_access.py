@@ -0,0 +1,49 @@
+"""
+Who may read and record a student's progress.
+Progress is data about children, so the function key that serves the
+public catalog is not enough for it: every request that names a student
+(/api/progress, next_topics and check_answers with a 'student') must also
+act for that student in one of two ways.
+
+Signed-in students: with App Service Authentication in front of the app,
+the platform sets the signed-in user's id in X-MS-CLIENT-PRINCIPAL-ID and
+strips that header from client requests. The PROGRESS_PRINCIPAL_HEADER app
+setting names the header to trust; only set it where such a front end
+guarantees it, since any client can send the header otherwise. The student
+is then the signed-in user: a 'student' the request names must match.
+
+Trusted back ends (such as a teacher dashboard) send the PROGRESS_API_KEY
+app setting's secret in the X-Progress-Key header and may act for any
+student they name.
+
+With neither configured, every request for a student's progress is refused.
+"""
+import hmac
+import os
+
+# Header with the authenticated user's id, set by the platform (empty: not trusted)
+PRINCIPAL_HEADER = os.environ.get('PROGRESS_PRINCIPAL_HEADER', '')
+
+# Secret of back ends allowed to act for any student (empty: none)
+API_KEY = os.environ.get('PROGRESS_API_KEY', '')
+API_KEY_HEADER = 'X-Progress-Key'
+
+
+def authorize(req, student: str = None) -> str:
+    """
+    The student a request may act for: the signed-in user, or the student
+    named by a trusted back end. student is the id the request names, if
+    any. Raises PermissionError if the request may not act for it, and
+    ValueError if a back-end request names no student.
+    """
+    principal = req.headers.get(PRINCIPAL_HEADER) if PRINCIPAL_HEADER else None
+    if principal:
+        if student is not None and student != principal:
+            raise PermissionError('Signed-in user is not this student')
+        return principal
+    if API_KEY and hmac.compare_digest(req.headers.get(API_KEY_HEADER, '').encode('utf-8'),
+                                       API_KEY.encode('utf-8')):
+        if student is None:
+            raise ValueError('A student id is required')
+        return student
+    raise PermissionError('Not authorized for student progress')
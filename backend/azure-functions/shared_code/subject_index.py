@@ -0,0 +1,123 @@
+"""
+Subject name resolution shared by the HTTP functions.
+Aliases are indexed once by their NFKC-normalized, casefolded form, so exact
+and alias lookups are a dict hit regardless of how many subjects exist.
+Unknown names fall back to trigram candidates ranked by edit distance to
+produce a "did you mean" suggestion (e.g. 'Englsh' -> 'English').
+"""
+import functools
+import unicodedata
+from collections import Counter
+from typing import Mapping, Optional, Tuple
+
+# Longest name considered for fuzzy matching; longer input gets no suggestion
+MAX_FUZZY_LENGTH = 64
+
+# Trigram candidates checked with the (more expensive) edit distance
+MAX_FUZZY_CANDIDATES = 8
+
+# Cached fuzzy lookups (typos repeat as often as correct names)
+SUGGESTION_CACHE_SIZE = 512
+
+# Cyrillic to Latin folding for fuzzy keys only, so 'Matematika' finds 'Математика'
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch', 'ъ': '',
+    'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya'
+})
+
+
+def normalize_name(name: str) -> str:
+    """
+    Canonical lookup key: NFKC-normalized, casefolded, whitespace collapsed.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+
+
+def _fuzzy_key(key: str) -> str:
+    return key.translate(_TRANSLIT)
+
+
+def _trigrams(text: str) -> set:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance between a and b, or limit + 1 once it exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SubjectIndex:
+    """
+    Alias -> canonical subject index built once from a mapping such as
+    {"Математика": "Math", "Math": "Math", ...}.
+    """
+
+    def __init__(self, aliases: Mapping[str, str]):
+        self._exact = dict(aliases)
+        self._normalized = {}
+        # Fuzzy key -> (display alias, canonical subject)
+        self._fuzzy = {}
+        self._trigram_index = {}
+        for alias, subject in aliases.items():
+            key = normalize_name(alias)
+            self._normalized.setdefault(key, subject)
+            fuzzy_key = _fuzzy_key(key)
+            if fuzzy_key in self._fuzzy:
+                continue
+            self._fuzzy[fuzzy_key] = (alias, subject)
+            for gram in _trigrams(fuzzy_key):
+                self._trigram_index.setdefault(gram, []).append(fuzzy_key)
+        self.suggest = functools.lru_cache(maxsize=SUGGESTION_CACHE_SIZE)(self._suggest)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Canonical subject for an exact or alias match, None otherwise.
+        """
+        subject = self._exact.get(name)
+        if subject is None:
+            subject = self._exact.get(name.strip())
+        if subject is None:
+            subject = self._normalized.get(normalize_name(name))
+        return subject
+
+    def _suggest(self, name: str) -> Optional[Tuple[str, str]]:
+        """
+        Closest (alias, canonical subject) for a misspelled name, or None.
+        Accepts up to one edit per four characters (at least one edit).
+        """
+        key = _fuzzy_key(normalize_name(name))
+        if not key or len(key) > MAX_FUZZY_LENGTH:
+            return None
+        if key in self._fuzzy:
+            return self._fuzzy[key]
+        shared = Counter()
+        for gram in _trigrams(key):
+            shared.update(self._trigram_index.get(gram, ()))
+        limit = max(1, len(key) // 4)
+        best = None
+        best_distance = limit + 1
+        for candidate, _ in shared.most_common(MAX_FUZZY_CANDIDATES):
+            distance = edit_distance(key, candidate, limit)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return self._fuzzy[best] if best is not None else None
@@ -0,0 +1,138 @@
+"""
+Per-stage request timing shared by the HTTP functions.
+A StageTimer marks the end of each stage of a request (language
+negotiation, subject resolution, serialization, response building) and on
+finish records every stage into an in-process latency histogram; when the
+SERVER_TIMING app setting is on it also adds a Server-Timing header.
+Histograms use fixed buckets behind a small per-histogram lock and keep
+both cumulative counts (for Prometheus) and a rolling window (for recent
+percentiles).
+"""
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+# Emit the Server-Timing response header
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Bucket upper bounds in microseconds; one extra bucket counts everything above
+BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+# Length of one rolling window; percentiles cover the current and previous window
+WINDOW_SECONDS = 60.0
+
+
+class LatencyHistogram:
+    """
+    Bucketed latency distribution of one (function, stage).
+    """
+    __slots__ = ('function', 'stage', 'counts', 'sum_us', '_window', '_previous', '_window_end', '_lock')
+
+    def __init__(self, function: str, stage: str):
+        self.function = function
+        self.stage = stage
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.sum_us = 0.0
+        self._window = [0] * (len(BUCKETS_US) + 1)
+        self._previous = [0] * (len(BUCKETS_US) + 1)
+        self._window_end = time.monotonic() + WINDOW_SECONDS
+        self._lock = threading.Lock()
+
+    def _rotate(self, now: float) -> None:
+        if now >= self._window_end + WINDOW_SECONDS:
+            # Idle for more than a window: nothing recent is left
+            self._previous = [0] * len(self.counts)
+        else:
+            self._previous = self._window
+        self._window = [0] * len(self.counts)
+        self._window_end = now + WINDOW_SECONDS
+
+    def observe(self, duration_us: float) -> None:
+        index = bisect.bisect_left(BUCKETS_US, duration_us)
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._window_end:
+                self._rotate(now)
+            self.counts[index] += 1
+            self._window[index] += 1
+            self.sum_us += duration_us
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def recent_percentile(self, fraction: float) -> float:
+        """
+        Upper bound (us) of the bucket holding the given fraction of recent
+        observations; None if there were none. The overflow bucket reports inf.
+        """
+        with self._lock:
+            if time.monotonic() >= self._window_end:
+                self._rotate(time.monotonic())
+            recent = [a + b for a, b in zip(self._window, self._previous)]
+        total = sum(recent)
+        if not total:
+            return None
+        running = 0
+        for index, bucket_count in enumerate(recent):
+            running += bucket_count
+            if running >= fraction * total:
+                return BUCKETS_US[index] if index < len(BUCKETS_US) else float('inf')
+        return float('inf')
+
+
+HISTOGRAMS: Dict[Tuple[str, str], LatencyHistogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(function: str, stage: str) -> LatencyHistogram:
+    """
+    Shared histogram for (function, stage), created on first use.
+    """
+    key = (function, stage)
+    found = HISTOGRAMS.get(key)
+    if found is None:
+        with _registry_lock:
+            found = HISTOGRAMS.setdefault(key, LatencyHistogram(function, stage))
+    return found
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one request: mark(stage) closes the stage
+    that started at the previous mark (or at creation).
+    """
+    __slots__ = ('function', 'stages', '_start', '_last')
+
+    def __init__(self, function: str):
+        self.function = function
+        self.stages = []
+        self._start = self._last = time.perf_counter_ns()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter_ns()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def finish(self, response=None) -> None:
+        """
+        Record all stages and the total; add Server-Timing to response if enabled.
+        """
+        total_ns = time.perf_counter_ns() - self._start
+        for stage, duration_ns in self.stages:
+            histogram(self.function, stage).observe(duration_ns / 1000)
+        histogram(self.function, 'total').observe(total_ns / 1000)
+        if SERVER_TIMING_ENABLED and response is not None:
+            response.headers['Server-Timing'] = server_timing_header(self.stages, total_ns)
+            response.headers['Timing-Allow-Origin'] = '*'
+
+
+def server_timing_header(stages, total_ns: int) -> str:
+    """
+    Server-Timing value with durations in milliseconds.
+    """
+    parts = [f'{stage};dur={duration_ns / 1e6:.3f}' for stage, duration_ns in stages]
+    parts.append(f'total;dur={total_ns / 1e6:.3f}')
+    return ', '.join(parts)
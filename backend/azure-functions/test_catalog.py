@@ -0,0 +1,184 @@
+"""
+Test script for the hot-reloadable curriculum catalog
+"""
+import sys
+import json
+import os
+import shutil
+import tempfile
+import gzip
+import time
+
+from shared_code import precompiled
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog, CatalogSnapshot
+from shared_code.negotiation import IDENTITY
+
+def write_catalog(path, document):
+    """Write a catalog document and bump its mtime so the change is visible"""
+    with open(path, 'w', encoding='utf-8') as catalog_file:
+        json.dump(document, catalog_file, ensure_ascii=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def idle(catalog, timeout=5.0):
+    """Wait for a background reload of the catalog to finish"""
+    deadline = time.monotonic() + timeout
+    while catalog._reload_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def settled(catalog):
+    """current(), once the background reload it may have started has finished"""
+    catalog.current()
+    idle(catalog)
+    return catalog._snapshot
+
+def test_catalog():
+    """Test catalog loading, views and reload on file change"""
+    print("Testing catalog...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'catalog.json')
+    shutil.copy(DEFAULT_CATALOG_PATH, path)
+    with open(path, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    
+    try:
+        catalog = Catalog(path, check_interval=0)
+        catalog.register_view('subject_count', lambda snapshot: len(snapshot.subject_ids))
+        
+        # Test 1: Bundled catalog matches the curriculum
+        print("\n1. Testing bundled catalog...")
+        total_tests += 1
+        snapshot = catalog.current()
+        print(f"Version: {snapshot.version}, subjects: {snapshot.subjects}")
+        if snapshot.subjects["ru"] == ["Математика", "Английский"] and len(snapshot.topics["en"]["Math"]) == 8:
+            print("✅ Bundled catalog test passed!")
+            tests_passed += 1
+        else:
+            print("❌ Unexpected catalog contents")
+        
+        # Test 2: Changed file is reloaded and views are rebuilt
+        print("\n2. Testing reload on change...")
+        total_tests += 1
+        document["version"] = 2
+        document["subjects"].append({
+            "id": "Science",
+            "names": {"ru": "Природоведение", "en": "Science"},
+            "topics": [{"id": "science-plants", "names": {"ru": "Растения", "en": "Plants"}}]
+        })
+        # The check started by the first request must not see a half-written file
+        idle(catalog)
+        write_catalog(path, document)
+        snapshot = settled(catalog)
+        print(f"Version: {snapshot.version}, view: {snapshot.views['subject_count']}")
+        if snapshot.version == 2 and snapshot.views['subject_count'] == 3:
+            print("✅ Reload test passed!")
+            tests_passed += 1
+        else:
+            print("❌ Catalog was not reloaded")
+        
+        # Test 3: Invalid file keeps the last good snapshot
+        print("\n3. Testing invalid catalog file...")
+        total_tests += 1
+        del document["languages"]
+        write_catalog(path, document)
+        snapshot = settled(catalog)
+        print(f"Version: {snapshot.version}")
+        if snapshot.version == 2 and "Science" in snapshot.topics["en"]:
+            print("✅ Invalid catalog test passed!")
+            tests_passed += 1
+        else:
+            print("❌ Last good snapshot was not kept")
+        
+        # Test 4: Precompiled snapshot is used only while it matches the data file
+        print("\n4. Testing precompiled snapshot...")
+        total_tests += 1
+        from shared_code.handlers import VIEW_NAME, ApiView
+        source = os.path.join(tmp_dir, 'bundled.json')
+        snapshot_path = os.path.join(tmp_dir, 'bundled.snapshot')
+        shutil.copy(DEFAULT_CATALOG_PATH, source)
+        count = precompiled.build_snapshot(source, snapshot_path)
+        # The default snapshot path of a data file is next to it
+        started = Catalog(source, check_interval=3600, shared_directory='')
+        started.register_view(VIEW_NAME, ApiView, incremental=True)
+        bodies = started.current().shared_bodies
+        math = started.current().views[VIEW_NAME].topic_responses[("ru", "Math")]
+        served = math.body is bodies[(("topics", "ru", "Math"), IDENTITY)] and \
+            math.variant("gzip").body is bodies[(("topics", "ru", "Math"), "gzip")]
+        unpacked = gzip.decompress(math.variant("gzip").body) == math.body
+        # Views built without the snapshot's bodies serialize the same answers
+        private = ApiView(CatalogSnapshot(precompiled.load_snapshot(source, snapshot_path)))
+        print(f"Stored: {count}, loaded: {len(bodies)}, served from the snapshot: {served}")
+        with open(source, 'a', encoding='utf-8') as catalog_file:
+            catalog_file.write("\n")
+        stale = precompiled.load_snapshot(source, snapshot_path)
+        if count and len(bodies) == count and served and unpacked and \
+                private.topic_responses[("ru", "Math")].body == math.body and stale is None:
+            print("✅ Precompiled snapshot test passed!")
+            tests_passed += 1
+        else:
+            print("❌ Snapshot was not loaded, used or invalidated as expected")
+
+        # Test 5: Values of the wrong type are rejected without raising from current()
+        print("\n5. Testing wrongly typed catalog values...")
+        total_tests += 1
+        document["languages"] = ["ru", "en"]
+        document["version"] = 3
+        rejected = []
+        for broken in ({**document, "subjects": ["bad"]},
+                       {**document, "subjects": [{**document["subjects"][0], "names": {"ru": 1, "en": "Math"}}]},
+                       {**document, "languages": "ru"},
+                       {**document, "subjects": [{**document["subjects"][0], "topics": [None]}]},
+                       {**document, "grade": 256},
+                       {**document, "grade": True}):
+            write_catalog(path, broken)
+            try:
+                rejected.append(settled(catalog).version == 2)
+            except Exception as e:
+                print(f"current() raised {type(e).__name__}: {e}")
+                rejected.append(False)
+        write_catalog(path, document)
+        snapshot = settled(catalog)
+        print(f"Rejected: {rejected}, then version {snapshot.version}")
+        if all(rejected) and snapshot.version == 3:
+            print("✅ Typed values test passed!")
+            tests_passed += 1
+        else:
+            print("❌ A wrongly typed catalog was accepted or broke the request")
+
+        # Test 6: A slow reload runs in the background while the old snapshot is served
+        print("\n6. Testing reload off the request path...")
+        total_tests += 1
+        catalog.register_view('slow', lambda snapshot: time.sleep(0.3 if snapshot.version > 3 else 0))
+        document["version"] = 4
+        write_catalog(path, document)
+        start = time.perf_counter()
+        served = catalog.current().version
+        elapsed = time.perf_counter() - start
+        snapshot = settled(catalog)
+        print(f"Served version {served} in {elapsed * 1000:.1f} ms while reloading, then {snapshot.version}")
+        if served == 3 and elapsed < 0.1 and snapshot.version == 4:
+            print("✅ Background reload test passed!")
+            tests_passed += 1
+        else:
+            print("❌ The request waited for the reload")
+    finally:
+        shutil.rmtree(tmp_dir)
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_catalog()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,274 @@
+"""
+Test script for the catalog backends, against a local stand-in for blob storage
+"""
+import sys
+import json
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog
+from shared_code.catalog_backends import FileBackend, HttpBackend, open_backend
+
+class BlobStandIn(ThreadingHTTPServer):
+    """Serves one catalog document with an ETag, counting requests and connections"""
+    daemon_threads = True
+
+    def __init__(self, document):
+        super().__init__(('127.0.0.1', 0), BlobHandler)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = 0
+        self.delay = 0.0
+        self.down = False
+        self.publish(document)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/catalog/catalog.json?sv=2024&sig=secret'
+
+    def publish(self, document):
+        self.body = gzip.compress(json.dumps(document, ensure_ascii=False).encode('utf-8'))
+        self.etag = f'"0x{zlib.crc32(self.body):08X}"'
+
+class BlobHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.delay)
+        if server.down:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == server.etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', server.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_catalog_backends():
+    """Test conditional fetches, connection reuse, stale-while-revalidate and single flight"""
+    print("Testing catalog backends...")
+    print("=" * 60)
+
+    tests_passed = 0
+    total_tests = 0
+
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    server = BlobStandIn(document)
+    tmp_dir = tempfile.mkdtemp()
+
+    try:
+        # Test 1: Conditional requests over one connection
+        print("\n1. Testing conditional fetches...")
+        total_tests += 1
+        try:
+            backend = open_backend(server.url)
+            assert isinstance(backend, HttpBackend) and 'secret' not in repr(backend)
+            stamp, loaded = backend.load()
+            assert loaded == document and stamp[0] == server.etag
+            for _ in range(5):
+                assert backend.load(stamp) == (stamp, None)
+            print(f"{backend!r}: {server.requests} requests, {server.not_modified} not modified, "
+                  f"{server.connections} connection(s)")
+            assert server.requests == 6 and server.not_modified == 5 and server.connections == 1
+            backend.close()
+            print("✅ Conditional fetch test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 2: Stale snapshot served while the new version loads in the background
+        print("\n2. Testing stale-while-revalidate...")
+        total_tests += 1
+        try:
+            catalog = Catalog(server.url, check_interval=0, shared_directory='')
+            catalog.register_view('version', lambda snapshot: snapshot.version)
+            server.publish({**document, "version": document["version"] + 1})
+            server.delay = 0.3
+            start = time.perf_counter()
+            snapshot = catalog.current()
+            elapsed = time.perf_counter() - start
+            print(f"Served version {snapshot.version} in {elapsed * 1000:.1f} ms while revalidating")
+            assert snapshot.version == document["version"] and elapsed < 0.1
+            assert wait_for(lambda: catalog.current().version == document["version"] + 1)
+            assert catalog.current().views['version'] == document["version"] + 1
+            print(f"Then served version {catalog.current().version}")
+            print("✅ Stale-while-revalidate test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 3: Concurrent requests trigger one origin request
+        print("\n3. Testing single-flight refresh...")
+        total_tests += 1
+        try:
+            assert wait_for(lambda: not catalog._reload_lock.locked())
+            # One check per minute from now on: only the first request sees it due
+            catalog.check_interval = 60
+            before = server.requests
+            server.publish({**document, "version": document["version"] + 2})
+            barrier = threading.Barrier(50)
+            versions = []
+
+            def request():
+                barrier.wait()
+                versions.append(catalog.current().version)
+
+            threads = [threading.Thread(target=request) for _ in range(50)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert wait_for(lambda: catalog.current().version == document["version"] + 2)
+            origin = server.requests - before
+            print(f"50 concurrent requests: {origin} origin request(s), served {sorted(set(versions))}")
+            assert origin == 1 and versions.count(document["version"] + 1) == 50
+            print("✅ Single-flight test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 4: An unreachable or failing origin keeps the last good snapshot
+        print("\n4. Testing origin failures...")
+        total_tests += 1
+        try:
+            server.delay = 0.0
+            server.down = True
+            catalog.reload()
+            served = catalog.current().version
+            server.down = False
+            server.publish({"version": "broken"})
+            catalog.reload()
+            print(f"Origin down, then invalid document: serving version {served}, {catalog.current().version}")
+            assert served == catalog.current().version == document["version"] + 2
+            catalog.backend = HttpBackend('http://127.0.0.1:9/catalog.json', timeout=1)
+            assert not catalog.reload() and catalog.current().version == document["version"] + 2
+            print("✅ Origin failure test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 5: A directory backend reads catalog.json and reloads in the background
+        print("\n5. Testing directory backend...")
+        total_tests += 1
+        try:
+            shutil.copy(DEFAULT_CATALOG_PATH, os.path.join(tmp_dir, 'catalog.json'))
+            backend = open_backend(tmp_dir)
+            assert isinstance(backend, FileBackend)
+            catalog = Catalog(backend, check_interval=0, shared_directory='')
+            with open(backend.path, 'w', encoding='utf-8') as catalog_file:
+                json.dump({**document, "version": 7}, catalog_file, ensure_ascii=False)
+            stat = os.stat(backend.path)
+            os.utime(backend.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert wait_for(lambda: catalog.current().version == 7)
+            print(f"{backend!r}: version {catalog.current().version}")
+            print("✅ Directory backend test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 6: A malformed remote document does not stop later revalidations
+        print("\n6. Testing recovery from a malformed document...")
+        total_tests += 1
+        try:
+            server.publish({**document, "version": document["version"] + 3})
+            catalog = Catalog(server.url, check_interval=0, shared_directory='')
+            server.publish({**document, "version": document["version"] + 4, "subjects": ["bad"]})
+            catalog.current()
+            assert wait_for(lambda: catalog._revalidator is not None and not catalog._reload_lock.locked())
+            served = catalog.current().version
+            assert wait_for(lambda: not catalog._reload_lock.locked())
+            server.publish({**document, "version": document["version"] + 5})
+            assert wait_for(lambda: catalog.current().version == document["version"] + 5)
+            print(f"Malformed document: kept version {served}; then served {catalog.current().version}, "
+                  f"revalidate thread alive: {catalog._revalidator.is_alive()}")
+            assert served == document["version"] + 3 and catalog._revalidator.is_alive()
+            print("✅ Malformed document test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 7: An unreachable origin at cold start serves the bundled catalog until it answers
+        print("\n7. Testing cold start without the origin...")
+        total_tests += 1
+        try:
+            server.down = True
+            catalog = Catalog(server.url, check_interval=0, shared_directory='')
+            started = catalog.current().version
+            try:
+                HttpBackend('http://127.0.0.1:9/catalog.json', timeout=1).initial()
+                raise AssertionError('A backend without a fallback must fail at cold start')
+            except OSError:
+                pass
+            server.down = False
+            server.publish({**document, "version": document["version"] + 6})
+            assert wait_for(lambda: catalog.current().version == document["version"] + 6)
+            print(f"Origin down: started from version {started}; then served {catalog.current().version}")
+            assert started == document["version"]
+            # A hanging origin holds the import for the initial timeout only, without a retry
+            server.delay = 1.0
+            start = time.perf_counter()
+            hanging = Catalog(HttpBackend(server.url, fallback=DEFAULT_CATALOG_PATH, initial_timeout=0.2),
+                              check_interval=3600, shared_directory='')
+            elapsed = time.perf_counter() - start
+            server.delay = 0.0
+            print(f"Origin hanging: started from version {hanging.current().version} in {elapsed * 1000:.0f} ms")
+            assert hanging.current().version == document["version"] and elapsed < 0.5
+            print("✅ Cold start test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_catalog_backends()
+    sys.exit(0 if success else 1)
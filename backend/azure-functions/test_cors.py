@@ -0,0 +1,112 @@
+"""
+Test script for CORS preflight handling and the origin allowlist
+"""
+import os
+import sys
+import json
+from unittest.mock import Mock
+
+# Allowlist mode must be configured before the functions are imported
+os.environ["CORS_ALLOWED_ORIGINS"] = "https://tutor.example.com, http://localhost:3000/"
+os.environ["CORS_MAX_AGE"] = "7200"
+
+sys.path.insert(0, 'get_topics')
+
+from __init__ import main
+
+ALLOWED = "https://tutor.example.com"
+
+def create_mock_request(method="GET", params=None, headers=None):
+    """Create a mock HTTP request"""
+    mock_request = Mock()
+    mock_request.method = method
+    mock_request.url = "http://localhost:7071/api/get_topics"
+    mock_request.params = params or {}
+    mock_request.headers = headers or {}
+    mock_request.route_params = {}
+    mock_request.get_body = Mock(return_value=b'')
+    mock_request.get_json = Mock(side_effect=ValueError("No JSON body"))
+    return mock_request
+
+def test_cors():
+    """Test preflight answers and per-origin CORS headers"""
+    print("Testing CORS handling...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    # Test 1: Preflight from an allowed origin
+    print("\n1. Testing preflight from allowed origin...")
+    total_tests += 1
+    try:
+        request = create_mock_request("OPTIONS", headers={
+            "Origin": ALLOWED,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type"
+        })
+        response = main(request)
+        headers = dict(response.headers)
+        print(f"Status: {response.status_code}, Headers: {headers}")
+        assert response.status_code == 204
+        assert response.get_body() == b''
+        assert headers["Access-Control-Allow-Origin"] == ALLOWED
+        assert headers["Access-Control-Max-Age"] == "7200"
+        assert "POST" in headers["Access-Control-Allow-Methods"]
+        assert headers["Vary"] == "Origin"
+        assert request.get_json.call_count == 0
+        print("✅ Allowed preflight test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: Preflight from another origin gets no CORS grant
+    print("\n2. Testing preflight from unknown origin...")
+    total_tests += 1
+    try:
+        response = main(create_mock_request("OPTIONS", headers={"Origin": "https://evil.example.net"}))
+        print(f"Status: {response.status_code}, Headers: {dict(response.headers)}")
+        assert response.status_code == 204
+        assert "Access-Control-Allow-Origin" not in response.headers
+        print("✅ Unknown origin preflight test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Actual responses echo allowed origins only
+    print("\n3. Testing actual responses...")
+    total_tests += 1
+    try:
+        allowed = main(create_mock_request(params={"subject": "Math"}, headers={"Origin": "http://localhost:3000"}))
+        other = main(create_mock_request(params={"subject": "Math"}, headers={"Origin": "https://evil.example.net"}))
+        print(f"Allowed: {allowed.headers.get('Access-Control-Allow-Origin')}, Vary: {allowed.headers.get('Vary')}")
+        assert allowed.status_code == 200 and len(json.loads(allowed.get_body())) == 8
+        assert allowed.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+        assert "Origin" in allowed.headers["Vary"]
+        assert "Access-Control-Allow-Origin" not in other.headers
+        
+        etag = allowed.headers["ETag"]
+        not_modified = main(create_mock_request(params={"subject": "Math"}, headers={
+            "Origin": ALLOWED, "If-None-Match": etag
+        }))
+        print(f"304 status: {not_modified.status_code}, origin: {not_modified.headers.get('Access-Control-Allow-Origin')}")
+        assert not_modified.status_code == 304
+        assert not_modified.headers["Access-Control-Allow-Origin"] == ALLOWED
+        print("✅ Actual response test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_cors()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,198 @@
+"""
+Test script for stable ids and ?since= catalog deltas
+"""
+import sys
+import copy
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock
+
+sys.path.insert(0, 'router')
+
+from __init__ import main
+from shared_code import handlers
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog, CatalogSnapshot, load_document
+
+def create_mock_request(resource, params=None, route_params=None):
+    """Create a mock GET request for a router resource"""
+    mock_request = Mock()
+    mock_request.method = "GET"
+    mock_request.url = f"http://localhost:7071/api/{resource}"
+    mock_request.params = params or {}
+    mock_request.headers = {}
+    mock_request.route_params = {"resource": resource, **(route_params or {})}
+    mock_request.get_body = Mock(return_value=b'')
+    return mock_request
+
+def get(resource, params=None, route_params=None):
+    response = main(create_mock_request(resource, params, route_params))
+    return response.status_code, json.loads(response.get_body())
+
+def write_catalog(path, document):
+    """Write a catalog document and bump its mtime so the change is visible"""
+    with open(path, 'w', encoding='utf-8') as catalog_file:
+        json.dump(document, catalog_file, ensure_ascii=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def delta(view, resource, since, lang, subject=None):
+    return json.loads(view.delta_response(resource, since, lang, subject).body)
+
+def test_delta():
+    """Test full syncs, deltas between versions and errors"""
+    print("Testing catalog deltas...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    document = load_document(DEFAULT_CATALOG_PATH)
+    version = document["version"]
+    
+    # Test 1: since=0 lists everything with stable ids
+    print("\n1. Testing full sync...")
+    total_tests += 1
+    try:
+        status, subjects = get("subjects", {"since": "0", "lang": "en"})
+        status, topics = get("topics", {"since": "0", "lang": "en"})
+        print(f"Subjects: {subjects['added']}")
+        print(f"First topic: {topics['added'][0]}")
+        assert status == 200
+        assert subjects["version"] == version and subjects["full"] is True
+        assert subjects["added"] == [{"id": "Math", "name": "Math"}, {"id": "English", "name": "English"}]
+        assert topics["added"][0] == {"id": "math-addition-subtraction", "subject": "Math",
+                                      "name": "Addition and subtraction within 1000"}
+        assert len(topics["added"]) == 16 and topics["changed"] == topics["removed"] == []
+        status, math_topics = get("topics", {"since": "0"}, {"subject": "математика"})
+        assert [item["name"] for item in math_topics["added"]] == json.loads(main(create_mock_request(
+            "topics", {"subject": "Math"})).get_body())
+        print("✅ Full sync test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: An up-to-date client gets an empty delta
+    print("\n2. Testing up-to-date client...")
+    total_tests += 1
+    try:
+        status, data = get("topics", {"since": str(version)})
+        size = len(main(create_mock_request("topics", {"since": str(version)})).get_body())
+        print(f"{data} ({size} bytes)")
+        assert status == 200 and data["full"] is False
+        assert data["added"] == data["changed"] == data["removed"] == []
+        # A client past the served version (another instance may be ahead) is up to date too
+        status, ahead = get("topics", {"since": "99999999999999999999999"})
+        assert status == 200 and ahead == data
+        print("✅ Up-to-date client test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Added, renamed and removed entries between versions
+    print("\n3. Testing delta between versions...")
+    total_tests += 1
+    try:
+        changed = copy.deepcopy(document)
+        changed["version"] = version + 1
+        math = changed["subjects"][0]
+        del math["topics"][6]
+        math["topics"][2]["names"]["en"] = "Fractions"
+        math["topics"].append({"id": "math-decimals", "names": {"ru": "Десятичные дроби", "en": "Decimals"}})
+        changed["subjects"][1]["names"]["ru"] = "Английский язык"
+        first = handlers.ApiView(CatalogSnapshot(document))
+        second = handlers.ApiView(CatalogSnapshot(changed), first)
+        en = delta(second, "topics", version, "en")
+        ru = delta(second, "topics", version, "ru")
+        print(f"en: {en}")
+        assert en["added"] == [{"id": "math-decimals", "subject": "Math", "name": "Decimals"}]
+        assert en["changed"] == [{"id": "math-fractions", "subject": "Math", "name": "Fractions"}]
+        assert en["removed"] == ["math-tables-charts"]
+        # Renamed only in English
+        assert ru["changed"] == []
+        assert delta(second, "topics", version, "en", "English") == {
+            "version": version + 1, "since": version, "full": False, "added": [], "changed": [], "removed": []}
+        assert delta(second, "subjects", version, "ru")["changed"] == [{"id": "English", "name": "Английский язык"}]
+        assert delta(second, "subjects", version, "en")["changed"] == []
+        # Versions the worker never saw get a full list
+        unknown = delta(second, "topics", version - 1, "en")
+        assert unknown["full"] is True and len(unknown["added"]) == 16
+        # A worker started at the new version (redeploy, cold start, scale-out) knows no older one
+        fresh = delta(handlers.ApiView(CatalogSnapshot(changed)), "topics", version, "en")
+        assert fresh["full"] is True and len(fresh["added"]) == 16
+        print("✅ Delta test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 4: Malformed versions and unknown subjects
+    print("\n4. Testing errors...")
+    total_tests += 1
+    try:
+        cases = [
+            ("subjects", {"since": "abc"}, None, 400),
+            ("topics", {"since": "-1"}, None, 400),
+            ("topics", {"since": "1", "subject": "Chemistry"}, None, 404),
+        ]
+        for resource, params, route_params, expected in cases:
+            status, data = get(resource, params, route_params)
+            print(f"{resource} {params} -> {status}: {data['error']}")
+            assert status == expected
+        print("✅ Errors test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 5: Changed content is only published under a higher version
+    print("\n5. Testing version checks on reload...")
+    total_tests += 1
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'catalog.json')
+        write_catalog(path, document)
+        # Reloaded by the test only: a background check would race with reload()
+        catalog = Catalog(path, check_interval=3600, shared_directory='')
+        catalog.register_view(handlers.VIEW_NAME, handlers.ApiView, incremental=True)
+        renamed = copy.deepcopy(document)
+        renamed["version"] = version + 1
+        renamed["subjects"][0]["topics"][0]["names"]["en"] = "Sums"
+        write_catalog(path, renamed)
+        assert catalog.reload()
+        edited = copy.deepcopy(renamed)
+        edited["subjects"][0]["topics"][0]["names"]["en"] = "Addition"
+        results = []
+        # Edited under the same version, an older version, the same file again
+        for stale in (edited, document, renamed):
+            write_catalog(path, stale)
+            results.append(catalog.reload())
+        view = catalog.current().views[handlers.VIEW_NAME]
+        changed = delta(view, "topics", version, "en")["changed"]
+        print(f"Edited, older, unchanged: reloaded {results}; version {view.version}: {changed}")
+        assert results == [False, False, False] and view.version == version + 1
+        assert changed == [{"id": "math-addition-subtraction", "subject": "Math", "name": "Sums"}]
+        write_catalog(path, {**edited, "version": version + 2})
+        assert catalog.reload()
+        view = catalog.current().views[handlers.VIEW_NAME]
+        assert delta(view, "topics", version + 1, "en")["changed"] == [
+            {"id": "math-addition-subtraction", "subject": "Math", "name": "Addition"}]
+        print("✅ Version check test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    finally:
+        shutil.rmtree(tmp_dir)
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_delta()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,259 @@
+"""
+Test script for the practice-problem generator (get_exercises)
+"""
+import sys
+import json
+import re
+import time
+from unittest.mock import Mock
+
+sys.path.insert(0, 'router')
+
+from __init__ import main
+from shared_code import exercises
+
+# Unit conversions of the measurement questions (English templates)
+UNITS = {("m", "cm"): 100, ("kg", "g"): 1000, ("h", "min"): 60, ("km", "m"): 1000}
+
+def create_mock_request(params=None, headers=None):
+    """Create a mock GET /api/exercises request"""
+    mock_request = Mock()
+    mock_request.method = "GET"
+    mock_request.url = "http://localhost:7071/api/exercises"
+    mock_request.params = params or {}
+    mock_request.headers = headers or {}
+    mock_request.route_params = {"resource": "exercises"}
+    mock_request.get_body = Mock(return_value=b'')
+    return mock_request
+
+def create_check_request(body):
+    """Create a mock POST /api/check_answers request"""
+    mock_request = Mock()
+    mock_request.method = "POST"
+    mock_request.url = "http://localhost:7071/api/check_answers"
+    mock_request.params = {}
+    mock_request.headers = {"Content-Type": "application/json"}
+    mock_request.route_params = {"resource": "check_answers"}
+    raw = json.dumps(body).encode('utf-8')
+    mock_request.get_body = Mock(return_value=raw)
+    mock_request.get_json = Mock(return_value=body)
+    return mock_request
+
+def check_answers(body):
+    response = main(create_check_request(body))
+    return response.status_code, json.loads(response.get_body())
+
+def get_exercises(params, headers=None):
+    response = main(create_mock_request(params, headers))
+    return response.status_code, json.loads(response.get_body())
+
+def solve(question):
+    """Answer of an English question, computed independently of the generator"""
+    numbers = [int(number) for number in re.findall(r'\d+', question)]
+    if "perimeter" in question:
+        return 2 * (numbers[0] + numbers[1])
+    if "Find the area" in question:
+        return numbers[0] * numbers[1]
+    if "other side" in question:
+        return numbers[0] // numbers[1]
+    if " of " in question:
+        return numbers[2] * numbers[0] // numbers[1]
+    units = re.match(r'\d+ (\w+) = \? (\w+)', question)
+    if units:
+        large, small = units.groups()
+        if (large, small) in UNITS:
+            return numbers[0] * UNITS[(large, small)]
+        return numbers[0] // UNITS[(small, large)]
+    a, b = numbers
+    return {"+": a + b, "−": a - b, "×": a * b, "÷": a // b}[question.split()[1]]
+
+def test_exercises():
+    """Test reproducibility, answers, localization, errors and answer checking"""
+    print("Testing exercise generation...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    # Test 1: Same seed, same problems; a longer set extends a shorter one
+    print("\n1. Testing reproducibility...")
+    total_tests += 1
+    try:
+        params = {"topic": "Fractions (half, quarter, third)", "difficulty": "3", "seed": "42", "count": "20"}
+        status, first = get_exercises(params)
+        status, second = get_exercises(params)
+        status, longer = get_exercises({**params, "count": "50"})
+        status, other = get_exercises({**params, "seed": "43"})
+        print(f"{first['kind']} #0: {first['exercises'][0]}")
+        assert status == 200
+        assert first == second
+        assert longer["exercises"][:20] == first["exercises"]
+        assert other["exercises"] != first["exercises"]
+        assert first["exercises"][7]["id"] == "fractions.3.42.7"
+        assert exercises.parse_exercise_id("fractions.3.42.7") == ("fractions", 3, 42, 7)
+        assert exercises.parse_exercise_id("fractions.4.42.7") is None
+        status, unseeded = get_exercises({"topic": "add_sub"})
+        print(f"Random seed: {unseeded['seed']}, {len(unseeded['exercises'])} problems")
+        assert len(unseeded["exercises"]) == 10
+        print("✅ Reproducibility test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: Every answer is right, for every kind and difficulty
+    print("\n2. Testing answers...")
+    total_tests += 1
+    try:
+        checked = 0
+        for kind in exercises.GENERATORS:
+            for difficulty in exercises.DIFFICULTIES:
+                params = {"topic": kind, "difficulty": str(difficulty), "seed": "7", "count": "500", "lang": "en"}
+                status, data = get_exercises(params)
+                assert status == 200
+                for item in data["exercises"]:
+                    assert solve(item["question"]) == item["answer"], item
+                    assert item["answer"] > 0, item
+                    checked += 1
+        print(f"Checked {checked} answers")
+        print("✅ Answers test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Questions follow the negotiated language, answers do not change
+    print("\n3. Testing localization...")
+    total_tests += 1
+    try:
+        params = {"topic": "  измерение ДЛИНЫ, массы, времени ", "difficulty": "2", "seed": "5", "count": "5"}
+        status, russian = get_exercises(params)
+        status, english = get_exercises(params, {"Accept-Language": "en-GB,en;q=0.9"})
+        print(f"ru: {russian['topic']}: {russian['exercises'][0]['question']}")
+        print(f"en: {english['topic']}: {english['exercises'][0]['question']}")
+        assert russian["lang"] == "ru" and english["lang"] == "en"
+        assert russian["topic"] == "Измерение длины, массы, времени"
+        assert english["topic"] == "Measurement of length, mass, time"
+        assert [item["answer"] for item in russian["exercises"]] == [item["answer"] for item in english["exercises"]]
+        assert russian["exercises"][0]["question"] != english["exercises"][0]["question"]
+        print("✅ Localization test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 4: Missing, unknown and invalid parameters
+    print("\n4. Testing errors...")
+    total_tests += 1
+    try:
+        cases = [
+            ({}, 400),
+            ({"topic": "Reading short texts"}, 404),
+            ({"topic": "add_sub", "difficulty": "4"}, 400),
+            ({"topic": "add_sub", "count": "0"}, 400),
+            ({"topic": "add_sub", "count": str(exercises.MAX_COUNT + 1)}, 400),
+            ({"topic": "add_sub", "seed": "-1"}, 400),
+            ({"topic": "add_sub", "seed": "abc"}, 400),
+        ]
+        for params, expected in cases:
+            status, data = get_exercises(params)
+            print(f"{params} -> {status}: {data['error']}")
+            assert status == expected
+        print("✅ Errors test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 5: Thousands of problems in one invocation
+    print("\n5. Testing large sets...")
+    total_tests += 1
+    try:
+        params = {"topic": "mul_div", "difficulty": "3", "seed": "1", "count": str(exercises.MAX_COUNT)}
+        get_exercises(params)
+        start = time.perf_counter()
+        status, data = get_exercises(params)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(data['exercises'])} problems in {elapsed:.1f} ms")
+        assert status == 200
+        assert len(data["exercises"]) == exercises.MAX_COUNT
+        assert len({item["id"] for item in data["exercises"]}) == exercises.MAX_COUNT
+        assert elapsed < 1000
+        print("✅ Large set test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 6: Answers by id, in every accepted number format
+    print("\n6. Testing answer checking...")
+    total_tests += 1
+    try:
+        status, data = get_exercises({"topic": "fractions", "difficulty": "3", "seed": "11", "count": "6"})
+        items = data["exercises"]
+        answers = [
+            {"id": items[0]["id"], "answer": items[0]["answer"]},
+            {"id": items[1]["id"], "answer": f" {items[1]['answer']} "},
+            {"id": items[2]["id"], "answer": f"{items[2]['answer'] * 2}/2"},
+            {"id": items[3]["id"], "answer": f"{items[3]['answer']},0"},
+            {"id": items[4]["id"], "answer": items[4]["answer"] + 1},
+            {"id": items[5]["id"], "answer": "don't know"},
+            {"id": "fractions.9.11.0", "answer": 1},
+        ]
+        status, result = check_answers({"answers": answers})
+        print(f"{result['correct']}/{result['total']} correct, {result['invalid']} invalid, score {result['score']}")
+        assert status == 200
+        assert [item["correct"] for item in result["results"]] == [True, True, True, True, False, False, False]
+        assert result["results"][4]["expected"] == items[4]["answer"]
+        assert result["results"][6]["expected"] is None
+        assert (result["correct"], result["invalid"]) == (4, 1)
+        assert result["kinds"] == [{"kind": "fractions", "total": 6, "correct": 4}]
+        assert exercises.parse_answer("1 000") == 1000 and exercises.parse_answer("1 1/2") == 1.5
+        assert exercises.parse_answer("−3") == -3 and exercises.parse_answer(True) != 1
+        # Comma thousands groups, decimal commas otherwise
+        assert exercises.parse_answer("1,000") == 1000 and exercises.parse_answer("1,5") == 1.5
+        assert exercises.parse_answer("12,500.5") == 12500.5 and exercises.parse_answer("2,50") == 2.5
+        print("✅ Answer checking test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 7: A whole worksheet by topic and seed; malformed requests
+    print("\n7. Testing worksheet checking...")
+    total_tests += 1
+    try:
+        count = exercises.MAX_COUNT
+        status, data = get_exercises({"topic": "perimeter_area", "difficulty": "2", "seed": "3", "count": str(count)})
+        answers = [item["answer"] for item in data["exercises"]]
+        answers[::4] = ["?"] * len(answers[::4])
+        body = {"topic": "Периметр и площадь простых фигур", "difficulty": 2, "seed": 3, "answers": answers}
+        check_answers(body)
+        start = time.perf_counter()
+        status, result = check_answers(body)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{result['correct']}/{result['total']} correct in {elapsed:.1f} ms")
+        assert status == 200
+        assert result["total"] == count and result["correct"] == count - count // 4
+        assert elapsed < 1000
+        # Sparse ids of many seeds regenerate the same answers as whole sets
+        ids = [exercises.exercise_id("add_sub", 3, seed, 9000 + seed) for seed in range(50)]
+        expected = [int(exercises.generate("add_sub", 3, seed, 9001 + seed)[2][-1]) for seed in range(50)]
+        assert exercises.expected_answers(ids).tolist() == expected
+        for body in ({}, {"answers": [1, 2]}, {"answers": "12"}, {"topic": "Reading short texts", "seed": 1, "answers": [1]},
+                     {"answers": [{"id": "add_sub.1.1.0", "answer": 1}] * (exercises.MAX_COUNT + 1)}):
+            status, data = check_answers(body)
+            print(f"Malformed request -> {status}")
+            assert status == 400
+        print("✅ Worksheet checking test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_exercises()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,172 @@
+"""
+Test script for the streaming NDJSON catalog export
+"""
+import sys
+import json
+import gzip
+import tracemalloc
+import types
+import zlib
+from unittest.mock import Mock
+
+sys.path.insert(0, 'router')
+
+from __init__ import main
+from shared_code import export, handlers
+from shared_code.prerequisites import PrerequisiteGraph
+from shared_code.responses import StreamingResponse
+
+def create_mock_request(params=None, headers=None):
+    """Create a mock /api/topics export request"""
+    mock_request = Mock()
+    mock_request.method = "GET"
+    mock_request.url = "http://localhost:7071/api/topics"
+    mock_request.params = {"format": "ndjson", **(params or {})}
+    mock_request.headers = headers or {}
+    mock_request.route_params = {"resource": "topics"}
+    mock_request.get_body = Mock(return_value=b'')
+    mock_request.get_json = Mock(side_effect=ValueError("No JSON"))
+    return mock_request
+
+def export_lines(params=None, headers=None):
+    response = main(create_mock_request(params, headers))
+    body = response.get_body()
+    if response.status_code != 200:
+        return response, body
+    return response, [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+def synthetic_view(subjects, topics_per_subject, languages=("ru", "en")):
+    """Stand-in for an ApiView of a large catalog: only what the export reads"""
+    topic_entries = {}
+    requires = {}
+    for subject in range(subjects):
+        for position in range(topics_per_subject):
+            topic = f"s{subject}-t{position}"
+            topic_entries[topic] = (f"S{subject}", {lang: f"Topic {position} of subject {subject} ({lang})"
+                                                   for lang in languages})
+            requires[topic] = [f"s{subject}-t{position - 1}"] if position else []
+    return types.SimpleNamespace(
+        languages=languages,
+        topic_entries=topic_entries,
+        subject_names={f"S{subject}": {lang: f"Subject {subject}" for lang in languages}
+                       for subject in range(subjects)},
+        prerequisites=PrerequisiteGraph(requires)
+    )
+
+def test_export():
+    """Test export records, filters, encodings and bounded memory"""
+    print("Testing catalog export...")
+    print("=" * 60)
+
+    tests_passed = 0
+    total_tests = 0
+    view = handlers.current_view()
+
+    # Test 1: One record per topic and language
+    print("\n1. Testing export records...")
+    total_tests += 1
+    try:
+        response, records = export_lines()
+        print(f"Status: {response.status_code}, {len(records)} records, {response.mimetype}")
+        assert response.status_code == 200 and response.mimetype == export.NDJSON_MIMETYPE
+        assert len(records) == len(view.topic_entries) * len(view.languages)
+        assert {(record["id"], record["lang"]) for record in records} == {
+            (topic, lang) for topic in view.topic_entries for lang in view.languages}
+        fractions = next(record for record in records
+                         if record["id"] == "math-fractions" and record["lang"] == "en")
+        print(f"Record: {fractions}")
+        assert fractions["subject"] == "Math" and fractions["subject_name"] == "Math"
+        assert fractions["name"] == "Fractions (half, quarter, third)"
+        assert fractions["requires"] == list(view.prerequisites.requires[view.prerequisites.index["math-fractions"]])
+        print("✅ Export records test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+
+    # Test 2: Language and subject filters
+    print("\n2. Testing filters...")
+    total_tests += 1
+    try:
+        response, records = export_lines({"lang": "en"})
+        assert {record["lang"] for record in records} == {"en"}
+        response, records = export_lines({"lang": "ru, en", "subject": "Английский"})
+        print(f"English topics in ru and en: {len(records)} records")
+        assert {record["subject"] for record in records} == {"English"}
+        assert len(records) == 2 * sum(1 for subject, _ in view.topic_entries.values() if subject == "English")
+        response, body = export_lines({"lang": "de"})
+        print(f"lang=de: {response.status_code} {json.loads(body)['error']}")
+        assert response.status_code == 400
+        response, body = export_lines({"subject": "Math,Physics"})
+        print(f"subject=Physics: {response.status_code} {json.loads(body)['error']}")
+        assert response.status_code == 404
+        print("✅ Filter test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+
+    # Test 3: Compressed exports decode to the same lines
+    print("\n3. Testing compressed exports...")
+    total_tests += 1
+    try:
+        plain = main(create_mock_request()).get_body()
+        for encoding, decompress in (("gzip", gzip.decompress), ("deflate", zlib.decompress)):
+            response = main(create_mock_request(headers={"Accept-Encoding": encoding}))
+            body = response.get_body()
+            print(f"{encoding}: {len(body)} of {len(plain)} bytes")
+            assert response.headers["Content-Encoding"] == encoding
+            assert decompress(body) == plain and len(body) < len(plain)
+        print("✅ Compression test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+
+    # Test 4: The body is made chunk by chunk in bounded memory
+    print("\n4. Testing bounded memory...")
+    total_tests += 1
+    try:
+        large = synthetic_view(subjects=40, topics_per_subject=1000)
+        size = 0
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for encoding in (export.IDENTITY, "gzip"):
+            for chunk in export.export_chunks(large, large.languages, encoding=encoding):
+                size += len(chunk)
+                assert len(chunk) < 2 * export.CHUNK_SIZE
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        print(f"{len(large.topic_entries) * 2} records, {size / 1024 / 1024:.1f} MB of output, "
+              f"peak {peak / 1024:.0f} kB allocated")
+        assert size > 8 * 1024 * 1024 and peak < 1024 * 1024
+        print("✅ Bounded memory test passed!")
+        tests_passed += 1
+    except Exception as e:
+        tracemalloc.stop()
+        print(f"❌ Error: {str(e)}")
+
+    # Test 5: Streaming responses are iterated or collected once
+    print("\n5. Testing streaming responses...")
+    total_tests += 1
+    try:
+        response = StreamingResponse(iter([b"a\n", b"b\n"]), mimetype=export.NDJSON_MIMETYPE)
+        assert list(response.iter_body()) == [b"a\n", b"b\n"]
+        response = StreamingResponse(iter([b"a\n", b"b\n"]), mimetype=export.NDJSON_MIMETYPE)
+        assert response.get_body() == b"a\nb\n" and response.get_body() == b"a\nb\n"
+        assert list(response.iter_body()) == [b"a\nb\n"]
+        print("✅ Streaming response test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_export()
+    sys.exit(0 if success else 1)
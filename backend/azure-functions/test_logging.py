@@ -0,0 +1,101 @@
+"""
+Test script for the structured, sampled logging facade
+"""
+import sys
+import logging
+from unittest.mock import Mock
+
+from shared_code import log
+
+class ListHandler(logging.Handler):
+    """Collect formatted records"""
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+class Unprintable:
+    """Fails the test if a disabled record gets formatted"""
+    def __str__(self):
+        raise AssertionError("formatted while disabled")
+
+def create_mock_request(headers=None):
+    """Create a mock HTTP request with optional headers"""
+    mock_request = Mock()
+    mock_request.headers = headers or {}
+    return mock_request
+
+def test_logging():
+    """Test lazy formatting, correlation ids and sampling"""
+    print("Testing logging facade...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    handler = ListHandler()
+    logger = log.get_logger("test_logging")
+    logger.logger.addHandler(handler)
+    logger.logger.propagate = False
+    
+    # Test 1: Disabled levels never format their fields
+    print("\n1. Testing disabled level...")
+    total_tests += 1
+    try:
+        logger.logger.setLevel(logging.WARNING)
+        logger.info("ignored", value=Unprintable())
+        assert handler.records == []
+        print("✅ Disabled level test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: Structured record with the request's correlation id
+    print("\n2. Testing structured record...")
+    total_tests += 1
+    try:
+        logger.logger.setLevel(logging.INFO)
+        log.start_request(create_mock_request({"x-correlation-id": "abc123"}))
+        logger.info("topics_returned", subject="Math", language="en")
+        record = handler.records[-1]
+        print(f"Message: {record.getMessage()}")
+        assert record.getMessage() == "topics_returned subject=Math language=en correlation_id=abc123"
+        assert record.custom_dimensions["subject"] == "Math"
+        print("✅ Structured record test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Sampling drops INFO but keeps errors
+    print("\n3. Testing sampling...")
+    total_tests += 1
+    try:
+        log.configure_sampling({"test_logging": 0.0})
+        handler.records.clear()
+        for _ in range(100):
+            log.start_request(create_mock_request())
+            logger.info("sampled_out")
+        logger.error("always_kept")
+        print(f"Records kept: {[record.getMessage().split()[0] for record in handler.records]}")
+        assert [record.getMessage().split()[0] for record in handler.records] == ["always_kept"]
+        log.configure_sampling({})
+        print("✅ Sampling test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_logging()
+    sys.exit(0 if success else 1)
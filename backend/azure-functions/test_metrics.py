@@ -0,0 +1,85 @@
+"""
+Test script for per-stage timing and the get_metrics function
+"""
+import sys
+import json
+import importlib.util
+from unittest.mock import Mock
+
+from shared_code import timing
+
+def load_main(function_name):
+    """Import a function's main by folder name"""
+    spec = importlib.util.spec_from_file_location(function_name, f"{function_name}/__init__.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.main
+
+def create_mock_request(params=None, headers=None):
+    """Create a mock HTTP GET request"""
+    mock_request = Mock()
+    mock_request.method = "GET"
+    mock_request.params = params or {}
+    mock_request.headers = headers or {}
+    mock_request.get_json = Mock(side_effect=ValueError("No JSON body"))
+    return mock_request
+
+def test_metrics():
+    """Test Server-Timing, stage histograms and metrics rendering"""
+    print("Testing timing and metrics...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    get_topics = load_main("get_topics")
+    get_metrics = load_main("get_metrics")
+    
+    # Test 1: Stages are recorded and reported in Server-Timing
+    print("\n1. Testing Server-Timing header...")
+    total_tests += 1
+    try:
+        timing.SERVER_TIMING_ENABLED = True
+        response = get_topics(create_mock_request({"subject": "Math"}))
+        header = response.headers.get("Server-Timing")
+        print(f"Server-Timing: {header}")
+        assert [part.split(";")[0] for part in header.split(", ")] == ["lang", "subject", "serialize", "response", "total"]
+        assert timing.histogram("get_topics", "total").count >= 1
+        print("✅ Server-Timing test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    finally:
+        timing.SERVER_TIMING_ENABLED = False
+    
+    # Test 2: Prometheus and JSON metrics
+    print("\n2. Testing metrics output...")
+    total_tests += 1
+    try:
+        text = get_metrics(create_mock_request()).get_body().decode('utf-8')
+        assert 'tutorai_stage_duration_seconds_count{function="get_topics",stage="total"} 1' in text
+        assert 'le="+Inf"' in text
+        
+        data = json.loads(get_metrics(create_mock_request({"format": "json"})).get_body())
+        stages = {(item["function"], item["stage"]): item for item in data["stages"]}
+        print(f"Stages: {sorted(stages)}")
+        assert stages[("get_topics", "lang")]["recent_p50_us"] is not None
+        assert any(cache["function"] == "api" for cache in data["caches"])
+        print("✅ Metrics output test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_metrics()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,99 @@
+"""
+Test script for Accept-Language negotiation shared by the functions
+"""
+import sys
+
+from shared_code.negotiation import LanguageNegotiator, choose_encoding, parse_accept_language
+
+CASES = [
+    # (Accept-Language header, expected language)
+    ("", "ru"),
+    ("en", "en"),
+    ("en-US,en;q=0.9", "en"),
+    ("en;q=0.1, ru;q=0.9", "ru"),
+    ("en-GB", "en"),
+    ("de-DE, fr;q=0.8", "ru"),
+    ("de, *;q=0.5", "ru"),
+    ("ru;q=0, *", "en"),
+    ("en;q=0, en-GB", "ru"),
+    ("EN-us;q=1.000", "en"),
+    ("en;q=2, ru", "ru"),
+    ("x" * 10000 + ",en", "ru"),
+    (",".join(["de"] * 100) + ",en", "ru"),
+]
+
+ENCODING_CASES = [
+    # (Accept-Encoding header, expected coding)
+    ("", "identity"),
+    ("gzip, deflate, br", "gzip"),
+    ("deflate", "deflate"),
+    ("gzip;q=0.5, deflate", "deflate"),
+    ("gzip;q=0, *", "deflate"),
+    ("br, identity", "identity"),
+    ("x-gzip", "gzip"),
+]
+
+
+def test_negotiation():
+    """Test language negotiation and the header cache"""
+    print("Testing Accept-Language negotiation...")
+    print("=" * 60)
+
+    tests_passed = 0
+    total_tests = 0
+
+    negotiator = LanguageNegotiator(["ru", "en"], "ru")
+
+    for header, expected in CASES:
+        total_tests += 1
+        result = negotiator.negotiate(header)
+        label = header if len(header) < 40 else header[:37] + "..."
+        if result == expected:
+            print(f"✅ {label!r} -> {result}")
+            tests_passed += 1
+        else:
+            print(f"❌ {label!r} -> {result}, expected {expected}")
+
+    for header, expected in ENCODING_CASES:
+        total_tests += 1
+        result = choose_encoding(header)
+        if result == expected:
+            print(f"✅ Accept-Encoding {header!r} -> {result}")
+            tests_passed += 1
+        else:
+            print(f"❌ Accept-Encoding {header!r} -> {result}, expected {expected}")
+
+    # Ranges are ordered by q-value, equal weights keep header order
+    total_tests += 1
+    ranges = parse_accept_language("da, en-gb;q=0.8, en;q=0.7, fr;q=0.8")
+    if ranges == [("da", 1.0), ("en-gb", 0.8), ("fr", 0.8), ("en", 0.7)]:
+        print("✅ Ranges ordered by q-value")
+        tests_passed += 1
+    else:
+        print(f"❌ Unexpected range order: {ranges}")
+
+    # Repeated headers are answered from the cache
+    total_tests += 1
+    before = negotiator.cache_info()
+    for _ in range(10):
+        negotiator.negotiate("en-US,en;q=0.9")
+    after = negotiator.cache_info()
+    if after.hits - before.hits == 10 and after.misses == before.misses:
+        print(f"✅ Cache hits counted: {after}")
+        tests_passed += 1
+    else:
+        print(f"❌ Unexpected cache counters: {after}")
+
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_negotiation()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,189 @@
+"""
+Test script for the topic prerequisite graph and get_next_topics
+"""
+import sys
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['PROGRESS_DB_PATH'] = os.path.join(TMP_DIR, 'progress.sqlite3')
+os.environ['PROGRESS_API_KEY'] = 'test-progress-key'
+
+sys.path.insert(0, 'router')
+
+from __init__ import main
+from shared_code import progress
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog
+from shared_code.prerequisites import PrerequisiteGraph, members
+
+def create_mock_request(method="GET", params=None, body=None):
+    """Create a mock /api/next_topics request"""
+    mock_request = Mock()
+    mock_request.method = method
+    mock_request.url = "http://localhost:7071/api/next_topics"
+    mock_request.params = params or {}
+    mock_request.headers = {"X-Progress-Key": "test-progress-key"}
+    if body is not None:
+        mock_request.headers["Content-Type"] = "application/json"
+    mock_request.route_params = {"resource": "next_topics"}
+    raw = json.dumps(body).encode('utf-8') if body is not None else b''
+    mock_request.get_body = Mock(return_value=raw)
+    mock_request.get_json = Mock(return_value=body)
+    return mock_request
+
+def next_topics(params=None, body=None):
+    response = main(create_mock_request("POST" if body is not None else "GET", params, body))
+    return response.status_code, json.loads(response.get_body())
+
+def test_prerequisites():
+    """Test graph layout, validation, recommendations and the HTTP endpoint"""
+    print("Testing topic prerequisites...")
+    print("=" * 60)
+
+    tests_passed = 0
+    total_tests = 0
+
+    try:
+        # Test 1: Topological order and transitive closures
+        print("\n1. Testing graph layout...")
+        total_tests += 1
+        try:
+            graph = PrerequisiteGraph({
+                "area": ["perimeter", "multiply"],
+                "add": [],
+                "multiply": ["add"],
+                "perimeter": ["add"],
+                "fractions": ["multiply", "add"],
+            })
+            print(f"Order: {graph.order}")
+            assert graph.order == ("add", "multiply", "perimeter", "area", "fractions")
+            low, bits = graph.closure[graph.index["area"]]
+            closure = [graph.order[i] for i in members(bits << low)]
+            print(f"Closure of area: {closure}")
+            assert closure == ["add", "multiply", "perimeter"]
+            for i, topic in enumerate(graph.order):
+                assert all(graph.index[required] < i for required in graph.requires[i])
+            print("✅ Graph layout test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 2: Cycles and unknown prerequisites are rejected
+        print("\n2. Testing validation...")
+        total_tests += 1
+        try:
+            for requires in ({"a": ["b"], "b": ["c"], "c": ["a"], "d": []},
+                             {"a": ["a"]},
+                             {"a": ["missing"]}):
+                try:
+                    PrerequisiteGraph(requires)
+                    raise AssertionError(f"Accepted {requires}")
+                except ValueError as e:
+                    print(f"{requires}: {e}")
+            print("✅ Validation test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 3: A catalog reload with a cycle keeps the last good snapshot
+        print("\n3. Testing catalog reload with a cycle...")
+        total_tests += 1
+        try:
+            with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+                document = json.load(catalog_file)
+            path = os.path.join(TMP_DIR, 'catalog.json')
+            with open(path, 'w', encoding='utf-8') as catalog_file:
+                json.dump(document, catalog_file, ensure_ascii=False)
+            catalog = Catalog(path, check_interval=0, shared_directory='')
+            document["subjects"][0]["topics"][0]["requires"] = ["math-fractions"]
+            document["version"] += 1
+            with open(path, 'w', encoding='utf-8') as catalog_file:
+                json.dump(document, catalog_file, ensure_ascii=False)
+            reloaded = catalog.reload(force=True)
+            print(f"Reloaded: {reloaded}, serving version {catalog.current().version}")
+            assert not reloaded and catalog.current().version == document["version"] - 1
+            print("✅ Catalog reload test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 4: Recommendations from mastered topic ids
+        print("\n4. Testing next topics...")
+        total_tests += 1
+        try:
+            status, body = next_topics({"lang": "en"})
+            print(f"Nothing mastered: {[item['id'] for item in body['next']]}")
+            assert status == 200
+            assert [item["id"] for item in body["next"]] == [
+                "math-addition-subtraction", "math-geometry-shapes", "english-vocabulary"]
+            # Mastering fractions covers multiplication and addition
+            status, body = next_topics({"mastered": "math-fractions, math-measurement", "subject": "Math"})
+            print(f"Fractions and measurement: {[item['id'] for item in body['next']]}")
+            assert [item["id"] for item in body["next"]] == [
+                "math-geometry-shapes", "math-word-problems", "math-tables-charts"]
+            assert body["lang"] == "ru" and body["mastered"] == 2
+            status, body = next_topics(body={"mastered": ["english-vocabulary", "english-present-simple"]},
+                                       params={"lang": "en", "subject": "English"})
+            writing = [item for item in body["next"] if item["id"] == "english-writing"]
+            print(f"Present Simple: {[item['id'] for item in body['next']]}")
+            assert not writing and "english-grammar-basics" in [item["id"] for item in body["next"]]
+            status, body = next_topics(body={"mastered": ["english-grammar-basics", "english-present-simple"]},
+                                       params={"lang": "en", "subject": "English"})
+            writing = next(item for item in body["next"] if item["id"] == "english-writing")
+            print(f"Writing: {writing}")
+            assert writing["requires"] == ["english-present-simple", "english-grammar-basics"]
+            print("✅ Next topics test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 5: Mastered topics from recorded progress
+        print("\n5. Testing next topics of a student...")
+        total_tests += 1
+        try:
+            progress.STORE.record("s-1", [("math-addition-subtraction", True)] * 6)
+            status, body = next_topics({"student": "s-1", "subject": "Math", "lang": "en"})
+            print(f"Student s-1: {[item['id'] for item in body['next']]}")
+            assert status == 200 and body["mastered"] == 1
+            assert "math-multiplication-division" in [item["id"] for item in body["next"]]
+            assert "math-addition-subtraction" not in [item["id"] for item in body["next"]]
+            print("✅ Student test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 6: Invalid requests
+        print("\n6. Testing invalid requests...")
+        total_tests += 1
+        try:
+            for params, body, expected in (({"mastered": "no-such-topic"}, None, 400),
+                                           ({}, {"mastered": "math-fractions"}, 400),
+                                           ({"student": " "}, None, 400),
+                                           ({"subject": "Matematika"}, None, 404)):
+                status, payload = next_topics(params, body)
+                print(f"{params} {body}: {status} {payload['error']}")
+                assert status == expected
+            print("✅ Invalid requests test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+    finally:
+        progress.STORE.close()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_prerequisites()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,285 @@
+"""
+Test script for the student progress store (progress)
+"""
+import sys
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import Mock
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['PROGRESS_DB_PATH'] = os.path.join(TMP_DIR, 'progress.sqlite3')
+os.environ['PROGRESS_API_KEY'] = 'test-progress-key'
+os.environ['PROGRESS_PRINCIPAL_HEADER'] = 'X-MS-CLIENT-PRINCIPAL-ID'
+
+sys.path.insert(0, 'router')
+
+from __init__ import main, main_async
+from shared_code import progress
+from shared_code.progress import ProgressStore
+
+# Sent as a trusted back end unless a test gives other headers
+BACKEND_HEADERS = {"X-Progress-Key": "test-progress-key"}
+
+def create_mock_request(method="GET", params=None, body=None, headers=None):
+    """Create a mock /api/progress request"""
+    mock_request = Mock()
+    mock_request.method = method
+    mock_request.url = "http://localhost:7071/api/progress"
+    mock_request.params = params or {}
+    mock_request.headers = dict(BACKEND_HEADERS if headers is None else headers)
+    if body is not None:
+        mock_request.headers["Content-Type"] = "application/json"
+    mock_request.route_params = {"resource": "progress"}
+    raw = json.dumps(body).encode('utf-8') if body is not None else b''
+    mock_request.get_body = Mock(return_value=raw)
+    mock_request.get_json = Mock(return_value=body)
+    return mock_request
+
+def call(resource, method="GET", params=None, body=None, headers=None):
+    request = create_mock_request(method, params, body, headers)
+    request.route_params = {"resource": resource}
+    response = main(request)
+    return response.status_code, json.loads(response.get_body())
+
+def reference_mastery(outcomes):
+    """Mastery after a sequence of attempts, one at a time"""
+    mastery = 0.0
+    for correct in outcomes:
+        mastery = mastery * (1 - progress.MASTERY_RATE) + (progress.MASTERY_RATE if correct else 0.0)
+    return round(mastery, 4)
+
+def test_progress():
+    """Test recording, summaries, write-behind flushes and the HTTP endpoint"""
+    print("Testing student progress store...")
+    print("=" * 60)
+
+    tests_passed = 0
+    total_tests = 0
+
+    try:
+        # Test 1: Record attempts over HTTP and read the summary back
+        print("\n1. Testing POST and GET /api/progress...")
+        total_tests += 1
+        try:
+            outcomes = [True, False, True, True, True, True]
+            status, body = call("progress", "POST", body={
+                "student": "s-1",
+                "attempts": [{"id": "math-fractions", "correct": correct} for correct in outcomes]
+                + [{"id": "english-vocabulary", "correct": False}]
+            })
+            print(f"POST: {status} {body}")
+            assert status == 202 and body == {"student": "s-1", "recorded": 7}
+            status, body = call("progress", params={"student": "s-1", "lang": "en"})
+            print(f"GET: {status} mastered={body['mastered']}, topics={[item['topic'] for item in body['topics']]}")
+            assert status == 200 and body["lang"] == "en"
+            fractions = next(item for item in body["topics"] if item["topic"] == "math-fractions")
+            assert (fractions["attempts"], fractions["correct"], fractions["subject"]) == (6, 5, "Math")
+            assert fractions["mastery"] == reference_mastery(outcomes)
+            assert fractions["mastered"] and fractions["name"] == "Fractions (half, quarter, third)"
+            assert [item["topic"] for item in body["topics"]] == ["english-vocabulary", "math-fractions"]
+            print("✅ POST and GET test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 2: Invalid requests
+        print("\n2. Testing invalid requests...")
+        total_tests += 1
+        try:
+            cases = [
+                ("GET", {}, None),
+                ("GET", {"student": "  "}, None),
+                ("POST", {}, {"attempts": [{"id": "math-fractions", "correct": True}]}),
+                ("POST", {}, {"student": "s-1", "attempts": [{"id": "no-such-topic", "correct": True}]}),
+                ("POST", {}, {"student": "s-1", "attempts": [{"id": "math-fractions", "correct": 1}]}),
+                ("POST", {}, {"student": "s-1", "attempts": [{"id": ["math-fractions"], "correct": True}]}),
+                ("POST", {}, {"student": "s-1", "attempts": [{"id": {"topic": 1}, "correct": True}]}),
+                ("POST", {}, {"student": "x" * 200, "attempts": []}),
+            ]
+            for method, params, body in cases:
+                status, payload = call("progress", method, params, body)
+                print(f"{method} {params} {str(body)[:60]}: {status} {payload['error']}")
+                assert status == 400
+            print("✅ Invalid requests test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 3: Write-behind batches persist coalesced runs exactly
+        print("\n3. Testing flushes and reloads...")
+        total_tests += 1
+        try:
+            path = os.path.join(TMP_DIR, 'flushes.sqlite3')
+            store = ProgressStore(path, flush_interval=3600)
+            outcomes = [True, True, False, True, False, True, True, True]
+            for i, correct in enumerate(outcomes):
+                store.record("s-2", [("math-fractions", correct)], at=float(i))
+                if i % 3 == 2:
+                    store.flush()
+            before = store.summary("s-2")
+            store.close()
+            reopened = ProgressStore(path)
+            after = reopened.summary("s-2")
+            print(f"Before close: {before['math-fractions']}")
+            print(f"Reopened: {after['math-fractions']}")
+            assert before == after
+            assert after["math-fractions"]["mastery"] == reference_mastery(outcomes)
+            assert (after["math-fractions"]["attempts"], after["math-fractions"]["last_attempt"]) == (8, 7.0)
+            reopened.close()
+            print("✅ Flushes and reloads test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 4: Evicted students are reloaded with their unwritten attempts
+        print("\n4. Testing cache eviction...")
+        total_tests += 1
+        try:
+            store = ProgressStore(os.path.join(TMP_DIR, 'cache.sqlite3'), flush_interval=3600, cache_size=2)
+            store.record("s-3", [("math-fractions", True)] * 3)
+            store.summary("s-3")
+            store.flush()
+            store.record("s-3", [("math-fractions", False)])
+            for other in ("a", "b", "c"):
+                store.summary(other)
+            reloaded = store.summary("s-3")["math-fractions"]
+            print(f"Reloaded after eviction: {reloaded}")
+            assert (reloaded["attempts"], reloaded["correct"]) == (4, 3)
+            assert reloaded["mastery"] == reference_mastery([True, True, True, False])
+            store.close()
+            print("✅ Cache eviction test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 5: Concurrent recording while the writer flushes
+        print("\n5. Testing concurrent recording...")
+        total_tests += 1
+        try:
+            store = ProgressStore(os.path.join(TMP_DIR, 'threads.sqlite3'), flush_size=64, flush_interval=0.01)
+
+            def record(worker):
+                for i in range(2000):
+                    store.record(f"student-{i % 20}", [("math-fractions", i % 2 == 0)])
+                    if i % 100 == worker:
+                        store.summary(f"student-{i % 20}")
+
+            threads = [threading.Thread(target=record, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            totals = [store.summary(f"student-{n}")["math-fractions"]["attempts"] for n in range(20)]
+            store.close()
+            reopened = ProgressStore(store.path)
+            stored = [reopened.summary(f"student-{n}")["math-fractions"]["attempts"] for n in range(20)]
+            reopened.close()
+            print(f"Attempts per student: cached {set(totals)}, stored {set(stored)}")
+            assert totals == stored == [800] * 20
+            print("✅ Concurrent recording test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 6: Graded answers are recorded as practice of their topic
+        print("\n6. Testing check_answers with a student...")
+        total_tests += 1
+        try:
+            status, exercises = call("exercises", params={"topic": "add_sub", "seed": "5", "count": "4"})
+            answers = [{"id": item["id"], "answer": item["answer"]} for item in exercises["exercises"]]
+            answers[0]["answer"] += 1
+            status, body = call("check_answers", "POST", body={"student": "s-4", "answers": answers})
+            print(f"check_answers: {status} correct={body['correct']} recorded={body['recorded']}")
+            assert status == 200 and body["recorded"] == 4
+            status, body = call("progress", params={"student": "s-4"})
+            topic = body["topics"][0]
+            print(f"Progress: {topic['topic']} {topic['attempts']} attempts, {topic['correct']} correct")
+            assert (topic["topic"], topic["attempts"], topic["correct"]) == ("math-addition-subtraction", 4, 3)
+            print("✅ check_answers test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 7: Only the signed-in student or a trusted back end gets a student's progress
+        print("\n7. Testing access to student progress...")
+        total_tests += 1
+        try:
+            signed_in = {"X-MS-CLIENT-PRINCIPAL-ID": "s-1"}
+            attempt = {"attempts": [{"id": "math-fractions", "correct": True}]}
+            forbidden = [
+                call("progress", params={"student": "s-1"}, headers={}),
+                call("progress", params={"student": "s-1"}, headers={"X-Progress-Key": "wrong"}),
+                call("progress", "POST", body={"student": "s-1", **attempt}, headers={}),
+                call("progress", params={"student": "s-4"}, headers=signed_in),
+                call("next_topics", params={"student": "s-1"}, headers={}),
+                call("check_answers", "POST", body={"student": "s-1", "answers": []}, headers={}),
+            ]
+            print(f"Without access: {[status for status, _ in forbidden]}")
+            assert all(status == 403 for status, _ in forbidden)
+            status, body = call("progress", "POST", body=attempt, headers=signed_in)
+            assert status == 202 and body["student"] == "s-1"
+            status, body = call("progress", headers=signed_in)
+            print(f"Signed in as s-1: {status}, {len(body['topics'])} topics")
+            assert status == 200 and body["student"] == "s-1"
+            assert call("progress", params={"student": "s-1"})[1]["topics"] == body["topics"]
+            # A back end must name the student
+            assert call("progress")[0] == 400
+            print("✅ Access test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 8: The async entry point keeps store calls off the event loop
+        print("\n8. Testing async requests...")
+        total_tests += 1
+        try:
+            threads = []
+            summary, record = progress.STORE.summary, progress.STORE.record
+            progress.STORE.summary = lambda *args: threads.append(threading.get_ident()) or summary(*args)
+            progress.STORE.record = lambda *args: threads.append(threading.get_ident()) or record(*args)
+
+            async def invoke_all():
+                requests = [
+                    create_mock_request("POST", body={"student": "s-5", "attempts": [
+                        {"id": "math-fractions", "correct": True}]}),
+                    create_mock_request(params={"student": "s-5"}),
+                ]
+                next_request = create_mock_request(params={"student": "s-5"})
+                next_request.route_params = {"resource": "next_topics"}
+                loop_thread = threading.get_ident()
+                responses = [await main_async(request) for request in (*requests, next_request)]
+                return loop_thread, responses
+
+            try:
+                loop_thread, responses = asyncio.run(invoke_all())
+            finally:
+                del progress.STORE.summary, progress.STORE.record
+            print(f"Statuses: {[response.status_code for response in responses]}, "
+                  f"store calls on the loop thread: {threads.count(loop_thread)} of {len(threads)}")
+            assert [response.status_code for response in responses] == [202, 200, 200]
+            assert len(threads) == 3 and loop_thread not in threads
+            print("✅ Async test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+    finally:
+        progress.STORE.close()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_progress()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,156 @@
+"""
+Test script for the routed entry point (router function)
+"""
+import sys
+import json
+import asyncio
+from unittest.mock import Mock
+
+sys.path.insert(0, 'router')
+
+from __init__ import main, main_async
+from shared_code import handlers, timing
+
+def create_mock_request(resource, subject=None, params=None, headers=None, body=None, method="GET"):
+    """Create a mock HTTP request for /api/{resource}/{subject?}"""
+    mock_request = Mock()
+    mock_request.method = method
+    mock_request.url = f"http://localhost:7071/api/{resource}"
+    mock_request.params = params or {}
+    mock_request.headers = headers or {}
+    mock_request.route_params = {"resource": resource}
+    if subject is not None:
+        mock_request.route_params["subject"] = subject
+    if body is not None:
+        mock_request.get_body = Mock(return_value=json.dumps(body).encode('utf-8'))
+        mock_request.get_json = Mock(return_value=body)
+    else:
+        mock_request.get_body = Mock(return_value=b'')
+        mock_request.get_json = Mock(side_effect=ValueError("No JSON body"))
+    return mock_request
+
+def test_router():
+    """Test resource dispatch and the shared view"""
+    print("Testing router function...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    # Test 1: Subjects through the router
+    print("\n1. Testing /api/subjects?lang=en...")
+    total_tests += 1
+    try:
+        response = main(create_mock_request("subjects", params={"lang": "en"}))
+        data = json.loads(response.get_body())
+        print(f"Status: {response.status_code}, Body: {data}")
+        assert response.status_code == 200
+        assert data == ["Math", "English"]
+        print("✅ Subjects test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: Subject as route parameter
+    print("\n2. Testing /api/topics/Математика...")
+    total_tests += 1
+    try:
+        response = main(create_mock_request("topics", subject="Математика"))
+        data = json.loads(response.get_body())
+        print(f"Status: {response.status_code}, Topics: {len(data)}")
+        assert response.status_code == 200
+        assert data[0] == "Сложение и вычитание в пределах 1000"
+        print("✅ Route parameter test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Body is parsed once and routed like get_topics
+    print("\n3. Testing POST /api/topics with body...")
+    total_tests += 1
+    try:
+        request = create_mock_request("Topics", body={"subject": "English"}, method="POST")
+        response = main(request)
+        print(f"Status: {response.status_code}")
+        assert response.status_code == 200
+        assert request.get_json.call_count == 1
+        print("✅ POST body test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 4: Router and get_* functions share one view and one cache
+    print("\n4. Testing shared view...")
+    total_tests += 1
+    try:
+        view = handlers.current_view()
+        before = view.negotiator.cache_info()
+        main(create_mock_request("subjects", headers={"Accept-Language": "en-GB,en;q=0.9"}))
+        main(create_mock_request("topics", subject="Math", headers={"Accept-Language": "en-GB,en;q=0.9"}))
+        after = view.negotiator.cache_info()
+        print(f"Cache before: {before}, after: {after}")
+        assert after.hits - before.hits >= 1
+        print("✅ Shared view test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 5: Unknown resource
+    print("\n5. Testing unknown resource...")
+    total_tests += 1
+    try:
+        response = main(create_mock_request("lessons"))
+        data = json.loads(response.get_body())
+        print(f"Status: {response.status_code}, Body: {data}")
+        assert response.status_code == 404
+        assert "subjects" in data["message"]
+        print("✅ Unknown resource test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 6: Warm-up serves every catalog answer without recording metrics
+    print("\n6. Testing warm-up...")
+    total_tests += 1
+    try:
+        served = handlers.warm_up()
+        print(f"Served: {served}")
+        assert served >= len(handlers.current_view().topic_responses)
+        assert not any(function == "warmup" for function, stage in timing.HISTOGRAMS)
+        print("✅ Warm-up test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 7: Async entry point returns identical responses
+    print("\n7. Testing async entry point...")
+    total_tests += 1
+    try:
+        async def invoke_all():
+            requests = [create_mock_request("topics", subject=name) for name in ("Math", "english", "Matematika")]
+            return await asyncio.gather(*(main_async(request) for request in requests))
+        async_responses = asyncio.run(invoke_all())
+        for name, response in zip(("Math", "english", "Matematika"), async_responses):
+            expected = main(create_mock_request("topics", subject=name))
+            print(f"{name}: {response.status_code}")
+            assert response.status_code == expected.status_code
+            assert response.get_body() == expected.get_body()
+            assert dict(response.headers) == dict(expected.headers)
+        print("✅ Async entry point test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_router()
+    sys.exit(0 if success else 1)
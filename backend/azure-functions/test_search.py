@@ -0,0 +1,132 @@
+"""
+Test script for topic search and autocomplete
+"""
+import sys
+import copy
+import json
+from unittest.mock import Mock
+
+sys.path.insert(0, 'router')
+
+from __init__ import main
+from shared_code.catalog import DEFAULT_CATALOG_PATH, CatalogSnapshot, load_document
+from shared_code.search import build_index, stem
+
+def create_mock_request(params=None, headers=None):
+    """Create a mock GET /api/search request"""
+    mock_request = Mock()
+    mock_request.method = "GET"
+    mock_request.url = "http://localhost:7071/api/search"
+    mock_request.params = params or {}
+    mock_request.headers = headers or {}
+    mock_request.route_params = {"resource": "search"}
+    mock_request.get_body = Mock(return_value=b'')
+    return mock_request
+
+def search(params):
+    response = main(create_mock_request(params))
+    return response.status_code, json.loads(response.get_body())
+
+def test_search():
+    """Test stemming, ranking, prefixes and incremental index updates"""
+    print("Testing topic search...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    # Test 1: Light stemming folds word forms together
+    print("\n1. Testing stemming...")
+    total_tests += 1
+    try:
+        forms = [("дроби", "дробь", "дробями"), ("сложение", "сложения"), ("fractions", "fraction"), ("sentences", "sentence")]
+        for group in forms:
+            stems = {stem(word) for word in group}
+            print(f"{group} -> {stems}")
+            assert len(stems) == 1
+        print("✅ Stemming test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 2: Whole-word search across subjects and locales
+    print("\n2. Testing search...")
+    total_tests += 1
+    try:
+        cases = [
+            ({"q": "дробь"}, "Дроби (половина, четверть, треть)"),
+            ({"q": "PERIMETER"}, "Perimeter and area of simple shapes"),
+            ({"q": "Present Simple", "lang": "ru"}, "Простые предложения (Present Simple)"),
+            ({"q": "writing sentences"}, "Writing simple sentences"),
+        ]
+        for params, expected in cases:
+            status, data = search(params)
+            top = data["results"][0]
+            print(f"{params} -> {top['topic']} ({top['subject']}, {top['lang']})")
+            assert status == 200
+            assert top["topic"] == expected
+        status, data = search({"q": "Present Simple", "lang": "ru"})
+        assert all(result["lang"] == "ru" for result in data["results"])
+        print("✅ Search test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 3: Prefix autocomplete and limits
+    print("\n3. Testing autocomplete...")
+    total_tests += 1
+    try:
+        status, data = search({"q": "перим"})
+        print(f"перим -> {[result['topic'] for result in data['results']]}")
+        assert data["results"][0]["topic"] == "Периметр и площадь простых фигур"
+        status, data = search({"q": "s", "limit": "2"})
+        print(f"s (limit 2) -> {[result['topic'] for result in data['results']]}")
+        assert len(data["results"]) == 2
+        status, data = search({"q": "   "})
+        print(f"Empty query -> {status}")
+        assert status == 400
+        print("✅ Autocomplete test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Test 4: Incremental update matches a full rebuild
+    print("\n4. Testing incremental index update...")
+    total_tests += 1
+    try:
+        document = load_document(DEFAULT_CATALOG_PATH)
+        index = build_index(CatalogSnapshot(document))
+        changed = copy.deepcopy(document)
+        changed["version"] = 2
+        del changed["subjects"][0]["topics"][2]
+        changed["subjects"][0]["topics"].append({"names": {"ru": "Десятичные дроби", "en": "Decimal fractions"}})
+        snapshot = CatalogSnapshot(changed)
+        updated = build_index(snapshot, index)
+        rebuilt = build_index(snapshot)
+        for query in ("дроби", "fractions", "decimal", "Present Simple", "ч"):
+            got = [(entry, score) for entry, score in updated.search(query)]
+            expected = [(entry, score) for entry, score in rebuilt.search(query)]
+            assert got == expected, query
+        old = [entry.topic for entry, _ in index.search("дроби")]
+        new = [entry.topic for entry, _ in updated.search("дроби")]
+        print(f"Before: {old}, after: {new}")
+        assert old == ["Дроби (половина, четверть, треть)"]
+        assert new == ["Десятичные дроби"]
+        print("✅ Incremental update test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_search()
+    sys.exit(0 if success else 1)
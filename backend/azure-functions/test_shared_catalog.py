@@ -0,0 +1,177 @@
+"""
+Test script for the catalog store shared by worker processes
+"""
+import sys
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import azure.functions as func
+
+from shared_code import handlers, shared_catalog
+from shared_code.catalog import DEFAULT_CATALOG_PATH, Catalog
+
+def write_catalog(path, document):
+    """Write a catalog document and bump its mtime so the change is visible"""
+    with open(path, 'w', encoding='utf-8') as catalog_file:
+        json.dump(document, catalog_file, ensure_ascii=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def start_worker(path, shared_dir):
+    """A catalog with the API view, as one worker process builds it"""
+    catalog = Catalog(path, check_interval=0, shared_directory=shared_dir)
+    catalog.register_view(handlers.VIEW_NAME, handlers.ApiView, incremental=True)
+    return catalog
+
+def idle(catalog, timeout=5.0):
+    """Wait for a background reload of the catalog to finish"""
+    deadline = time.monotonic() + timeout
+    while catalog._reload_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def settled(catalog):
+    """current(), once the background reload it may have started has finished"""
+    catalog.current()
+    idle(catalog)
+    return catalog._snapshot
+
+def view_of(catalog):
+    return catalog.current().views[handlers.VIEW_NAME]
+
+def test_shared_catalog():
+    """Test publishing, attaching, generation swaps and other processes"""
+    print("Testing shared catalog store...")
+    print("=" * 60)
+    
+    tests_passed = 0
+    total_tests = 0
+    
+    tmp_dir = tempfile.mkdtemp()
+    shared_dir = os.path.join(tmp_dir, 'shared')
+    path = os.path.join(tmp_dir, 'catalog.json')
+    shutil.copy(DEFAULT_CATALOG_PATH, path)
+    with open(path, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    private = handlers.current_view()
+    
+    try:
+        # Test 1: The first worker publishes, the next one maps its bodies
+        print("\n1. Testing publish and attach...")
+        total_tests += 1
+        try:
+            first = start_worker(path, shared_dir)
+            second = start_worker(path, shared_dir)
+            print(f"Generations: {first._shared.generation}, {second._shared.generation}, "
+                  f"{len(second._shared)} shared bodies")
+            assert first._shared.generation == second._shared.generation == 1
+            for view in (view_of(first), view_of(second)):
+                for key, response in view.topic_responses.items():
+                    assert type(response.body) is memoryview
+                    assert response.body == private.topic_responses[key].body
+                    assert type(response.variant("gzip").body) is memoryview
+            # The same bytes and headers go out as from a private copy
+            req = func.HttpRequest("GET", "http://localhost/api/topics", params={},
+                                            headers={"Accept-Encoding": "gzip"}, body=b"")
+            shared_response = view_of(second).catalog_responses["en"].to_http_response(req)
+            private_response = private.catalog_responses["en"].to_http_response(req)
+            assert shared_response.get_body() == private_response.get_body()
+            assert dict(shared_response.headers) == dict(private_response.headers)
+            print("✅ Publish and attach test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+        
+        # Test 2: A new catalog version is published as the next generation
+        print("\n2. Testing generation swap...")
+        total_tests += 1
+        try:
+            old_body = view_of(second).subject_responses["ru"].body
+            for version in (2, 3):
+                document["version"] = version
+                document["subjects"][0]["names"]["en"] = f"Mathematics {version}"
+                # A check still running could see the new file in both workers at once
+                idle(first)
+                idle(second)
+                write_catalog(path, document)
+                settled(first)
+                settled(second)
+            print(f"Generations: {first._shared.generation}, {second._shared.generation}, "
+                  f"files: {sorted(os.listdir(shared_dir))}")
+            assert first._shared.generation == second._shared.generation == 3
+            assert json.loads(bytes(view_of(second).subject_responses["en"].body)) == ["Mathematics 3", "English"]
+            # Generations older than the previous one are removed; mappings stay readable
+            assert sorted(os.listdir(shared_dir)) == ["catalog-2.bin", "catalog-3.bin", "current"]
+            assert json.loads(bytes(old_body)) == ["Математика", "Английский"]
+            print("✅ Generation swap test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+        
+        # Test 3: Another worker process maps the published store
+        print("\n3. Testing another process...")
+        total_tests += 1
+        try:
+            script = (
+                "import json, sys; sys.path.insert(0, 'router'); from __init__ import main; "
+                "from shared_code import handlers, catalog; "
+                "view = handlers.current_view(); "
+                "print(json.dumps([catalog.CATALOG._shared.generation, "
+                "type(view.subject_responses['en'].body).__name__, "
+                "json.loads(bytes(view.subject_responses['en'].body))]))"
+            )
+            env = dict(os.environ, CATALOG_PATH=path, SHARED_CATALOG_DIR=shared_dir, CATALOG_SNAPSHOT="")
+            output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True,
+                                    text=True, check=True).stdout.strip().splitlines()[-1]
+            print(f"Worker process: {output}")
+            assert json.loads(output) == [3, "memoryview", ["Mathematics 3", "English"]]
+            print("✅ Other process test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+        # Test 4: Sharing is opt-in and each catalog keeps its own shared bodies
+        print("\n4. Testing opt-in and per-catalog bodies...")
+        total_tests += 1
+        try:
+            saved = {key: os.environ.pop(key, None) for key in ("SHARED_CATALOG_DIR", "FUNCTIONS_WORKER_PROCESS_COUNT")}
+            os.environ["FUNCTIONS_WORKER_PROCESS_COUNT"] = "4"
+            default = shared_catalog.default_directory()
+            for key, value in saved.items():
+                os.environ.pop(key, None)
+                if value is not None:
+                    os.environ[key] = value
+            worker = Catalog(path, check_interval=0, shared_directory=shared_dir)
+            # A private catalog created in between must not take the worker's bodies away
+            private_catalog = start_worker(path, '')
+            worker.register_view(handlers.VIEW_NAME, handlers.ApiView, incremental=True)
+            shared_types = {type(response.variant("gzip").body) for response in view_of(worker).topic_responses.values()}
+            private_types = {type(response.body) for response in view_of(private_catalog).topic_responses.values()}
+            print(f"Default directory with 4 workers: {default!r}; worker bodies: {shared_types}, "
+                  f"private catalog bodies: {private_types}")
+            assert default == '' and shared_types == {memoryview} and private_types == {bytes}
+            # Without a directory no store key is computed
+            assert private_catalog.current().key is None and worker.current().key is not None
+            print("✅ Opt-in and per-catalog test passed!")
+            tests_passed += 1
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print(f"Tests passed: {tests_passed}/{total_tests}")
+    if tests_passed == total_tests:
+        print("✅ All tests passed!")
+        return True
+    else:
+        print("❌ Some tests failed!")
+        return False
+
+if __name__ == "__main__":
+    success = test_shared_catalog()
+    sys.exit(0 if success else 1)
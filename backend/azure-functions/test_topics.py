@@ -119,6 +119,11 @@ def test_topics():
         assert response.status_code == 400
         assert "error" in response_data
         
+        # A blank subject is as good as none
+        response = main(create_mock_request(subject="   "))
+        print(f"Blank subject status code: {response.status_code}")
+        assert response.status_code == 400
+        
         print("✅ Missing subject test passed!")
         tests_passed += 1
     except Exception as e:
@@ -146,6 +151,175 @@ def test_topics():
         import traceback
         traceback.print_exc()
     
+    # Test 6: Case-insensitive and full-width subject names
+    print("\n6. Testing normalized subject names...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        for name in ["математика", "  ENGLISH ", "\uff2d\uff41\uff54\uff48"]:
+            mock_request = create_mock_request(subject=name)
+            response = main(mock_request)
+            print(f"{name!r}: Status Code: {response.status_code}")
+            assert response.status_code == 200
+        
+        print("✅ Normalized subject names test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    # Test 7: Misspelled subjects get a suggestion
+    print("\n7. Testing misspelled subject suggestions...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        for name, expected in [("Englsh", "English"), ("Matematika", "Math"), ("Chemistry", None)]:
+            mock_request = create_mock_request(subject=name)
+            response = main(mock_request)
+            response_data = json.loads(response.get_body().decode('utf-8'))
+            
+            print(f"{name!r}: Status Code: {response.status_code}, suggestion: {response_data.get('suggestion')}")
+            assert response.status_code == 404
+            assert response_data.get("subject") == expected
+        
+        print("✅ Subject suggestion test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    # Test 8: Batch request with per-item status
+    print("\n8. Testing batch POST request...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        mock_request = create_mock_request(method="POST", body={"requests": [
+            {"subject": "Math", "lang": "en"},
+            {"subject": "Английский"},
+            {"subject": "Chemistry", "lang": "en"}
+        ]})
+        response = main(mock_request)
+        results = json.loads(response.get_body().decode('utf-8'))["results"]
+        
+        print(f"Status Code: {response.status_code}")
+        print(f"Item statuses: {[item['status'] for item in results]}")
+        assert response.status_code == 200
+        assert [item["status"] for item in results] == [200, 200, 404]
+        assert results[0]["lang"] == "en" and results[1]["lang"] == "ru"
+        assert results[0]["topics"][0] == "Addition and subtraction within 1000"
+        
+        print("✅ Batch request test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    # Test 9: Whole catalog for a language
+    print("\n9. Testing subjects=* shortcut...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        mock_request = create_mock_request(lang="en")
+        mock_request.params = {"subjects": "*", "lang": "en"}
+        response = main(mock_request)
+        results = json.loads(response.get_body().decode('utf-8'))["results"]
+        
+        print(f"Status Code: {response.status_code}")
+        print(f"Subjects: {[item['subject'] for item in results]}")
+        assert response.status_code == 200
+        assert [item["subject"] for item in results] == ["Math", "English"]
+        assert response.headers.get("Content-Language") == "en"
+        
+        print("✅ Whole catalog test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    # Test 10: Compressed responses
+    print("\n10. Testing gzip/deflate responses...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        import gzip
+        import zlib
+        
+        plain_request = create_mock_request(subject="Math")
+        plain = main(plain_request)
+        for encoding, decompress in [("gzip", gzip.decompress), ("deflate", zlib.decompress)]:
+            mock_request = create_mock_request(subject="Math")
+            mock_request.headers = {"Accept-Encoding": encoding}
+            response = main(mock_request)
+            
+            print(f"{encoding}: {len(response.get_body())} bytes, uncompressed {len(plain.get_body())} bytes")
+            assert response.headers.get("Content-Encoding") == encoding
+            assert "Accept-Encoding" in response.headers.get("Vary")
+            assert decompress(response.get_body()) == plain.get_body()
+        
+            if encoding == "gzip":
+                # Prebuilt catalog answers are compressed at the best level
+                assert response.get_body() == gzip.compress(plain.get_body(), compresslevel=9, mtime=0)
+        
+        # Per-request answers are compressed at the faster dynamic level
+        from shared_code import responses
+        dynamic = responses.build_json_response({"results": list(range(1000))}, precompress=False)
+        assert dynamic.variant("gzip").body == gzip.compress(
+            dynamic.body, compresslevel=responses.DYNAMIC_COMPRESSION_LEVEL, mtime=0)
+        assert responses.DYNAMIC_COMPRESSION_LEVEL < 9
+        
+        # Small error bodies are never compressed
+        mock_request = create_mock_request()
+        mock_request.headers = {"Accept-Encoding": "gzip"}
+        response = main(mock_request)
+        assert response.status_code == 400
+        assert "Content-Encoding" not in response.headers
+        
+        print("✅ Compression test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    # Test 11: Conditional requests with ETag
+    print("\n11. Testing ETag and 304 Not Modified...")
+    print("-" * 60)
+    total_tests += 1
+    try:
+        response = main(create_mock_request(subject="Math", lang="en"))
+        etag = response.headers.get("ETag")
+        print(f"ETag: {etag}, Cache-Control: {response.headers.get('Cache-Control')}")
+        print(f"Vary: {response.headers.get('Vary')}")
+        assert etag and etag.startswith('"')
+        assert "max-age=" in response.headers.get("Cache-Control")
+        assert "Accept-Language" in response.headers.get("Vary")
+        
+        mock_request = create_mock_request(subject="Math", lang="en")
+        mock_request.headers["If-None-Match"] = f'W/"stale", {etag}'
+        response = main(mock_request)
+        print(f"Revalidation Status Code: {response.status_code}")
+        assert response.status_code == 304
+        assert response.get_body() == b''
+        assert response.headers.get("ETag") == etag
+        
+        # Other languages have other ETags
+        mock_request = create_mock_request(subject="Math", lang="ru")
+        mock_request.headers["If-None-Match"] = etag
+        response = main(mock_request)
+        assert response.status_code == 200
+        assert response.headers.get("ETag") != etag
+        
+        print("✅ ETag test passed!")
+        tests_passed += 1
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
     # Summary
     print("\n" + "=" * 60)
     print(f"Tests passed: {tests_passed}/{total_tests}")
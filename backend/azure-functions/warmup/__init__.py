@@ -0,0 +1,15 @@
+import azure.functions as func
+
+from shared_code import handlers, log
+
+logger = log.get_logger("warmup")
+
+
+def main(warmupContext: func.Context) -> None:
+    """
+    Azure Function run by the platform when a new instance is added, before it
+    receives traffic. Importing shared_code.handlers loads the catalog and
+    builds its view; warm_up() then serves every catalog answer once.
+    """
+    served = handlers.warm_up()
+    logger.info('instance_warmed', responses=served)